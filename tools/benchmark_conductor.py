@@ -0,0 +1,156 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Load generator for the conductor.
+
+Simulates guests sending heartbeats through the fake RPC driver to one
+conductor worker per partition, and reports how many heartbeats the
+workers handle per second and their lag, the time from a heartbeat being
+sent to it being handled.
+
+    tools/with_venv.sh python tools/benchmark_conductor.py --guests 5000
+
+The workers share this process, so the numbers measure the cost of each
+message and the queueing in front of the workers rather than the use of
+several cores. The database is a sqlite file unless --sql-connection says
+otherwise.
+"""
+
+import eventlet
+eventlet.monkey_patch(all=True, thread=False)
+
+import optparse
+import sys
+import time
+
+from trove.common import cfg
+from trove.common import context
+from trove.common import instance as rd_instance
+from trove.common import utils
+from trove.conductor import api as conductor_api
+from trove.conductor import manager
+from trove.db import get_db_api
+from trove.instance.models import InstanceServiceStatus
+from trove.openstack.common.rpc import service as rpc_service
+
+CONF = cfg.CONF
+
+
+class TimedManager(manager.Manager):
+    """Conductor manager that records the lag of the heartbeats."""
+
+    def __init__(self, lags):
+        super(TimedManager, self).__init__()
+        self.lags = lags
+
+    def heartbeat(self, context, instance_id, payload, sent=None):
+        try:
+            super(TimedManager, self).heartbeat(context, instance_id,
+                                                payload, sent=sent)
+        finally:
+            self.lags.append(time.time() - sent)
+
+
+def _create_guests(count):
+    instance_ids = [utils.generate_uuid() for i in range(count)]
+    status = rd_instance.ServiceStatuses.NEW
+    get_db_api().insert_many(InstanceServiceStatus, [
+        {'id': utils.generate_uuid(), 'instance_id': instance_id,
+         'status_id': status.code, 'status_description': status.description,
+         'updated_at': utils.utcnow()}
+        for instance_id in instance_ids])
+    return instance_ids
+
+
+def _start_workers(lags):
+    if CONF.conductor_partitions > 1:
+        topics = [conductor_api.partition_topic(partition)
+                  for partition in range(CONF.conductor_partitions)]
+    else:
+        topics = [CONF.conductor_queue]
+    workers = []
+    for topic in topics:
+        worker = rpc_service.Service(CONF.host, topic,
+                                     manager=TimedManager(lags))
+        worker.start()
+        workers.append(worker)
+    return workers
+
+
+def _percentile(values, percent):
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-g', '--guests', type='int', default=1000,
+                      help='Number of simulated guests.')
+    parser.add_option('-b', '--heartbeats', type='int', default=3,
+                      help='Heartbeats each guest sends.')
+    parser.add_option('-p', '--partitions', type='int', default=4,
+                      help='Conductor partitions, one worker each.')
+    parser.add_option('-w', '--window', type='float', default=0,
+                      help='conductor_heartbeat_window of the workers.')
+    parser.add_option('-t', '--timeout', type='float', default=600,
+                      help='Seconds to wait for the workers to catch up.')
+    parser.add_option('--sql-connection',
+                      default='sqlite:///trove_conductor_bench.sqlite',
+                      help='Database the workers write to.')
+    options, _args = parser.parse_args()
+    CONF([], project='trove')
+    CONF.set_override('rpc_backend', 'trove.common.rpc.impl_fake')
+    CONF.set_override('sql_connection', options.sql_connection)
+    CONF.set_override('conductor_partitions', options.partitions)
+    CONF.set_override('conductor_heartbeat_window', options.window)
+
+    db_api = get_db_api()
+    db_api.db_sync(CONF)
+    db_api.configure_db(CONF)
+    instance_ids = _create_guests(options.guests)
+    lags = []
+    workers = _start_workers(lags)
+    api = conductor_api.API(context.TroveContext())
+    payload = {'service_status': rd_instance.ServiceStatuses.RUNNING.
+               description}
+
+    total = options.guests * options.heartbeats
+    start = time.time()
+    for i in range(options.heartbeats):
+        for instance_id in instance_ids:
+            api.heartbeat(instance_id, payload, sent=time.time())
+        eventlet.sleep(0)
+    while len(lags) < total and time.time() - start < options.timeout:
+        eventlet.sleep(0.01)
+    elapsed = time.time() - start
+    handled = len(lags)
+    for worker in workers:
+        worker.manager._last_seen.flush()
+        worker.stop()
+
+    if not handled:
+        print("No heartbeat handled within %s seconds" % options.timeout)
+        return 1
+    lags.sort()
+    print("%d of %d heartbeats of %d guests handled over %d partitions"
+          % (handled, total, options.guests, max(1, options.partitions)))
+    print("throughput %10.1f heartbeats per second" % (handled / elapsed))
+    print("lag mean   %10.1f msec" % (sum(lags) / len(lags) * 1000))
+    print("lag p95    %10.1f msec" % (_percentile(lags, 95) * 1000))
+    print("lag max    %10.1f msec" % (lags[-1] * 1000))
+    return 0 if handled == total else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
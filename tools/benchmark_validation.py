@@ -0,0 +1,90 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Micro-benchmark of the validation of API request bodies.
+
+Times Controller.validate_request on the payloads of instance create,
+instance resize and user create, which every such request goes through
+before reaching the controller.
+
+    tools/with_venv.sh python tools/benchmark_validation.py
+
+With --max-usec the script exits non zero when any payload takes longer
+than the given number of microseconds per validation.
+"""
+
+import optparse
+import sys
+import timeit
+
+from trove.common import cfg
+from trove.extensions.mysql.service import UserController
+from trove.instance.service import InstanceController
+
+CONF = cfg.CONF
+
+PAYLOADS = [
+    ('instance create', InstanceController, 'create', {
+        'instance': {
+            'name': 'bench-instance',
+            'flavorRef': 'https://localhost:8779/v1.0/1234/flavors/7',
+            'volume': {'size': 2},
+            'databases': [{'name': 'db%d' % i} for i in range(10)],
+            'users': [{'name': 'user%d' % i, 'password': 'secret',
+                       'databases': [{'name': 'db%d' % i}]}
+                      for i in range(10)],
+        }
+    }),
+    ('instance resize', InstanceController, 'action', {
+        'resize': {'flavorRef': 'https://localhost:8779/v1.0/1234/flavors/8'}
+    }),
+    ('user create', UserController, 'create', {
+        'users': [{'name': 'user%d' % i, 'password': 'secret',
+                   'host': '%', 'databases': [{'name': 'db%d' % i}]}
+                  for i in range(10)]
+    }),
+]
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--number', type='int', default=2000,
+                      help='Validations per payload and run.')
+    parser.add_option('-r', '--repeat', type='int', default=3,
+                      help='Runs per payload, the best one is reported.')
+    parser.add_option('--max-usec', type='float', default=None,
+                      help='Fail when a validation takes longer than this.')
+    options, _args = parser.parse_args()
+    CONF([], project='trove')
+
+    failed = False
+    for name, controller_class, action, body in PAYLOADS:
+        controller = controller_class()
+        action_args = {'body': body}
+
+        def _validate():
+            controller.validate_request(action, action_args)
+
+        timer = timeit.Timer(_validate)
+        best = min(timer.repeat(options.repeat, options.number))
+        usec = best / options.number * 1000000
+        print("%-16s %8.1f usec per validation" % (name, usec))
+        if options.max_usec is not None and usec > options.max_usec:
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
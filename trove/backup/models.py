@@ -14,7 +14,12 @@
 
 """Model classes that form the core of snapshots functionality."""
 
+import base64
+import datetime
+
+from sqlalchemy import and_
 from sqlalchemy import desc
+from sqlalchemy import or_
 from swiftclient.client import ClientException
 
 from trove.common import cfg
@@ -29,6 +34,8 @@ from trove.quota.quota import run_with_quotas
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+MARKER_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
 
 class BackupState(object):
     NEW = "NEW"
@@ -79,6 +86,10 @@ class Backup(object):
             cls.verify_swift_auth_token(context)
 
             parent = None
+            backup_id = utils.generate_uuid()
+            # A full backup is the root of its own chain.
+            root_id = backup_id
+            depth = 0
             if parent_id:
                 # Look up the parent info or fail early if not found or if
                 # the user does not have access to the parent.
@@ -87,13 +98,18 @@ class Backup(object):
                     'location': _parent.location,
                     'checksum': _parent.checksum,
                 }
+                root_id = _parent.root_id
+                depth = _parent.depth + 1
             try:
-                db_info = DBBackup.create(name=name,
+                db_info = DBBackup.create(id=backup_id,
+                                          name=name,
                                           description=description,
                                           tenant_id=context.tenant,
                                           state=BackupState.NEW,
                                           instance_id=instance_id,
                                           parent_id=parent_id,
+                                          root_id=root_id,
+                                          depth=depth,
                                           deleted=False)
             except exception.InvalidModelError as ex:
                 LOG.exception("Unable to create Backup record:")
@@ -147,37 +163,114 @@ class Backup(object):
         except exception.NotFound:
             raise exception.NotFound(uuid=backup_id)
 
+    @classmethod
+    def get_chain(cls, context, backup):
+        """
+        get all live backups of the chain a backup belongs to
+        :param backup: any backup of the chain
+        :return: dict of the backups of the chain by id
+        """
+        query = DBBackup.query()
+        query = query.filter_by(tenant_id=context.tenant,
+                                root_id=backup.root_id,
+                                deleted=False)
+        return dict((chain_backup.id, chain_backup)
+                    for chain_backup in query.all())
+
+    @classmethod
+    def get_parents(cls, context, backup):
+        """
+        get the chain of parents of a backup
+        :param backup: the backup whose parents to return
+        :return: list of parent backups, starting with the full backup
+        """
+        if not backup.parent_id:
+            return []
+        chain = cls.get_chain(context, backup)
+        parents = []
+        while backup.parent_id:
+            try:
+                backup = chain[backup.parent_id]
+            except KeyError:
+                raise exception.NotFound(uuid=backup.parent_id)
+            parents.append(backup)
+        parents.reverse()
+        return parents
+
+    @classmethod
+    def get_descendants(cls, context, backup):
+        """
+        get all live backups that depend on a backup
+        :param backup: the backup whose descendants to return
+        :return: list of backups, deepest first
+        """
+        chain = cls.get_chain(context, backup)
+        children = {}
+        for chain_backup in chain.values():
+            children.setdefault(chain_backup.parent_id,
+                                []).append(chain_backup)
+        descendants = []
+        pending = [backup.id]
+        while pending:
+            for child in children.get(pending.pop(), []):
+                descendants.append(child)
+                pending.append(child.id)
+        return sorted(descendants, key=lambda child: child.depth,
+                      reverse=True)
+
     @classmethod
     def _paginate(cls, context, query):
         """Paginate the results of the base query.
-        We use limit/offset as the results need to be ordered by date
-        and not the primary key.
+        The results are ordered by date and then id, most recent first, and
+        a page starts right after the backup its marker was made from. The
+        marker is opaque to clients, see _encode_marker.
         """
-        marker = int(context.marker or 0)
         limit = int(context.limit or CONF.backups_page_size)
-        # order by 'updated DESC' to show the most recent backups first
-        query = query.order_by(desc(DBBackup.updated))
-        # Apply limit/offset
-        query = query.limit(limit)
-        query = query.offset(marker)
-        # check if we need to send a marker for the next page
-        if query.count() < limit:
-            marker = None
-        else:
-            marker += limit
-        return query.all(), marker
+        query = query.order_by(desc(DBBackup.updated), desc(DBBackup.id))
+        if context.marker:
+            query = cls._after_marker(query, context.marker)
+        # one more backup than the page tells if there is a next page
+        backups = query.limit(limit + 1).all()
+        marker = None
+        if len(backups) > limit:
+            backups = backups[:limit]
+            marker = cls._encode_marker(backups[-1])
+        return backups, marker
+
+    @staticmethod
+    def _encode_marker(backup):
+        return base64.urlsafe_b64encode('%s_%s' % (
+            backup.updated.strftime(MARKER_TIME_FORMAT), backup.id))
+
+    @staticmethod
+    def _after_marker(query, marker):
+        if marker.isdigit():
+            # Offset of the next page in the markers of earlier releases.
+            return query.offset(int(marker))
+        try:
+            updated, backup_id = base64.urlsafe_b64decode(
+                str(marker)).split('_', 1)
+            updated = datetime.datetime.strptime(updated, MARKER_TIME_FORMAT)
+        except (TypeError, ValueError):
+            raise exception.BadRequest("Invalid marker: %s" % marker)
+        return query.filter(or_(DBBackup.updated < updated,
+                                and_(DBBackup.updated == updated,
+                                     DBBackup.id < backup_id)))
 
     @classmethod
-    def list(cls, context):
+    def list(cls, context, chain=None):
         """
         list all live Backups belong to given tenant
         :param cls:
         :param context: tenant_id included
+        :param chain: id of the full backup whose chain to list
         :return:
         """
         query = DBBackup.query()
         query = query.filter_by(tenant_id=context.tenant,
                                 deleted=False)
+        if chain:
+            query = query.filter_by(root_id=chain)
         return cls._paginate(context, query)
 
     @classmethod
@@ -213,11 +306,15 @@ class Backup(object):
         :return:
         """
 
-        # Recursively delete all children and grandchildren of this backup.
-        query = DBBackup.query()
-        query = query.filter_by(parent_id=backup_id, deleted=False)
-        for child in query.all():
-            cls.delete(context, child.id)
+        # Delete all children and grandchildren of this backup, starting
+        # with the most recent ones.
+        backup = cls.get_by_id(context, backup_id)
+        for child in cls.get_descendants(context, backup):
+            cls._delete(context, child.id)
+        return cls._delete(context, backup_id)
+
+    @classmethod
+    def _delete(cls, context, backup_id):
 
         def _delete_resources():
             backup = cls.get_by_id(context, backup_id)
@@ -250,7 +347,8 @@ class DBBackup(DatabaseModelBase):
     _data_fields = ['id', 'name', 'description', 'location', 'backup_type',
                     'size', 'tenant_id', 'state', 'instance_id',
                     'checksum', 'backup_timestamp', 'deleted', 'created',
-                    'updated', 'deleted_at', 'parent_id']
+                    'updated', 'deleted_at', 'parent_id', 'root_id',
+                    'depth', 'chain_size']
     preserve_on_delete = True
 
     @property
@@ -261,6 +359,15 @@ class DBBackup(DatabaseModelBase):
     def is_done(self):
         return self.state in BackupState.END_STATES
 
+    def update_chain_size(self):
+        """Add the size of the parents to the size of this backup."""
+        if self.size is None:
+            return
+        self.chain_size = self.size
+        if self.parent_id:
+            parent = DBBackup.find_by(id=self.parent_id)
+            self.chain_size += parent.chain_size or 0.0
+
     @property
     def filename(self):
         if self.location:
@@ -38,7 +38,9 @@ class BackupController(wsgi.Controller):
         """
         LOG.debug("Listing Backups for tenant '%s'" % tenant_id)
         context = req.environ[wsgi.CONTEXT_KEY]
-        backups, marker = Backup.list(context)
+        # Only the backups of the chain of this full backup
+        chain = req.GET.get('chain')
+        backups, marker = Backup.list(context, chain=chain)
         view = views.BackupViews(backups)
         paged = pagination.SimplePaginatedDataView(req.url, 'backups', view,
                                                    marker)
@@ -31,6 +31,9 @@ class BackupView(object):
             "size": self.backup.size,
             "status": self.backup.state,
             "parent_id": self.backup.parent_id,
+            "root_id": self.backup.root_id,
+            "depth": self.backup.depth,
+            "chain_size": self.backup.chain_size,
         }
         }
 
@@ -28,6 +28,7 @@ gettext.install('trove', unicode=1)
 from trove.common import cfg
 from trove.common import debug_utils
 from trove.common.rpc import service as rpc_service
+from trove.conductor import api as conductor_api
 from trove.db import get_db_api
 from trove.openstack.common import log as logging
 from trove.openstack.common import service as openstack_service
@@ -38,10 +39,18 @@ CONF = cfg.CONF
 def launch_services():
     get_db_api().configure_db(CONF)
     manager = 'trove.conductor.manager.Manager'
-    topic = CONF.conductor_queue
-    server = rpc_service.RpcService(manager=manager, topic=topic)
-    launcher = openstack_service.launch(server,
-                                        workers=CONF.trove_conductor_workers)
+    if CONF.conductor_partitions > 1:
+        # One worker process per partition topic.
+        launcher = openstack_service.ProcessLauncher()
+        for partition in range(CONF.conductor_partitions):
+            topic = conductor_api.partition_topic(partition)
+            server = rpc_service.RpcService(manager=manager, topic=topic)
+            launcher.launch_service(server)
+    else:
+        topic = CONF.conductor_queue
+        server = rpc_service.RpcService(manager=manager, topic=topic)
+        launcher = openstack_service.launch(
+            server, workers=CONF.trove_conductor_workers)
     launcher.wait()
 
 
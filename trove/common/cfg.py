@@ -82,8 +82,17 @@ common_opts = [
     cfg.IntOpt('users_page_size', default=20),
     cfg.IntOpt('databases_page_size', default=20),
     cfg.IntOpt('instances_page_size', default=20),
+    cfg.IntOpt('server_cache_ttl', default=0,
+               help='Seconds the state of a nova server is cached for '
+               'instance show and list requests. The cache is shared by '
+               'all API workers when memcached_servers is set. 0 disables '
+               'the cache.'),
+    cfg.IntOpt('server_load_concurrency', default=10,
+               help='Number of nova servers fetched at the same time to '
+               'list a page of instances.'),
     cfg.IntOpt('backups_page_size', default=20),
     cfg.IntOpt('configurations_page_size', default=20),
+    cfg.IntOpt('accounts_page_size', default=20),
     cfg.ListOpt('ignore_users', default=['os_admin', 'root']),
     cfg.ListOpt('ignore_dbs', default=['lost+found',
                                        'mysql',
@@ -92,12 +101,35 @@ common_opts = [
     cfg.IntOpt('agent_call_high_timeout', default=60),
     cfg.StrOpt('guest_id', default=None),
     cfg.IntOpt('state_change_wait_time', default=3 * 60),
+    cfg.IntOpt('host_update_concurrency', default=10,
+               help='Number of guests updated at the same time by a '
+               'management update of all the instances on a host.'),
     cfg.IntOpt('agent_heartbeat_time', default=10),
+    cfg.IntOpt('status_keepalive_interval', default=300,
+               help='Seconds between the reports of an unchanged datastore '
+                    'status from the guest agent to the conductor. Status '
+                    'changes are reported right away, and every status is '
+                    'reported for this long after the agent starts or the '
+                    'datastore restarts.'),
     cfg.IntOpt('num_tries', default=3),
     cfg.StrOpt('volume_fstype', default='ext3'),
     cfg.StrOpt('format_options', default='-m 5'),
     cfg.IntOpt('volume_format_timeout', default=120),
     cfg.StrOpt('mount_options', default='defaults,noatime'),
+    cfg.IntOpt('volume_migration_workers', default=4,
+               help='Number of rsync processes copying the existing data '
+                    'of a guest onto its new volume at once.'),
+    cfg.IntOpt('volume_migration_batch_size', default=1024,
+               help='Megabytes of files each rsync process copies in one '
+                    'go while migrating data onto a new volume.'),
+    cfg.StrOpt('volume_migration_checkpoint',
+               default='/var/tmp/trove-volume-migration',
+               help='File recording the progress of a data migration onto '
+                    'a new volume, for an interrupted migration to resume. '
+                    'The batches of files to copy are kept next to it, in '
+                    'the same file name ending with .plan. The volume is '
+                    'not formatted again while it holds the data of an '
+                    'interrupted migration.'),
     cfg.IntOpt('max_instances_per_user', default=5,
                help='Default maximum number of instances per tenant.'),
     cfg.IntOpt('max_accepted_volume_size', default=5,
@@ -113,6 +145,30 @@ common_opts = [
     cfg.StrOpt('taskmanager_queue', default='taskmanager'),
     cfg.StrOpt('conductor_queue', default='trove-conductor'),
     cfg.IntOpt('trove_conductor_workers', default=1),
+    cfg.IntOpt('conductor_partitions', default=1,
+               help='Number of conductor workers the guest messages are '
+                    'split over by instance id, each on a topic of its own, '
+                    'so that one worker handles all the messages of an '
+                    'instance in order. Above 1 it replaces '
+                    'trove_conductor_workers. Guests get it from the '
+                    'conductor, and send their messages to the first '
+                    'partition worker until they do.'),
+    cfg.IntOpt('conductor_last_seen_cache_size', default=10000,
+               help='Number of last seen guest message times each '
+               'conductor worker keeps in memory to discard messages that '
+               'arrive out of order. Not used when several '
+               'trove_conductor_workers share the conductor queue.'),
+    cfg.FloatOpt('conductor_last_seen_flush_interval', default=5,
+                 help='Seconds between writes of the last seen guest '
+                 'message times to the database. 0 writes them as they '
+                 'change. When several trove_conductor_workers share the '
+                 'conductor queue they are always written as they '
+                 'change.'),
+    cfg.FloatOpt('conductor_heartbeat_window', default=0,
+                 help='Seconds the conductor collects guest heartbeats '
+                 'before writing them to the database together. Only the '
+                 'newest heartbeat of each instance is written. 0 writes '
+                 'every heartbeat as it arrives.'),
     cfg.BoolOpt('use_nova_server_volume', default=False),
     cfg.BoolOpt('use_heat', default=False),
     cfg.StrOpt('device_path', default='/dev/vdb'),
@@ -139,6 +195,10 @@ common_opts = [
     cfg.IntOpt('http_delete_rate', default=200),
     cfg.IntOpt('http_put_rate', default=200),
     cfg.IntOpt('http_mgmt_post_rate', default=200),
+    cfg.BoolOpt('http_rate_limits_shared', default=False,
+                help='Keep the rate limit buckets of tenants in '
+                'memcached_servers, so that all API workers enforce a '
+                'single budget rather than one each.'),
     cfg.BoolOpt('hostname_require_ipv4', default=True,
                 help="Require user hostnames to be IPv4 addresses."),
     cfg.BoolOpt('trove_security_groups_support', default=True),
@@ -147,6 +207,18 @@ common_opts = [
     cfg.IntOpt('trove_api_workers', default=None),
     cfg.IntOpt('usage_sleep_time', default=5,
                help='Time to sleep during the check active guest.'),
+    cfg.FloatOpt('poll_backoff', default=1.5,
+                 help='Factor the task manager grows the time between the '
+                      'checks of a build by, 1 polls at a fixed rate.'),
+    cfg.IntOpt('poll_max_sleep_time', default=30,
+               help='Longest time slept between the checks of a build.'),
+    cfg.IntOpt('server_list_threshold', default=5,
+               help='Number of builds waiting on their servers from which '
+                    'the task manager lists the servers that changed at '
+                    'once rather than getting them one by one.'),
+    cfg.IntOpt('server_list_max_age', default=2,
+               help='Seconds a listing of the servers serves the builds '
+                    'waiting on them.'),
     cfg.StrOpt('region', default='LOCAL_DEV',
                help='The region this service is located.'),
     cfg.StrOpt('backup_runner',
@@ -157,10 +229,12 @@ common_opts = [
                help='Default strategy to perform backups.'),
     cfg.StrOpt('backup_namespace',
                default='trove.guestagent.strategies.backup.mysql_impl',
-               help='Namespace to load backup strategies from.'),
+               help='Namespace to load backup strategies from, unless the '
+                    'group of the datastore sets its own.'),
     cfg.StrOpt('restore_namespace',
                default='trove.guestagent.strategies.restore.mysql_impl',
-               help='Namespace to load restore strategies from.'),
+               help='Namespace to load restore strategies from, unless the '
+                    'group of the datastore sets its own.'),
     cfg.DictOpt('backup_incremental_strategy',
                 default={'InnoBackupEx': 'InnoBackupExIncremental'},
                 help='Incremental Backup Runner Based off of the default'
@@ -182,6 +256,21 @@ common_opts = [
                 help='Encrypt backups using OpenSSL.'),
     cfg.StrOpt('backup_aes_cbc_key', default='default_aes_cbc_key',
                help='Default OpenSSL aes_cbc key.'),
+    cfg.StrOpt('backup_codec_strategy', default=None,
+               help='In-process codec used to compress and encrypt backup '
+               'streams in place of the gzip and openssl shell commands. '
+               'Leave unset to keep the shell pipeline.'),
+    cfg.StrOpt('backup_codec_namespace',
+               default='trove.guestagent.strategies.codec.gzip_impl',
+               help='Namespace to load backup codec strategies from.'),
+    cfg.IntOpt('backup_compression_level', default=6,
+               help='Compression level used by the backup codec.'),
+    cfg.IntOpt('backup_compression_threads', default=4,
+               help='Number of blocks the backup codec compresses at the '
+               'same time.'),
+    cfg.IntOpt('backup_compression_block_size', default=2 ** 20,
+               help='Size of the blocks the backup codec compresses '
+               'independently.'),
     cfg.BoolOpt('backup_use_snet', default=False,
                 help='Send backup files over snet.'),
     cfg.IntOpt('backup_chunk_size', default=2 ** 16,
@@ -192,6 +281,26 @@ common_opts = [
                ' See: http://stackoverflow.com/questions/1131220/'),
     cfg.IntOpt('backup_segment_max_size', default=2 * (1024 ** 3),
                help="Maximum size of each segment of the backup file."),
+    cfg.IntOpt('backup_delete_concurrency', default=10,
+               help='Number of backup segments deleted from swift at the '
+               'same time when the swift cluster does not support bulk '
+               'deletes.'),
+    cfg.IntOpt('backup_delete_retries', default=3,
+               help='Number of times the deletion of a backup segment is '
+               'retried before the backup is marked DELETE_FAILED.'),
+    cfg.IntOpt('backup_upload_concurrency', default=1,
+               help='Number of backup segments uploaded to swift at the '
+               'same time. The next segment is read while these upload, so '
+               'up to this many segments plus one are buffered by the '
+               'guest at once.'),
+    cfg.IntOpt('backup_download_concurrency', default=1,
+               help='Number of backup segments downloaded from swift at the '
+               'same time during a restore. Segments are fetched ahead of '
+               'the restore process, so up to twice this many segments are '
+               'buffered by the guest at once.'),
+    cfg.IntOpt('backup_segment_buffer_size', default=64 * (1024 ** 2),
+               help='Bytes of each buffered backup segment kept in memory '
+               'before the buffer spills to a temporary file.'),
     cfg.StrOpt('remote_dns_client',
                default='trove.common.remote.dns_client'),
     cfg.StrOpt('remote_guest_client',
@@ -209,6 +318,14 @@ common_opts = [
     cfg.IntOpt('exists_notification_ticks', default=360,
                help='Number of report_intervals to wait between pushing '
                     'events (see report_interval).'),
+    cfg.IntOpt('exists_notification_batch_size', default=100,
+               help='Number of instances loaded from the database, and '
+                    'exists notifications published, at once.'),
+    cfg.IntOpt('account_summary_refresh_ticks', default=0,
+               help='Number of report_intervals to wait between recounting '
+                    'the instances of every account for the management '
+                    'accounts listing. The listing counts the instances on '
+                    'every request if 0.'),
     cfg.DictOpt('notification_service_id',
                 default={'mysql': '2f3ff068-2bfb-4f70-9a9d-a6bb65bc084b',
                          'redis': 'b216ffc5-1947-456c-a4cf-70f94c05f7d0',
@@ -236,6 +353,10 @@ common_opts = [
     cfg.StrOpt('template_path',
                default='/etc/trove/templates/',
                help='Path which leads to datastore templates.'),
+    cfg.BoolOpt('validation_rules_reload', default=True,
+                help='Parse the configuration parameter rules of a '
+                     'datastore again when their template changes, rather '
+                     'than only once.'),
     cfg.BoolOpt('sql_query_logging', default=False,
                 help='Allow insecure logging while '
                      'executing queries through SQLAlchemy.'),
@@ -282,6 +403,11 @@ mysql_opts = [
                 "instance-create as the 'password' field."),
     cfg.IntOpt('usage_timeout', default=400,
                help='Timeout to wait for a guest to become active.'),
+    cfg.BoolOpt('bulk_create', default=False,
+                help='Check for and create all the users or databases of a '
+                'create request in a single call to the guest agent, '
+                'instead of one call per item. Requires guest agents that '
+                'support bulk_create_users and bulk_create_databases.'),
 ]
 
 # Percona
@@ -309,6 +435,11 @@ percona_opts = [
                 "instance-create as the 'password' field."),
     cfg.IntOpt('usage_timeout', default=450,
                help='Timeout to wait for a guest to become active.'),
+    cfg.BoolOpt('bulk_create', default=False,
+                help='Check for and create all the users or databases of a '
+                'create request in a single call to the guest agent, '
+                'instead of one call per item. Requires guest agents that '
+                'support bulk_create_users and bulk_create_databases.'),
 ]
 
 # Redis
@@ -324,8 +455,14 @@ redis_opts = [
                 help='List of UDP ports and/or port ranges to open'
                      ' in the security group (only applicable '
                      'if trove_security_groups_support is True)'),
-    cfg.StrOpt('backup_strategy', default=None,
+    cfg.StrOpt('backup_strategy', default='RedisBackup',
                help='Default strategy to perform backups.'),
+    cfg.StrOpt('backup_namespace',
+               default='trove.guestagent.strategies.backup.redis_impl',
+               help='Namespace to load backup strategies from.'),
+    cfg.StrOpt('restore_namespace',
+               default='trove.guestagent.strategies.restore.redis_impl',
+               help='Namespace to load restore strategies from.'),
     cfg.StrOpt('mount_point', default='/var/lib/redis',
                help="Filesystem path for mounting "
                "volumes if volume support is enabled"),
@@ -392,8 +529,14 @@ mongodb_opts = [
                 help='List of UPD ports and/or port ranges to open'
                      ' in the security group (only applicable '
                      'if trove_security_groups_support is True)'),
-    cfg.StrOpt('backup_strategy', default=None,
+    cfg.StrOpt('backup_strategy', default='MongoDump',
                help='Default strategy to perform backups.'),
+    cfg.StrOpt('backup_namespace',
+               default='trove.guestagent.strategies.backup.mongodb_impl',
+               help='Namespace to load backup strategies from.'),
+    cfg.StrOpt('restore_namespace',
+               default='trove.guestagent.strategies.restore.mongodb_impl',
+               help='Namespace to load restore strategies from.'),
     cfg.StrOpt('mount_point', default='/var/lib/mongodb',
                help="Filesystem path for mounting "
                "volumes if volume support is enabled"),
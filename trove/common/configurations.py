@@ -27,34 +27,98 @@ LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 ENV = utils.ENV
 
-
-def _get_item(key, dictList):
-    for item in dictList:
-        if key == item.get('name'):
-            return item
+# Validation rules by datastore manager, with the template they came from.
+_RULES = {}
 
 
 def do_configs_require_restart(overrides, datastore_manager='mysql'):
-    rules = get_validation_rules(datastore_manager=datastore_manager)
+    rules = load_validation_rules(datastore_manager=datastore_manager)
     LOG.debug(_("overrides: %s") % overrides)
-    LOG.debug(_("rules?: %s") % rules)
     for key in overrides.keys():
-        rule = _get_item(key, rules['configuration-parameters'])
+        rule = rules.get(key)
         LOG.debug(_("checking the rule: %s") % rule)
-        if rule.get('restart_required'):
+        if rule.restart_required:
             return True
     return False
 
 
 def get_validation_rules(datastore_manager='mysql'):
+    return load_validation_rules(datastore_manager).rules
+
+
+def load_validation_rules(datastore_manager='mysql'):
+    """Return the ValidationRules of a datastore.
+
+    The rules template is rendered and parsed once. With
+    validation_rules_reload the rules are parsed again after the template
+    changes on disk.
+    """
+    cached = _RULES.get(datastore_manager)
+    if cached and not CONF.validation_rules_reload:
+        return cached[1]
     try:
         config_location = ("%s/validation-rules.json" % datastore_manager)
+        # Jinja only hands out a new template once the file changed.
         template = ENV.get_template(config_location)
-        return json.loads(template.render())
+        if cached and cached[0] is template:
+            return cached[1]
+        rules = ValidationRules(json.loads(template.render()))
     except Exception:
         msg = "This operation is not supported for this datastore at this time"
         LOG.exception(msg)
         raise exception.UnprocessableEntity(message=msg)
+    _RULES[datastore_manager] = (template, rules)
+    return rules
+
+
+class ValidationRules(object):
+    """The configuration parameter rules of a datastore by name.
+
+    :param rules: the parsed validation-rules.json of the datastore
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.parameters = dict(
+            (rule.get('name'), ParameterRule(rule))
+            for rule in rules['configuration-parameters'])
+
+    def get(self, name):
+        """Return the ParameterRule of a parameter, or None."""
+        return self.parameters.get(name)
+
+
+class ParameterRule(object):
+    """The rule of a configuration parameter, ready to validate against.
+
+    type is the python type of the values, None when the rule names an
+    unsupported type. min and max are None when they are not integers.
+    """
+
+    TYPES = {
+        'boolean': bool,
+        'string': basestring,
+        'integer': int,
+    }
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.name = rule.get('name')
+        self.type = self.TYPES.get(rule.get('type'))
+        self.min = self._int(rule.get('min'))
+        self.max = self._int(rule.get('max'))
+        self.deleted_at = rule.get('deleted_at')
+        self.restart_required = rule.get('restart_required')
+
+    @staticmethod
+    def _int(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def __str__(self):
+        return str(self.rule)
 
 
 class MySQLConfParser(object):
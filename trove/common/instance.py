@@ -55,6 +55,9 @@ class ServiceStatus(object):
             return False
         return self.code == other.code
 
+    def __ne__(self, other):
+        return not self == other
+
     @staticmethod
     def from_code(code):
         if code not in ServiceStatus._lookup:
@@ -30,6 +30,7 @@ from trove.common import cfg
 from trove.common import wsgi as base_wsgi
 from trove.openstack.common import importutils
 from trove.openstack.common import jsonutils
+from trove.openstack.common import memorycache
 from trove.openstack.common import wsgi
 from trove.openstack.common.gettextutils import _
 
@@ -70,6 +71,7 @@ class Limit(object):
         self.verb = verb
         self.uri = uri
         self.regex = regex
+        self.pattern = re.compile(regex)
         self.value = int(value)
         self.unit = unit
         self.unit_string = self.display_unit().lower()
@@ -95,7 +97,7 @@ class Limit(object):
         @param verb: string http verb (POST, GET, etc.)
         @param url: string URL
         """
-        if self.verb != verb or not re.match(self.regex, url):
+        if self.verb != verb or not self.pattern.match(url):
             return
 
         now = self._get_time()
@@ -125,6 +127,11 @@ class Limit(object):
         self.remaining = math.floor(((cap - water) / cap) * val)
         self.next_request = now
 
+    def __deepcopy__(self, memo):
+        # The state of a limit is made of immutable values only, and
+        # compiled patterns can not be deep copied.
+        return copy.copy(self)
+
     def _get_time(self):
         """Retrieve the current time. Broken out for testability."""
         return time.time()
@@ -177,7 +184,7 @@ class RateLimitingMiddleware(base_wsgi.TroveMiddleware):
 
         # Select the limiter class
         if limiter is None:
-            limiter = Limiter
+            limiter = BucketLimiter
         else:
             limiter = importutils.import_class(limiter)
 
@@ -326,6 +333,150 @@ class Limiter(object):
         return result
 
 
+class BucketLimiter(Limiter):
+    """
+    Rate-limit checking class which keeps a single number per tenant and
+    limit.
+
+    The leaky bucket of a limit is stored as the time at which it will be
+    empty again, which is all that is needed to tell whether a request
+    fits. Buckets are dropped once they are empty, so idle tenants cost
+    nothing. The limits are grouped by verb so a request is only matched
+    against the limits of its own verb.
+
+    When http_rate_limits_shared is set, the buckets live in memcached
+    (see memcached_servers) and all API workers enforce one budget per
+    tenant, instead of each worker allowing the configured rate. The read
+    and write of a bucket are not atomic across workers, so concurrent
+    requests may overshoot the limit slightly.
+    """
+
+    KEY_PREFIX = 'trove-limit-'
+
+    # Seconds between two sweeps of the empty local buckets.
+    SWEEP_INTERVAL = 60
+
+    def __init__(self, limits, client=None, **kwargs):
+        """
+        Initialize the new `BucketLimiter`.
+
+        @param limits: List of `Limit` objects
+        @param client: memcached compatible client holding the buckets,
+                       by default they are kept in the process
+        """
+        self.limits = list(limits)
+        self.user_limits = {}
+
+        # Pick up any per-user limit information
+        for key, value in kwargs.items():
+            if key.startswith('user:'):
+                username = key[5:]
+                self.user_limits[username] = self._by_verb(
+                    self.parse_limits(value))
+        self.default_limits = self._by_verb(self.limits)
+
+        if client is None and CONF.http_rate_limits_shared:
+            client = memorycache.get_client()
+        self.client = client
+        self.buckets = {}
+        self.next_sweep = 0
+
+    @staticmethod
+    def _by_verb(limits):
+        by_verb = collections.defaultdict(list)
+        for index, limit in enumerate(limits):
+            by_verb[limit.verb].append((index, limit))
+        return dict(by_verb)
+
+    def _get_time(self):
+        """Retrieve the current time. Broken out for testability."""
+        return time.time()
+
+    def _key(self, username, index):
+        return str('%s%s-%d' % (self.KEY_PREFIX, username or '', index))
+
+    def _load(self, key, now):
+        """Return the time at which the bucket will be empty."""
+        if self.client is not None:
+            empty_at = self.client.get(key)
+        else:
+            empty_at = self.buckets.get(key)
+        return max(empty_at or now, now)
+
+    def _save(self, key, empty_at, now):
+        if self.client is not None:
+            # The bucket expires with the time it takes to drain it.
+            self.client.set(key, empty_at,
+                            time=int(math.ceil(empty_at - now)) + 1)
+        else:
+            self.buckets[key] = empty_at
+
+    def _sweep(self, now):
+        """Forget the local buckets which have drained."""
+        if now < self.next_sweep:
+            return
+        self.buckets = dict((key, empty_at)
+                            for key, empty_at in self.buckets.iteritems()
+                            if empty_at > now)
+        self.next_sweep = now + self.SWEEP_INTERVAL
+
+    def _limits_for(self, username):
+        return self.user_limits.get(username, self.default_limits)
+
+    def get_limits(self, username=None):
+        """
+        Return the limits for a given user.
+        """
+        now = self._get_time()
+        limits = sorted(index_limit
+                        for verb_limits in self._limits_for(username).values()
+                        for index_limit in verb_limits)
+        keys = [self._key(username, index) for index, limit in limits]
+        if self.client is not None and hasattr(self.client, 'get_multi'):
+            # One round trip for all the buckets of the tenant.
+            buckets = self.client.get_multi(keys)
+        else:
+            buckets = dict((key, self._load(key, now)) for key in keys)
+        result = []
+        for key, (_index, limit) in zip(keys, limits):
+            empty_at = max(buckets.get(key) or now, now)
+            level = empty_at - now
+            display = limit.display()
+            display['remaining'] = max(int(math.floor(
+                (limit.capacity - level) / limit.request_value)), 0)
+            display['resetTime'] = int(max(
+                now, empty_at + limit.request_value - limit.capacity))
+            result.append(display)
+        return result
+
+    def check_for_delay(self, verb, url, username=None):
+        """
+        Check the given verb/user/user triplet for limit.
+
+        @return: Tuple of delay (in seconds) and error message (or None, None)
+        """
+        now = self._get_time()
+        self._sweep(now)
+        delays = []
+
+        for index, limit in self._limits_for(username).get(verb, ()):
+            if not limit.pattern.match(url):
+                continue
+            key = self._key(username, index)
+            empty_at = self._load(key, now)
+            delay = empty_at + limit.request_value - now - limit.capacity
+            if delay > 0:
+                delays.append((delay, limit.error_message))
+            else:
+                self._save(key, empty_at + limit.request_value, now)
+
+        if delays:
+            delays.sort()
+            return delays[0]
+
+        return None, None
+
+
 class WsgiLimiter(object):
     """
     Rate-limit checking from a WSGI application. Uses an in-memory `Limiter`.
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from eventlet import queue
+
 from trove.common import cfg
 from trove.openstack.common.importutils import import_class
 from cinderclient.v2 import client as CinderClient
@@ -84,6 +86,20 @@ def swift_client(context):
     return client
 
 
+def client_pool(client, size, create_client):
+    """Queue of clients, one per concurrent request.
+
+    Swift connections can't be shared between green threads, so the
+    client given is handed out along with size - 1 new ones made by
+    create_client().
+    """
+    clients = queue.Queue()
+    clients.put(client)
+    for i in range(size - 1):
+        clients.put(create_client())
+    return clients
+
+
 create_dns_client = import_class(CONF.remote_dns_client)
 create_guest_client = import_class(CONF.remote_guest_client)
 create_nova_client = import_class(CONF.remote_nova_client)
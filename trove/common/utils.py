@@ -17,6 +17,7 @@
 import datetime
 import inspect
 import jinja2
+import random
 import sys
 import time
 import six.moves.urllib.parse as urlparse
@@ -237,15 +238,24 @@ class LoopingCall(object):
 
 
 def poll_until(retriever, condition=lambda value: value,
-               sleep_time=1, time_out=None):
+               sleep_time=1, time_out=None, backoff=1, max_sleep_time=None):
     """Retrieves object until it passes condition, then returns it.
 
     If time_out_limit is passed in, PollTimeOut will be raised once that
     amount of time is eclipsed.
 
+    With a backoff above 1 the time slept is multiplied by it after every
+    attempt, up to max_sleep_time, and each sleep is jittered so that the
+    waits started together do not keep polling in step.
+
     """
     start_time = time.time()
 
+    if backoff > 1:
+        return _poll_with_backoff(retriever, condition, sleep_time,
+                                  time_out, start_time, backoff,
+                                  max_sleep_time)
+
     def poll_and_check():
         obj = retriever()
         if condition(obj):
@@ -256,6 +266,25 @@ def poll_until(retriever, condition=lambda value: value,
     return lc.wait()
 
 
+def _poll_with_backoff(retriever, condition, sleep_time, time_out,
+                       start_time, backoff, max_sleep_time):
+    while True:
+        obj = retriever()
+        if condition(obj):
+            return obj
+        now = time.time()
+        if time_out is not None and now >= start_time + time_out:
+            raise exception.PollTimeOut
+        delay = random.uniform(sleep_time / 2.0, sleep_time)
+        if time_out is not None:
+            # Check one last time at the deadline rather than past it.
+            delay = max(0, min(delay, start_time + time_out - now))
+        greenthread.sleep(delay)
+        sleep_time *= backoff
+        if max_sleep_time is not None:
+            sleep_time = min(sleep_time, max_sleep_time)
+
+
 # Copied from nova.api.openstack.common in the old code.
 def get_id_from_href(href):
     """Return the id or uuid portion of a url.
@@ -357,17 +357,31 @@ class Controller(object):
 
     schemas = {}
 
+    # Compiled validators of all controllers, keyed by the identity of their
+    # schema. The schemas are module level constants, so each one is only
+    # compiled once, whichever part of the body selected it.
+    _validators = {}
+
     @classmethod
     def get_schema(cls, action, body):
-        LOG.debug("Getting schema for %s:%s" %
-                  (cls.__class__.__name__, action))
+        LOG.debug("Getting schema for %s:%s", cls.__name__, action)
         if cls.schemas:
             matching_schema = cls.schemas.get(action, {})
             if matching_schema:
-                LOG.debug("Found Schema: %s" % matching_schema.get("name",
-                                                                   "none"))
+                LOG.debug("Found Schema: %s",
+                          matching_schema.get("name", "none"))
             return matching_schema
 
+    @staticmethod
+    def get_validator(schema):
+        validator = Controller._validators.get(id(schema))
+        # The identity check guards against the id of a discarded schema
+        # being reused.
+        if validator is None or validator.schema is not schema:
+            validator = jsonschema.Draft4Validator(schema)
+            Controller._validators[id(schema)] = validator
+        return validator
+
     @staticmethod
     def format_validation_msg(errors):
         # format path like object['field1'][i]['subfield2']
@@ -386,10 +400,12 @@ class Controller(object):
         body = action_args.get('body', {})
         schema = self.get_schema(action, body)
         if schema:
-            validator = jsonschema.Draft4Validator(schema)
-            if not validator.is_valid(body):
-                errors = sorted(validator.iter_errors(body),
-                                key=lambda e: e.path)
+            validator = self.get_validator(schema)
+            # A single pass collects the errors, there is no need to ask
+            # is_valid first.
+            errors = sorted(validator.iter_errors(body),
+                            key=lambda e: e.path)
+            if errors:
                 error_msg = self.format_validation_msg(errors)
                 LOG.info(error_msg)
                 raise exception.BadRequest(message=error_msg)
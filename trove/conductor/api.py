@@ -13,6 +13,9 @@
 #    under the License.
 
 
+import time
+import zlib
+
 from trove.common import cfg
 from trove.openstack.common.rpc import proxy
 from trove.openstack.common import log as logging
@@ -22,6 +25,34 @@ from trove.openstack.common.gettextutils import _
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 RPC_API_VERSION = "1.0"
+# Seconds a guest uses the partition count of the conductor before asking
+# for it again.
+PARTITIONS_MAX_AGE = 600
+
+# Partition count of the conductor and when the guest got it
+_partitions = None
+
+
+def partition_topic(partition):
+    """Topic the conductor worker of a partition consumes."""
+    return "%s.partition-%d" % (CONF.conductor_queue, partition)
+
+
+def instance_topic(instance_id, partitions=None):
+    """Topic the messages of an instance are sent to.
+
+    The partition of an instance is a hash of its id that every guest
+    computes alike.
+
+    :param partitions: partition count of the conductor, by default the
+    conductor_partitions of this service
+    """
+    if partitions is None:
+        partitions = CONF.conductor_partitions
+    if partitions <= 1:
+        return CONF.conductor_queue
+    partition = (zlib.crc32(str(instance_id)) & 0xffffffff) % partitions
+    return partition_topic(partition)
 
 
 class API(proxy.RpcProxy):
@@ -35,13 +66,40 @@ class API(proxy.RpcProxy):
         """Create the routing key for conductor."""
         return CONF.conductor_queue
 
+    def _partitions(self):
+        """Return the partition count of the conductor.
+
+        The guest asks the conductor on the conductor queue, which always
+        has a consumer, and asks again every PARTITIONS_MAX_AGE seconds.
+        Until the conductor answers the messages go to the conductor queue
+        too, so they are never sent to a topic without a worker.
+        """
+        global _partitions
+        if (_partitions is None or
+                time.time() - _partitions[1] > PARTITIONS_MAX_AGE):
+            try:
+                count = self.call(self.context,
+                                  self.make_msg("get_partitions"),
+                                  timeout=CONF.agent_call_low_timeout)
+            except Exception:
+                LOG.exception(_("Error getting the partitions of the "
+                                "conductor, sending to %s.") %
+                              CONF.conductor_queue)
+                count = 1
+            _partitions = (count, time.time())
+        return _partitions[0]
+
+    def _instance_topic(self, instance_id):
+        return instance_topic(instance_id, self._partitions())
+
     def heartbeat(self, instance_id, payload, sent=None):
         LOG.debug(_("Making async call to cast heartbeat for instance: %s")
                   % instance_id)
         self.cast(self.context, self.make_msg("heartbeat",
                                               instance_id=instance_id,
                                               sent=sent,
-                                              payload=payload))
+                                              payload=payload),
+                  topic=self._instance_topic(instance_id))
 
     def update_backup(self, instance_id, backup_id, sent=None,
                       **backup_fields):
@@ -51,4 +109,5 @@ class API(proxy.RpcProxy):
                                               instance_id=instance_id,
                                               backup_id=backup_id,
                                               sent=sent,
-                                              **backup_fields))
+                                              **backup_fields),
+                  topic=self._instance_topic(instance_id))
@@ -12,14 +12,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from eventlet import greenthread
+
 from trove.backup import models as bkup_models
 from trove.common import cfg
 from trove.common import exception
 from trove.common.instance import ServiceStatus
-from trove.conductor.models import LastSeen
+from trove.conductor import api as conductor_api
+from trove.conductor.models import LastSeenCache
 from trove.instance import models as t_models
 from trove.openstack.common import log as logging
 from trove.openstack.common import periodic_task
+from trove.openstack.common.rpc import dispatcher as rpc_dispatcher
 from trove.openstack.common.gettextutils import _
 
 LOG = logging.getLogger(__name__)
@@ -31,6 +35,52 @@ class Manager(periodic_task.PeriodicTasks):
 
     def __init__(self):
         super(Manager, self).__init__()
+        if (CONF.conductor_partitions > 1 or
+                CONF.trove_conductor_workers <= 1):
+            # Only this worker handles the messages of its instances, so
+            # their last seen times can be kept in memory.
+            self._last_seen = LastSeenCache(
+                CONF.conductor_last_seen_cache_size,
+                CONF.conductor_last_seen_flush_interval)
+        else:
+            # Workers sharing the conductor queue must see each other's
+            # updates, so every lookup and update goes to the database.
+            self._last_seen = LastSeenCache(0, 0)
+        # Heartbeats waiting to be written, by instance id
+        self._heartbeats = {}
+        self._heartbeat_flusher = None
+        self._topic = None
+
+    def initialize_service_hook(self, service):
+        self._topic = service.topic
+        if service.topic == conductor_api.partition_topic(0):
+            # Guests that do not partition their messages send them all to
+            # the conductor queue. Only the first partition worker consumes
+            # it, so that their messages are still handled in order.
+            dispatcher = rpc_dispatcher.RpcDispatcher([self])
+            service.conn.create_consumer(CONF.conductor_queue, dispatcher,
+                                         fanout=False)
+
+    def get_partitions(self, context):
+        """Return the partition count guests send their messages over."""
+        return CONF.conductor_partitions
+
+    def _check_partition(self, instance_id, method_name):
+        """Warn about a message sent to the partition of another worker.
+
+        That happens until the guests ask again for conductor_partitions
+        after it changed. The first partition worker also gets the
+        messages sent to the conductor queue, so it can't tell.
+        """
+        if self._topic in (None, CONF.conductor_queue,
+                           conductor_api.partition_topic(0)):
+            return
+        expected = conductor_api.instance_topic(instance_id)
+        if expected != self._topic:
+            LOG.warn(_("Instance %(instance)s sent %(method)s to %(topic)s "
+                       "instead of %(expected)s.") %
+                     {'instance': instance_id, 'method': method_name,
+                      'topic': self._topic, 'expected': expected})
 
     def _message_too_old(self, instance_id, method_name, sent):
         fields = {
@@ -45,27 +95,16 @@ class Manager(periodic_task.PeriodicTasks):
             LOG.error(_("Sent field not present. Cannot compare."))
             return False
 
-        seen = None
-        try:
-            seen = LastSeen.load(instance_id=instance_id,
-                                 method_name=method_name)
-        except exception.NotFound:
-            # This is fine.
-            pass
-
-        if seen is None:
+        last_sent = self._last_seen.get_many([instance_id],
+                                             method_name).get(instance_id)
+        if last_sent is None:
             LOG.debug(_("Did not find any previous message. Creating."))
-            seen = LastSeen.create(instance_id=instance_id,
-                                   method_name=method_name,
-                                   sent=sent)
-            seen.save()
+            self._last_seen.update_many(method_name, {instance_id: sent})
             return False
 
-        last_sent = float(seen.sent)
-        if last_sent < sent:
+        if float(last_sent) < sent:
             LOG.debug(_("Rec'd message is younger than last seen. Updating."))
-            seen.sent = sent
-            seen.save()
+            self._last_seen.update_many(method_name, {instance_id: sent})
             return False
 
         else:
@@ -75,19 +114,94 @@ class Manager(periodic_task.PeriodicTasks):
     def heartbeat(self, context, instance_id, payload, sent=None):
         LOG.debug(_("Instance ID: %s") % str(instance_id))
         LOG.debug(_("Payload: %s") % str(payload))
-        status = t_models.InstanceServiceStatus.find_by(
-            instance_id=instance_id)
-        if self._message_too_old(instance_id, 'heartbeat', sent):
-            return
+        self._check_partition(instance_id, 'heartbeat')
+        status = None
         if payload.get('service_status') is not None:
-            status.set_status(ServiceStatus.from_description(
-                payload['service_status']))
-        status.save()
+            status = ServiceStatus.from_description(payload['service_status'])
+        if payload.get('data_migration') is not None:
+            progress = dict(payload['data_migration'], id=instance_id)
+            LOG.info(_("Instance %(id)s migrated %(copied)s of %(total)s "
+                       "bytes of its data onto its volume at %(rate)s bytes "
+                       "per second.") % progress)
+
+        if CONF.conductor_heartbeat_window <= 0:
+            missing = self._write_heartbeats({instance_id: (sent, status)})
+            if missing:
+                raise exception.ModelNotFoundError(instance_id=instance_id)
+            return
+
+        # Keep only the newest heartbeat of each instance until the window
+        # closes, without losing a status change reported before it.
+        pending = self._heartbeats.get(instance_id)
+        if pending is not None:
+            pending_sent, pending_status = pending
+            if (sent is None or
+                    (pending_sent is not None and pending_sent > sent)):
+                sent, status = pending_sent, pending_status or status
+            elif status is None:
+                status = pending_status
+        self._heartbeats[instance_id] = (sent, status)
+        if self._heartbeat_flusher is None:
+            self._heartbeat_flusher = greenthread.spawn_after(
+                CONF.conductor_heartbeat_window, self._flush_heartbeats)
+
+    def _flush_heartbeats(self):
+        heartbeats, self._heartbeats = self._heartbeats, {}
+        self._heartbeat_flusher = None
+        LOG.debug(_("Writing %s heartbeats.") % len(heartbeats))
+        try:
+            missing = self._write_heartbeats(heartbeats)
+        except Exception:
+            LOG.exception(_("Error writing %s heartbeats.") % len(heartbeats))
+            return
+        for instance_id in missing:
+            LOG.error(_("Service status of instance %s not found. "
+                        "Discarding heartbeat.") % instance_id)
+
+    def _write_heartbeats(self, heartbeats):
+        """Write a batch of heartbeats.
+
+        The last seen times of the whole batch go through the last seen
+        cache at once. Service statuses are only written when they change.
+
+        :param heartbeats: dict of (sent, service status) by instance id
+        :return: ids of the instances without a service status
+        """
+        instance_ids = heartbeats.keys()
+        query = t_models.InstanceServiceStatus.query().filter(
+            t_models.InstanceServiceStatus.instance_id.in_(instance_ids))
+        statuses = dict((status.instance_id, status)
+                        for status in query.all())
+        last_seen = self._last_seen.get_many(instance_ids, 'heartbeat')
+
+        missing = []
+        seen = {}
+        for instance_id, (sent, status) in heartbeats.items():
+            service_status = statuses.get(instance_id)
+            if service_status is None:
+                missing.append(instance_id)
+                continue
+            if sent is None:
+                LOG.error(_("Sent field not present. Cannot compare."))
+            elif (instance_id in last_seen and
+                  float(last_seen[instance_id]) >= sent):
+                LOG.error(_("Rec'd message is older than last seen. "
+                            "Discarding."))
+                continue
+            else:
+                seen[instance_id] = sent
+            if status is not None and status.code != service_status.status_id:
+                service_status.set_status(status)
+                service_status.save()
+
+        self._last_seen.update_many('heartbeat', seen)
+        return missing
 
     def update_backup(self, context, instance_id, backup_id,
                       sent=None, **backup_fields):
         LOG.debug(_("Instance ID: %s") % str(instance_id))
         LOG.debug(_("Backup ID: %s") % str(backup_id))
+        self._check_partition(instance_id, 'update_backup')
         backup = bkup_models.DBBackup.find_by(id=backup_id)
         # TODO(datsun180b): use context to verify tenant matches
 
@@ -120,4 +234,6 @@ class Manager(periodic_task.PeriodicTasks):
                 }
                 LOG.debug(_("Backup %(key)s: %(value)s") % fields)
                 setattr(backup, k, v)
+        if 'size' in backup_fields:
+            backup.update_chain_size()
         backup.save()
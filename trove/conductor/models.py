@@ -12,8 +12,13 @@
 #See the License for the specific language governing permissions and
 #limitations under the License.
 
+import collections
+
+from eventlet import greenthread
+
 from trove.db import get_db_api
 from trove.openstack.common import log as logging
+from trove.openstack.common.gettextutils import _
 
 LOG = logging.getLogger(__name__)
 
@@ -50,3 +55,124 @@ class LastSeen(object):
     def create(cls, instance_id, method_name, sent):
         seen = LastSeen(instance_id, method_name, sent)
         return seen.save()
+
+    @classmethod
+    def load_all(cls, instance_ids, method_name):
+        """Return the last sent times of a method for many instances."""
+        if not instance_ids:
+            return {}
+        query = get_db_api()._base_query(cls).filter(
+            cls.instance_id.in_(instance_ids),
+            cls.method_name == method_name)
+        return dict((seen.instance_id, seen.sent) for seen in query.all())
+
+    @classmethod
+    def save_all(cls, method_name, sent, existing):
+        """Record the last sent times of a method for many instances.
+
+        :param sent: dict of the new sent times by instance id
+        :param existing: instance ids that already have a row
+        """
+        rows = [{'instance_id': instance_id,
+                 'method_name': method_name,
+                 'sent': instance_sent}
+                for instance_id, instance_sent in sent.items()]
+        db_api = get_db_api()
+        db_api.update_many(cls, ['instance_id', 'method_name'],
+                           [row for row in rows
+                            if row['instance_id'] in existing])
+        db_api.insert_many(cls, [row for row in rows
+                                 if row['instance_id'] not in existing])
+
+
+class LastSeenCache(object):
+    """Per conductor LRU of the last sent times of guest messages.
+
+    Lookups only go to the database on a cache miss. Updates are written
+    back in batches every flush_interval seconds, or right away if it is 0.
+    """
+
+    def __init__(self, size, flush_interval):
+        self.size = size
+        self.flush_interval = flush_interval
+        # (instance_id, method_name) -> sent, least recently used first
+        self._cache = collections.OrderedDict()
+        # Updates not written to the database yet
+        self._dirty = {}
+        self._flusher = None
+
+    def _put(self, key, sent):
+        self._cache.pop(key, None)
+        self._cache[key] = sent
+        while len(self._cache) > self.size:
+            self._cache.popitem(last=False)
+
+    def get_many(self, instance_ids, method_name):
+        """Return the last sent times of a method by instance id.
+
+        Instances that never sent the method are left out.
+        """
+        found = {}
+        misses = []
+        for instance_id in instance_ids:
+            key = (instance_id, method_name)
+            if key in self._cache:
+                sent = self._cache[key]
+                self._put(key, sent)
+            elif key in self._dirty:
+                sent = self._dirty[key]
+                self._put(key, sent)
+            else:
+                misses.append(instance_id)
+                continue
+            if sent is not None:
+                found[instance_id] = sent
+        if misses:
+            loaded = LastSeen.load_all(misses, method_name)
+            for instance_id in misses:
+                # Remember instances without a row too.
+                sent = loaded.get(instance_id)
+                self._put((instance_id, method_name), sent)
+                if sent is not None:
+                    found[instance_id] = sent
+        return found
+
+    def update_many(self, method_name, sent):
+        """Record new sent times of a method.
+
+        :param sent: dict of the new sent times by instance id
+        """
+        for instance_id, instance_sent in sent.items():
+            key = (instance_id, method_name)
+            self._put(key, instance_sent)
+            self._dirty[key] = instance_sent
+        if self.flush_interval <= 0:
+            self.flush()
+        elif self._dirty and self._flusher is None:
+            self._flusher = greenthread.spawn_after(self.flush_interval,
+                                                    self._flush_later)
+
+    def flush(self):
+        """Write the pending updates to the database."""
+        dirty, self._dirty = self._dirty, {}
+        by_method = {}
+        for (instance_id, method_name), sent in dirty.items():
+            by_method.setdefault(method_name, {})[instance_id] = sent
+        try:
+            for method_name, sent in by_method.items():
+                existing = LastSeen.load_all(sent.keys(), method_name)
+                LastSeen.save_all(method_name, sent, existing)
+        except Exception:
+            # Keep the updates for the next flush, unless newer ones
+            # arrived in the meantime.
+            for key, sent in dirty.items():
+                if self._dirty.get(key, sent) <= sent:
+                    self._dirty[key] = sent
+            raise
+
+    def _flush_later(self):
+        self._flusher = None
+        try:
+            self.flush()
+        except Exception:
+            LOG.exception(_("Error writing last seen times."))
@@ -145,20 +145,14 @@ class Configuration(object):
                                                                        id)
         config_items = ConfigurationParameter.find_all(configuration_id=id,
                                                        deleted=False).all()
-        rules = configurations.get_validation_rules(
+        rules = configurations.load_validation_rules(
             datastore_manager=datastore.manager)
 
-        def _get_rule(key):
-            LOG.debug(_("finding rule with key : %s") % key)
-            for rule in rules['configuration-parameters']:
-                if str(rule.get('name')) == key:
-                    return rule
-
         for item in config_items:
-            rule = _get_rule(str(item.configuration_key))
-            if rule.get('type') == 'boolean':
+            rule = rules.get(str(item.configuration_key))
+            if rule.type is bool:
                 item.configuration_value = bool(int(item.configuration_value))
-            elif rule.get('type') == 'integer':
+            elif rule.type is int:
                 item.configuration_value = int(item.configuration_value)
             else:
                 item.configuration_value = str(item.configuration_value)
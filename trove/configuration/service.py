@@ -171,85 +171,79 @@ class ConfigurationsController(wsgi.Controller):
 
     @staticmethod
     def _validate_configuration(values, datastore_manager=None):
-        rules = configurations.get_validation_rules(
+        rules = configurations.load_validation_rules(
             datastore_manager=datastore_manager)
 
         LOG.info(_("Validating configuration values"))
         for k, v in values.iteritems():
-            # get the validation rule dictionary, which will ensure there is a
-            # rule for the given key name. An exception will be thrown if no
-            # valid rule is located.
-            rule = ConfigurationsController._get_item(
-                k, rules['configuration-parameters'])
+            # get the validation rule, which will ensure there is a rule for
+            # the given key name. An exception will be thrown if no valid
+            # rule is located.
+            rule = ConfigurationsController._get_item(k, rules)
 
-            if rule.get('deleted_at'):
+            if rule.deleted_at:
                 raise exception.ConfigurationParameterDeleted(
-                    parameter_name=rule.get('name'),
-                    parameter_deleted_at=rule.get('deleted_at'))
+                    parameter_name=rule.name,
+                    parameter_deleted_at=rule.deleted_at)
 
             # type checking
-            valueType = rule.get('type')
+            if rule.type is None:
+                raise exception.TroveError(_(
+                    "Invalid or unsupported type defined in the "
+                    "configuration-parameters configuration file."))
 
-            if not isinstance(v, ConfigurationsController._find_type(
-                    valueType)):
-                output = {"key": k, "type": valueType}
+            if not isinstance(v, rule.type):
+                output = {"key": k, "type": rule.rule.get('type')}
                 msg = _("The value provided for the configuration "
                         "parameter %(key)s is not of type %(type)s.") % output
                 raise exception.UnprocessableEntity(message=msg)
 
             # integer min/max checking
             if isinstance(v, int) and not isinstance(v, bool):
-                try:
-                    min_value = int(rule.get('min'))
-                except ValueError:
+                if rule.min is None:
                     raise exception.TroveError(_(
                         "Invalid or unsupported min value defined in the "
                         "configuration-parameters configuration file. "
                         "Expected integer."))
-                if v < min_value:
-                    output = {"key": k, "min": min_value}
+                if v < rule.min:
+                    output = {"key": k, "min": rule.min}
                     message = _("The value for the configuration parameter "
                                 "%(key)s is less than the minimum allowed: "
                                 "%(min)s") % output
                     raise exception.UnprocessableEntity(message=message)
 
-                try:
-                    max_value = int(rule.get('max'))
-                except ValueError:
+                if rule.max is None:
                     raise exception.TroveError(_(
                         "Invalid or unsupported max value defined in the "
                         "configuration-parameters configuration file. "
                         "Expected integer."))
-                if v > max_value:
-                    output = {"key": k, "max": max_value}
+                if v > rule.max:
+                    output = {"key": k, "max": rule.max}
                     message = _("The value for the configuration parameter "
                                 "%(key)s is greater than the maximum "
                                 "allowed: %(max)s") % output
                     raise exception.UnprocessableEntity(message=message)
 
     @staticmethod
-    def _find_type(valueType):
-        if valueType == "boolean":
-            return bool
-        elif valueType == "string":
-            return basestring
-        elif valueType == "integer":
-            return int
-        else:
-            raise exception.TroveError(_(
-                "Invalid or unsupported type defined in the "
-                "configuration-parameters configuration file."))
-
-    @staticmethod
-    def _get_item(key, dictList):
-        for item in dictList:
-            if key == item.get('name'):
-                return item
+    def _get_item(key, rules):
+        rule = rules.get(key)
+        if rule is not None:
+            return rule
         raise exception.UnprocessableEntity(
             message=_("%s is not a supported configuration parameter.") % key)
 
 
 class ParametersController(wsgi.Controller):
+    @staticmethod
+    def _show_parameter(ds_version, name):
+        rules = configurations.load_validation_rules(
+            datastore_manager=ds_version.manager)
+        rule = rules.get(name)
+        if rule is None:
+            raise exception.ConfigKeyNotFound(key=name)
+        return wsgi.Result(
+            views.ConfigurationParametersView(rule.rule).data(), 200)
+
     def index(self, req, tenant_id, datastore, id):
         ds, ds_version = ds_models.get_datastore_version(
             type=datastore, version=id)
@@ -261,13 +255,7 @@ class ParametersController(wsgi.Controller):
     def show(self, req, tenant_id, datastore, id, name):
         ds, ds_version = ds_models.get_datastore_version(
             type=datastore, version=id)
-        rules = configurations.get_validation_rules(
-            datastore_manager=ds_version.manager)
-        for rule in rules['configuration-parameters']:
-            if rule['name'] == name:
-                return wsgi.Result(
-                    views.ConfigurationParametersView(rule).data(), 200)
-        raise exception.ConfigKeyNotFound(key=name)
+        return self._show_parameter(ds_version, name)
 
     def index_by_version(self, req, tenant_id, version):
         ds_version = ds_models.DatastoreVersion.load_by_uuid(version)
@@ -278,10 +266,4 @@ class ParametersController(wsgi.Controller):
 
     def show_by_version(self, req, tenant_id, version, name):
         ds_version = ds_models.DatastoreVersion.load_by_uuid(version)
-        rules = configurations.get_validation_rules(
-            datastore_manager=ds_version.manager)
-        for rule in rules['configuration-parameters']:
-            if rule['name'] == name:
-                return wsgi.Result(
-                    views.ConfigurationParametersView(rule).data(), 200)
-        raise exception.ConfigKeyNotFound(key=name)
+        return self._show_parameter(ds_version, name)
@@ -14,6 +14,9 @@
 #    under the License.
 
 import sqlalchemy.exc
+from sqlalchemy import and_
+from sqlalchemy import bindparam
+from sqlalchemy import orm
 
 from trove.common import exception
 from trove.db.sqlalchemy import migration
@@ -81,6 +84,36 @@ def update_all(query_func, model, conditions, values):
     query_func(model, **conditions).update(values)
 
 
+def insert_many(model, rows):
+    """Insert a list of rows, given as dicts, in a single statement."""
+    if rows:
+        table = orm.class_mapper(model).local_table
+        session.get_session().execute(table.insert(), rows)
+
+
+def update_many(model, keys, rows):
+    """Update a list of rows, given as dicts, in a single statement.
+
+    Rows are matched on the columns named in keys. All rows must set the
+    same columns.
+    """
+    if not rows:
+        return
+    table = orm.class_mapper(model).local_table
+    columns = [column for column in rows[0] if column not in keys]
+    # Bind parameters can't share the names of the updated columns.
+    statement = table.update().where(and_(
+        *[table.c[key] == bindparam('match_%s' % key) for key in keys]))
+    statement = statement.values(
+        dict((column, bindparam(column)) for column in columns))
+    params = []
+    for row in rows:
+        param = dict((column, row[column]) for column in columns)
+        param.update(('match_%s' % key, row[key]) for key in keys)
+        params.append(param)
+    session.get_session().execute(statement, params)
+
+
 def configure_db(options, *plugins):
     session.configure_db(options)
     configure_db_for_plugins(options, *plugins)
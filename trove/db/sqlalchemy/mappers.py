@@ -59,6 +59,10 @@ def map(engine, models):
                Table('configuration_parameters', meta, autoload=True))
     orm.mapper(models['conductor_lastseen'],
                Table('conductor_lastseen', meta, autoload=True))
+    orm.mapper(models['host_jobs'],
+               Table('host_jobs', meta, autoload=True))
+    orm.mapper(models['account_summaries'],
+               Table('account_summaries', meta, autoload=True))
 
 
 def mapping_exists(model):
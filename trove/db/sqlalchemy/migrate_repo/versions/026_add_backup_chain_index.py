@@ -0,0 +1,85 @@
+# Copyright 2014 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import Column
+from sqlalchemy.schema import Index
+from sqlalchemy.schema import MetaData
+from trove.openstack.common import log as logging
+
+from trove.db.sqlalchemy.migrate_repo.schema import Float
+from trove.db.sqlalchemy.migrate_repo.schema import Integer
+from trove.db.sqlalchemy.migrate_repo.schema import String
+from trove.db.sqlalchemy.migrate_repo.schema import Table
+
+logger = logging.getLogger('trove.db.sqlalchemy.migrate_repo.schema')
+
+
+def _chain_index(rows):
+    """Compute the root, depth and cumulative size of every backup."""
+    parents = dict((row['id'], row['parent_id']) for row in rows)
+    sizes = dict((row['id'], row['size'] or 0.0) for row in rows)
+    index = {}
+
+    def _resolve(backup_id):
+        if backup_id not in index:
+            parent_id = parents.get(backup_id)
+            if parent_id in parents:
+                root_id, depth, chain_size = _resolve(parent_id)
+                index[backup_id] = (root_id, depth + 1,
+                                    chain_size + sizes[backup_id])
+            else:
+                index[backup_id] = (backup_id, 0, sizes[backup_id])
+        return index[backup_id]
+
+    for backup_id in parents:
+        _resolve(backup_id)
+    return index
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+
+    # add columns:
+    backups = Table('backups', meta, autoload=True)
+    backups.create_column(Column('root_id', String(36), nullable=True))
+    backups.create_column(Column('depth', Integer(), nullable=True))
+    backups.create_column(Column('chain_size', Float(), nullable=True))
+
+    # fill in the chain index of the existing backups
+    rows = backups.select().execute().fetchall()
+    for backup_id, (root_id, depth, chain_size) in _chain_index(rows).items():
+        backups.update().where(backups.c.id == backup_id).values(
+            root_id=root_id, depth=depth, chain_size=chain_size).execute()
+
+    backups_root_id_idx = Index("backups_root_id", backups.c.root_id)
+    try:
+        backups_root_id_idx.create()
+    except OperationalError as e:
+        logger.info(e)
+
+
+def downgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+
+    backups = Table('backups', meta, autoload=True)
+    backups_root_id_idx = Index("backups_root_id", backups.c.root_id)
+    backups_root_id_idx.drop()
+
+    # drop columns:
+    backups.drop_column('root_id')
+    backups.drop_column('depth')
+    backups.drop_column('chain_size')
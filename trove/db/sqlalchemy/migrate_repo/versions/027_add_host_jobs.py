@@ -0,0 +1,46 @@
+# Copyright 2014 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from sqlalchemy.schema import Column
+from sqlalchemy.schema import MetaData
+
+from trove.db.sqlalchemy.migrate_repo.schema import DateTime
+from trove.db.sqlalchemy.migrate_repo.schema import String
+from trove.db.sqlalchemy.migrate_repo.schema import Table
+from trove.db.sqlalchemy.migrate_repo.schema import Text
+from trove.db.sqlalchemy.migrate_repo.schema import create_tables
+from trove.db.sqlalchemy.migrate_repo.schema import drop_tables
+
+meta = MetaData()
+
+host_jobs = Table(
+    'host_jobs',
+    meta,
+    Column('id', String(36), primary_key=True, nullable=False),
+    Column('host', String(255), nullable=False, index=True),
+    Column('action', String(64), nullable=False),
+    Column('state', String(32), nullable=False),
+    Column('progress', Text()),
+    Column('created', DateTime()),
+    Column('updated', DateTime()))
+
+
+def upgrade(migrate_engine):
+    meta.bind = migrate_engine
+    create_tables([host_jobs])
+
+
+def downgrade(migrate_engine):
+    meta.bind = migrate_engine
+    drop_tables([host_jobs])
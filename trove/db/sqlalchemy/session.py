@@ -49,6 +49,8 @@ def configure_db(options, models_mapper=None):
         from trove.extensions.security_group import models as secgrp_models
         from trove.configuration import models as configurations_models
         from trove.conductor import models as conductor_models
+        from trove.extensions.mgmt.host import models as host_models
+        from trove.extensions.account import models as account_models
 
         model_modules = [
             base_models,
@@ -61,6 +63,8 @@ def configure_db(options, models_mapper=None):
             secgrp_models,
             configurations_models,
             conductor_models,
+            host_models,
+            account_models,
         ]
 
         models = {}
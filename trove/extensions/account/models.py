@@ -13,15 +13,30 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from sqlalchemy import func
+
 from trove.openstack.common import log as logging
 
+from trove.common import cfg
+from trove.common import utils
 from trove.common.remote import create_nova_client
+from trove.db import get_db_api
 from trove.instance.models import DBInstance
 from trove.extensions.mgmt.instances.models import MgmtInstances
 
+CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
 
+def persisted_models():
+    return {'account_summaries': AccountSummary}
+
+
+def _page_limit(context, page_size):
+    limit = int(context.limit or page_size) if context else page_size
+    return min(limit, page_size)
+
+
 class Server(object):
     """Disguises the Nova account instance dict as a server object."""
 
@@ -40,37 +55,109 @@ class Server(object):
 class Account(object):
     """Contains all instances owned by an account."""
 
-    def __init__(self, id, instances):
+    def __init__(self, id, instances, next_marker=None):
         self.id = id
         self.instances = instances
+        self.next_marker = next_marker
 
     @staticmethod
     def load(context, id):
         client = create_nova_client(context)
         account = client.accounts.get_instances(id)
-        db_infos = DBInstance.find_all(tenant_id=id, deleted=False)
+        limit = _page_limit(context, CONF.instances_page_size)
+        db_infos, next_marker = DBInstance.find_all(
+            tenant_id=id, deleted=False).paginated_collection(
+                limit=limit, marker=context.marker)
         servers = [Server(server) for server in account.servers]
         instances = MgmtInstances.load_status_from_existing(context, db_infos,
                                                             servers)
-        return Account(id, instances)
+        return Account(id, instances, next_marker)
 
 
 class AccountsSummary(object):
 
-    def __init__(self, accounts):
+    def __init__(self, accounts, next_marker=None):
         self.accounts = accounts
+        self.next_marker = next_marker
+
+    @classmethod
+    def load(cls, context=None):
+        """Load a page of the tenants with instances.
+
+        The instances are counted by the database, or read from the
+        account_summaries table if the task manager keeps it up to date.
+        """
+        limit = _page_limit(context, CONF.accounts_page_size)
+        marker = context.marker if context else None
+        if CONF.account_summary_refresh_ticks:
+            counts = AccountSummary.load_page(limit + 1, marker)
+        else:
+            counts = instance_counts(limit + 1, marker)
+        next_marker = None
+        if len(counts) > limit:
+            counts = counts[:limit]
+            next_marker = counts[-1][0]
+        accounts = [{'id': tenant_id, 'num_instances': num_instances}
+                    for tenant_id, num_instances in counts]
+        return cls(accounts, next_marker)
+
+
+def instance_counts(limit=None, marker=None):
+    """Count the non-deleted instances of every tenant.
+
+    Returns (tenant_id, count) pairs ordered by tenant id, starting after
+    the marker.
+    """
+    query = DBInstance.query().filter_by(deleted=False).with_entities(
+        DBInstance.tenant_id, func.count(DBInstance.id))
+    if marker:
+        query = query.filter(DBInstance.tenant_id > marker)
+    query = query.group_by(DBInstance.tenant_id).order_by(
+        DBInstance.tenant_id)
+    if limit:
+        query = query.limit(limit)
+    return [(tenant_id, count) for tenant_id, count in query.all()]
+
+
+class AccountSummary(object):
+    """The number of instances of a tenant, refreshed periodically by the
+    task manager so listing the accounts does not count every instance.
+    """
+    _auto_generated_attrs = []
+    _data_fields = ['tenant_id', 'num_instances', 'updated']
+    _table_name = 'account_summaries'
+    preserve_on_delete = False
+
+    @classmethod
+    def load_page(cls, limit, marker=None):
+        query = get_db_api()._base_query(cls)
+        if marker:
+            query = query.filter(cls.tenant_id > marker)
+        query = query.order_by(cls.tenant_id).limit(limit)
+        return [(summary.tenant_id, summary.num_instances)
+                for summary in query.all()]
 
     @classmethod
-    def load(cls):
-        # TODO(pdmars): This should probably be changed to a more generic
-        # database filter query if one is added, however, this should suffice
-        # for now.
-        db_infos = DBInstance.find_all(deleted=False)
-        tenant_ids_for_instances = [db_info.tenant_id for db_info in db_infos]
-        tenant_ids = set(tenant_ids_for_instances)
-        LOG.debug("All tenants with instances: %s" % tenant_ids)
-        accounts = []
-        for tenant_id in tenant_ids:
-            num_instances = tenant_ids_for_instances.count(tenant_id)
-            accounts.append({'id': tenant_id, 'num_instances': num_instances})
-        return cls(accounts)
+    def refresh(cls):
+        """Recount the instances of every tenant."""
+        # Instances without a tenant can't be keyed in the summary table.
+        counts = dict((tenant_id, num_instances)
+                      for tenant_id, num_instances in instance_counts()
+                      if tenant_id is not None)
+        db_api = get_db_api()
+        existing = set(summary.tenant_id
+                       for summary in db_api._base_query(cls).all())
+        updated = utils.utcnow()
+        rows = [{'tenant_id': tenant_id, 'num_instances': num_instances,
+                 'updated': updated}
+                for tenant_id, num_instances in counts.items()]
+        db_api.update_many(cls, ['tenant_id'],
+                           [row for row in rows
+                            if row['tenant_id'] in existing])
+        db_api.insert_many(cls, [row for row in rows
+                                 if row['tenant_id'] not in existing])
+        stale = existing - set(counts)
+        if stale:
+            db_api._base_query(cls).filter(
+                cls.tenant_id.in_(stale)).delete(synchronize_session=False)
+        LOG.debug("Refreshed the instance counts of %s tenants" % len(counts))
@@ -15,6 +15,7 @@
 
 from trove.openstack.common import log as logging
 
+from trove.common import pagination
 from trove.common import wsgi
 from trove.common.auth import admin_context
 from trove.extensions.account import models
@@ -38,12 +39,19 @@ class AccountController(wsgi.Controller):
 
         context = req.environ[wsgi.CONTEXT_KEY]
         account = models.Account.load(context, id)
-        return wsgi.Result(views.AccountView(account).data(), 200)
+        view = views.AccountView(account)
+        paged = pagination.SimplePaginatedDataView(req.url, 'account', view,
+                                                   account.next_marker)
+        return wsgi.Result(paged.data(), 200)
 
     @admin_context
     def index(self, req, tenant_id):
         """Return a list of all accounts with non-deleted instances."""
         LOG.info(_("req : '%s'\n\n") % req)
         LOG.info(_("Showing all accounts with instances for '%s'") % tenant_id)
-        accounts_summary = models.AccountsSummary.load()
-        return wsgi.Result(views.AccountsView(accounts_summary).data(), 200)
+        context = req.environ[wsgi.CONTEXT_KEY]
+        summary = models.AccountsSummary.load(context)
+        view = views.AccountsView(summary)
+        paged = pagination.SimplePaginatedDataView(req.url, 'accounts', view,
+                                                   summary.next_marker)
+        return wsgi.Result(paged.data(), 200)
@@ -17,6 +17,7 @@
 from trove.common import exception
 from trove.common import wsgi
 from trove.extensions.mgmt.host import models
+from trove.extensions.mgmt.host import views
 from trove.openstack.common import log as logging
 from trove.openstack.common.gettextutils import _
 
@@ -53,5 +54,5 @@ class HostInstanceController(wsgi.Controller):
 
     def _action_update(self, context, host, body):
         LOG.debug("Updating all instances for host: %s" % host.name)
-        host.update_all(context)
-        return wsgi.Result(None, 202)
+        job = host.update_all(context)
+        return wsgi.Result(views.HostJobView(job).data(), 202)
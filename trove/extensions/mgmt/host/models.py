@@ -17,20 +17,28 @@
 Model classes that extend the instances functionality for MySQL instances.
 """
 
+import json
+
 from trove.openstack.common import log as logging
+from trove.openstack.common.gettextutils import _
 
 from trove.common import exception
+from trove.db import models as dbmodels
 from trove.instance.models import DBInstance
 from trove.instance.models import InstanceServiceStatus
 from trove.instance.models import SimpleInstance
-from trove.common.remote import create_guest_client
 from trove.common.remote import create_nova_client
+from trove.taskmanager import api as task_api
 from novaclient import exceptions as nova_exceptions
 
 
 LOG = logging.getLogger(__name__)
 
 
+def persisted_models():
+    return {'host_jobs': HostJob}
+
+
 class SimpleHost(object):
 
     def __init__(self, name, instance_count):
@@ -60,13 +68,20 @@ class DetailedHost(object):
         for instance in self.instances:
             instance['server_id'] = instance['uuid']
             del instance['uuid']
+        server_ids = [instance['server_id'] for instance in self.instances]
+        db_infos = self._load_db_infos(server_ids)
+        statuses = self._load_statuses([db_info.id
+                                        for db_info in db_infos.values()])
+        for instance in self.instances:
             try:
-                db_info = DBInstance.find_by(
-                    compute_instance_id=instance['server_id'])
+                db_info = db_infos.get(instance['server_id'])
+                status = db_info and statuses.get(db_info.id)
+                if status is None:
+                    raise exception.ModelNotFoundError(
+                        _("No trove instance found for server %s")
+                        % instance['server_id'])
                 instance['id'] = db_info.id
                 instance['tenant_id'] = db_info.tenant_id
-                status = InstanceServiceStatus.find_by(
-                    instance_id=db_info.id)
                 instance_info = SimpleInstance(None, db_info, status)
                 instance['status'] = instance_info.status
             except exception.TroveError as re:
@@ -75,21 +90,39 @@ class DetailedHost(object):
                           "instance: %s" % instance['server_id'])
                 instance['id'] = None
 
+    @staticmethod
+    def _load_db_infos(server_ids):
+        """Load the trove instances of many compute instances at once."""
+        if not server_ids:
+            return {}
+        query = DBInstance.query().filter(
+            DBInstance.compute_instance_id.in_(server_ids))
+        db_infos = {}
+        for db_info in query.all():
+            db_infos.setdefault(db_info.compute_instance_id, db_info)
+        return db_infos
+
+    @staticmethod
+    def _load_statuses(instance_ids):
+        """Load the service statuses of many trove instances at once."""
+        if not instance_ids:
+            return {}
+        query = InstanceServiceStatus.query().filter(
+            InstanceServiceStatus.instance_id.in_(instance_ids))
+        return dict((status.instance_id, status) for status in query.all())
+
     def update_all(self, context):
+        """Start a job updating the guests of every instance on the host.
+
+        The guests are updated in the background by the task manager, the
+        returned job reports the progress of every instance.
+        """
         num_i = len(self.instances)
         LOG.debug("Host %s has %s instances to update" % (self.name, num_i))
-        failed_instances = []
-        for instance in self.instances:
-            client = create_guest_client(context, instance['id'])
-            try:
-                client.update_guest()
-            except exception.TroveError as re:
-                LOG.error(re)
-                LOG.error("Unable to update instance: %s" % instance['id'])
-                failed_instances.append(instance['id'])
-        if len(failed_instances) > 0:
-            msg = "Failed to update instances: %s" % failed_instances
-            raise exception.UpdateGuestError(msg)
+        job = HostJob.create(host=self.name, action='update',
+                             instances=self.instances)
+        task_api.API(context).update_host_guests(job.id)
+        return job
 
     @staticmethod
     def load(context, name):
@@ -98,3 +131,58 @@ class DetailedHost(object):
             return DetailedHost(client.rdhosts.get(name))
         except nova_exceptions.NotFound:
             raise exception.NotFound(uuid=name)
+
+
+class HostJob(dbmodels.DatabaseModelBase):
+    """A host-wide action run on the instances of a host in the background.
+
+    The progress column holds the state of the action on every instance
+    as a JSON list of dicts with the keys id, server_id, status and error.
+    """
+
+    _data_fields = ['host', 'action', 'state', 'progress', 'created',
+                    'updated']
+
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    COMPLETED = 'COMPLETED'
+    FAILED = 'FAILED'
+
+    INSTANCE_PENDING = 'PENDING'
+    INSTANCE_UPDATED = 'UPDATED'
+    INSTANCE_FAILED = 'FAILED'
+    INSTANCE_SKIPPED = 'SKIPPED'
+
+    @classmethod
+    def create(cls, host, action, instances):
+        progress = []
+        for instance in instances:
+            # Instances unknown to trove have no guest to act on.
+            status = (cls.INSTANCE_PENDING if instance['id']
+                      else cls.INSTANCE_SKIPPED)
+            progress.append({'id': instance['id'],
+                             'server_id': instance['server_id'],
+                             'status': status,
+                             'error': None})
+        return super(HostJob, cls).create(host=host, action=action,
+                                          state=cls.QUEUED,
+                                          progress=json.dumps(progress))
+
+    @classmethod
+    def load(cls, host, id):
+        try:
+            return cls.find_by(id=id, host=host)
+        except exception.ModelNotFoundError:
+            raise exception.NotFound(uuid=id)
+
+    @classmethod
+    def load_all(cls, host):
+        return cls.query().filter_by(host=host).order_by(cls.created).all()
+
+    @property
+    def instances(self):
+        return json.loads(self.progress) if self.progress else []
+
+    def save_progress(self, instances, state=None):
+        self.update(progress=json.dumps(instances),
+                    state=state or self.state)
@@ -46,3 +46,24 @@ class HostController(InstanceController):
         context = req.environ[wsgi.CONTEXT_KEY]
         host = models.DetailedHost.load(context, id)
         return wsgi.Result(views.HostDetailedView(host).data(), 200)
+
+
+class HostJobController(wsgi.Controller):
+    """Controller for the background jobs run on the instances of a host."""
+
+    @admin_context
+    def index(self, req, tenant_id, host_id):
+        """Return all the jobs of a host."""
+        LOG.info(_("Indexing the jobs of host %(host)s for tenant "
+                   "'%(tenant)s'") % {'host': host_id, 'tenant': tenant_id})
+        jobs = models.HostJob.load_all(host_id)
+        return wsgi.Result(views.HostJobsView(jobs).data(), 200)
+
+    @admin_context
+    def show(self, req, tenant_id, host_id, id):
+        """Return the progress of a single job."""
+        LOG.info(_("Showing job %(id)s of host %(host)s for tenant "
+                   "'%(tenant)s'") % {'id': id, 'host': host_id,
+                                      'tenant': tenant_id})
+        job = models.HostJob.load(host_id, id)
+        return wsgi.Result(views.HostJobView(job).data(), 200)
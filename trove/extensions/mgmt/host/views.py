@@ -49,3 +49,35 @@ class HostsView(object):
     def data(self):
         data = [HostView(host).data() for host in self.hosts]
         return {'hosts': data}
+
+
+class HostJobView(object):
+
+    def __init__(self, job):
+        self.job = job
+
+    def data(self):
+        instances = self.job.instances
+        counts = {}
+        for instance in instances:
+            counts[instance['status']] = counts.get(instance['status'], 0) + 1
+        return {'job': {
+            'id': self.job.id,
+            'host': self.job.host,
+            'action': self.job.action,
+            'state': self.job.state,
+            'created': self.job.created,
+            'updated': self.job.updated,
+            'counts': counts,
+            'instances': instances
+        }}
+
+
+class HostJobsView(object):
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+
+    def data(self):
+        data = [HostJobView(job).data()['job'] for job in self.jobs]
+        return {'jobs': data}
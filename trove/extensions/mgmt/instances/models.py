@@ -27,15 +27,20 @@ LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 
 
-def load_mgmt_instances(context, deleted=None, client=None):
-    if not client:
-        client = remote.create_nova_client(context)
+def load_mgmt_servers(client):
     try:
         mgmt_servers = client.rdservers.list()
     except AttributeError:
         mgmt_servers = client.servers.list(search_opts={'all_tenants': 1})
     LOG.info("Found %d servers in Nova" %
              len(mgmt_servers if mgmt_servers else []))
+    return mgmt_servers
+
+
+def load_mgmt_instances(context, deleted=None, client=None):
+    if not client:
+        client = remote.create_nova_client(context)
+    mgmt_servers = load_mgmt_servers(client)
     if deleted is not None:
         db_infos = instance_models.DBInstance.find_all(deleted=deleted)
     else:
@@ -129,12 +134,17 @@ class MgmtInstance(imodels.Instance):
 class MgmtInstances(imodels.Instances):
     @staticmethod
     def load_status_from_existing(context, db_infos, servers):
+        find_server = imodels.create_server_list_matcher(servers)
+        return MgmtInstances.load_status_with_matcher(context, db_infos,
+                                                      find_server)
+
+    @staticmethod
+    def load_status_with_matcher(context, db_infos, find_server):
         def load_instance(context, db, status, server=None):
             return SimpleMgmtInstance(context, db, server, status)
 
         if context is None:
             raise TypeError("Argument context not defined.")
-        find_server = imodels.create_server_list_matcher(servers)
         instances = imodels.Instances._load_servers_status(load_instance,
                                                            context,
                                                            db_infos,
@@ -156,15 +166,28 @@ def _load_servers(instances, find_server):
 
 
 def publish_exist_events(transformer, admin_context):
-    notifications = transformer()
+    """Publish the exists notifications of all the instances.
+
+    Transformers that can build the notifications in batches have them
+    published batch by batch, so they are never all held in memory.
+    """
+    iter_batches = getattr(transformer, 'iter_batches', None)
+    if iter_batches is not None:
+        batches = iter_batches()
+    else:
+        batches = [transformer()]
     # clear out admin_context.auth_token so it does not get logged
     admin_context.auth_token = None
-    for notification in notifications:
-        notifier.notify(admin_context,
-                        CONF.host,
-                        "trove.instance.exists",
-                        'INFO',
-                        notification)
+    published = 0
+    for notifications in batches:
+        for notification in notifications:
+            notifier.notify(admin_context,
+                            CONF.host,
+                            "trove.instance.exists",
+                            'INFO',
+                            notification)
+        published += len(notifications)
+    LOG.info("Published %d exists notifications" % published)
 
 
 class NotificationTransformer(object):
@@ -210,17 +233,49 @@ class NotificationTransformer(object):
             instance.datastore_version.manager, CONF.notification_service_id)
         return payload
 
-    def __call__(self):
-        audit_start, audit_end = NotificationTransformer._get_audit_period()
-        messages = []
-        db_infos = instance_models.DBInstance.find_all(deleted=False)
+    def _page_db_infos(self):
+        """Yield the live instances in pages of the batch size."""
+        limit = CONF.exists_notification_batch_size
+        marker = None
+        while True:
+            db_infos, marker = instance_models.DBInstance.find_all(
+                deleted=False).paginated_collection(limit=limit,
+                                                    marker=marker)
+            if db_infos:
+                yield db_infos
+            if not marker:
+                break
+
+    def _load_instances(self, db_infos):
+        query = InstanceServiceStatus.query().filter(
+            InstanceServiceStatus.instance_id.in_(
+                [db_info.id for db_info in db_infos]))
+        statuses = dict((status.instance_id, status)
+                        for status in query.all())
+        instances = []
         for db_info in db_infos:
-            service_status = InstanceServiceStatus.find_by(
-                instance_id=db_info.id)
-            instance = SimpleMgmtInstance(None, db_info, None, service_status)
-            message = self.transform_instance(instance, audit_start, audit_end)
-            messages.append(message)
-        return messages
+            if db_info.id not in statuses:
+                LOG.error("Server status could not be read for instance "
+                          "id(%s)" % db_info.id)
+                continue
+            instances.append(SimpleMgmtInstance(None, db_info, None,
+                                                statuses[db_info.id]))
+        return instances
+
+    def _transform_instances(self, instances, audit_start, audit_end):
+        return [self.transform_instance(instance, audit_start, audit_end)
+                for instance in instances]
+
+    def iter_batches(self):
+        """Yield the notifications of the live instances in batches."""
+        audit_start, audit_end = NotificationTransformer._get_audit_period()
+        for db_infos in self._page_db_infos():
+            instances = self._load_instances(db_infos)
+            yield self._transform_instances(instances, audit_start, audit_end)
+
+    def __call__(self):
+        return [message for messages in self.iter_batches()
+                for message in messages]
 
 
 class NovaNotificationTransformer(NotificationTransformer):
@@ -240,10 +295,21 @@ class NovaNotificationTransformer(NotificationTransformer):
         self._flavor_cache[flavor_id] = flavor.name if flavor else 'unknown'
         return self._flavor_cache[flavor_id]
 
-    def __call__(self):
-        audit_start, audit_end = NotificationTransformer._get_audit_period()
-        instances = load_mgmt_instances(self.context, deleted=False,
-                                        client=self.nova_client)
+    def _load_flavors(self):
+        """Fill the flavor cache with a single listing of the flavors."""
+        try:
+            flavors = self.nova_client.flavors.list(is_public=None)
+        except Exception as e:
+            LOG.warn("Unable to list the flavors: %s" % e)
+            return
+        for flavor in flavors:
+            self._flavor_cache[str(flavor.id)] = flavor.name
+
+    def _load_instances(self, db_infos):
+        return MgmtInstances.load_status_with_matcher(self.context, db_infos,
+                                                      self._find_server)
+
+    def _transform_instances(self, instances, audit_start, audit_end):
         messages = []
         for instance in filter(
                 lambda inst: inst.status != 'SHUTDOWN' and inst.server,
@@ -257,3 +323,14 @@ class NovaNotificationTransformer(NotificationTransformer):
                                                    audit_end))
             messages.append(message)
         return messages
+
+    def iter_batches(self):
+        self._find_server = imodels.create_server_list_matcher(
+            load_mgmt_servers(self.nova_client))
+        self._load_flavors()
+        try:
+            for messages in super(NovaNotificationTransformer,
+                                  self).iter_batches():
+                yield messages
+        finally:
+            self._find_server = None
@@ -45,6 +45,12 @@ def load_and_verify(context, instance_id):
         return instance
 
 
+def _bulk_create(instance):
+    """Whether the guest of the instance creates items in bulk."""
+    manager = instance.datastore_version.manager
+    return getattr(CONF.get(manager), 'bulk_create', False)
+
+
 class User(object):
 
     _data_fields = ['name', 'host', 'password', 'databases']
@@ -75,8 +81,14 @@ class User(object):
     @classmethod
     def create(cls, context, instance_id, users):
         # Load InstanceServiceStatus to verify if it's running
-        load_and_verify(context, instance_id)
+        instance = load_and_verify(context, instance_id)
         client = create_guest_client(context, instance_id)
+        if _bulk_create(instance):
+            for result in client.bulk_create_users(users):
+                if result['status'] == 'exists':
+                    raise exception.UserAlreadyExists(name=result['name'],
+                                                      host=result['host'])
+            return
         for user in users:
             user_name = user['_name']
             host_name = user['_host']
@@ -286,8 +298,14 @@ class Schema(object):
 
     @classmethod
     def create(cls, context, instance_id, schemas):
-        load_and_verify(context, instance_id)
+        instance = load_and_verify(context, instance_id)
         client = create_guest_client(context, instance_id)
+        if _bulk_create(instance):
+            for result in client.bulk_create_databases(schemas):
+                if result['status'] == 'exists':
+                    raise exception.DatabaseAlreadyExists(
+                        name=result['name'])
+            return
         for schema in schemas:
             schema_name = schema['_name']
             existing_schema, _nadda = Schemas.load_with_client(
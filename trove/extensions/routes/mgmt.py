@@ -18,6 +18,7 @@ from trove.openstack.common import log as logging
 from trove.common import extensions
 from trove.extensions.mgmt.instances.service import MgmtInstanceController
 from trove.extensions.mgmt.host.service import HostController
+from trove.extensions.mgmt.host.service import HostJobController
 from trove.extensions.mgmt.quota.service import QuotaController
 from trove.extensions.mgmt.host.instance import service as hostservice
 from trove.extensions.mgmt.volume.service import StorageController
@@ -80,4 +81,11 @@ class Mgmt(extensions.ExtensionsDescriptor):
             collection_actions={'action': 'POST'})
         resources.append(host_instances)
 
+        host_jobs = extensions.ResourceExtension(
+            'jobs',
+            HostJobController(),
+            parent={'member_name': 'host',
+                    'collection_name': '{tenant_id}/mgmt/hosts'})
+        resources.append(host_jobs)
+
         return resources
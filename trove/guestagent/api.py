@@ -135,6 +135,15 @@ class API(proxy.RpcProxy):
         LOG.debug(_("Creating Users for Instance %s"), self.id)
         self._cast("create_user", users=users)
 
+    def bulk_create_users(self, users):
+        """Make a synchronous call to create several database users at once.
+
+        Returns the status of every user, see MySqlAdmin.bulk_create_users.
+        """
+        LOG.debug(_("Creating Users in bulk for Instance %s"), self.id)
+        return self._call("bulk_create_users", AGENT_HIGH_TIMEOUT,
+                          users=users)
+
     def get_user(self, username, hostname):
         """Make an asynchronous call to get a single database user."""
         LOG.debug(_("Getting a user on Instance %s"), self.id)
@@ -180,6 +189,16 @@ class API(proxy.RpcProxy):
         LOG.debug(_("Creating databases for Instance %s"), self.id)
         self._cast("create_database", databases=databases)
 
+    def bulk_create_databases(self, databases):
+        """Make a synchronous call to create several databases at once.
+
+        Returns the status of every database, see
+        MySqlAdmin.bulk_create_databases.
+        """
+        LOG.debug(_("Creating databases in bulk for Instance %s"), self.id)
+        return self._call("bulk_create_databases", AGENT_HIGH_TIMEOUT,
+                          databases=databases)
+
     def list_databases(self, limit=None, marker=None, include_marker=False):
         """Make an asynchronous call to list databases"""
         LOG.debug(_("Listing databases for Instance %s"), self.id)
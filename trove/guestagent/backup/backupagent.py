@@ -34,8 +34,13 @@ CONF = cfg.CONF
 MANAGER = CONF.datastore_manager
 # If datastore manager is not mentioned in guest
 # configuration file, would be used mysql as datastore_manager by the default
-STRATEGY = CONF.get('mysql' if not MANAGER else MANAGER).backup_strategy
-NAMESPACE = CONF.backup_namespace
+DATASTORE_CONF = CONF.get('mysql' if not MANAGER else MANAGER)
+STRATEGY = DATASTORE_CONF.backup_strategy
+# Datastores with their own strategies name their namespaces in their group
+NAMESPACE = (getattr(DATASTORE_CONF, 'backup_namespace', None) or
+             CONF.backup_namespace)
+RESTORE_NAMESPACE = (getattr(DATASTORE_CONF, 'restore_namespace', None) or
+                     CONF.restore_namespace)
 
 RUNNER = get_backup_strategy(STRATEGY, NAMESPACE)
 EXTRA_OPTS = CONF.backup_runner_options.get(STRATEGY, '')
@@ -52,7 +57,7 @@ class BackupAgent(object):
     def _get_restore_runner(self, backup_type):
         """Returns the RestoreRunner associated with this backup type."""
         try:
-            runner = get_restore_strategy(backup_type, CONF.restore_namespace)
+            runner = get_restore_strategy(backup_type, RESTORE_NAMESPACE)
         except ImportError:
             raise UnknownBackupType("Unknown Backup type: %s" % backup_type)
         return runner
@@ -125,7 +130,9 @@ class BackupAgent(object):
                     if not success:
                         raise BackupError(note)
 
-                    storage.save_metadata(location, bkup.metadata())
+                    metadata = bkup.metadata()
+                    metadata.update(bkup.codec_metadata())
+                    storage.save_metadata(location, metadata)
 
                 except Exception:
                     LOG.exception(_("Error saving %(backup_id)s Backup") %
@@ -163,6 +170,7 @@ class BackupAgent(object):
 
             runner = restore_runner(storage, location=backup_info['location'],
                                     checksum=backup_info['checksum'],
+                                    parents=backup_info.get('parents'),
                                     restore_location=restore_location)
             backup_info['restore_location'] = restore_location
             LOG.debug(_("Restoring instance from backup %(id)s to "
@@ -58,6 +58,12 @@ class Manager(periodic_task.PeriodicTasks):
     def create_user(self, context, users):
         MySqlAdmin().create_user(users)
 
+    def bulk_create_databases(self, context, databases):
+        return MySqlAdmin().bulk_create_databases(databases)
+
+    def bulk_create_users(self, context, users):
+        return MySqlAdmin().bulk_create_users(users)
+
     def delete_database(self, context, database):
         return MySqlAdmin().delete_database(database)
 
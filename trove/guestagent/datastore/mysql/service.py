@@ -16,6 +16,7 @@
 #    under the License.
 #
 
+import collections
 import os
 import re
 import uuid
@@ -54,6 +55,10 @@ INCLUDE_MARKER_OPERATORS = {
     False: ">"
 }
 
+BULK_CREATED = 'created'
+BULK_EXISTS = 'exists'
+BULK_SKIPPED = 'skipped'
+
 MYSQL_CONFIG = "/etc/mysql/my.cnf"
 MYSQL_SERVICE_CANDIDATES = ["mysql", "mysqld", "mysql-server"]
 MYSQL_BIN_CANDIDATES = ["/usr/sbin/mysqld", "/usr/libexec/mysqld"]
@@ -147,6 +152,13 @@ def load_mysqld_options():
         return {}
 
 
+def _bulk_status(found, existing):
+    """Status of one item of a bulk create, given the items that exist."""
+    if found:
+        return BULK_EXISTS
+    return BULK_SKIPPED if existing else BULK_CREATED
+
+
 class MySqlAppStatus(service.BaseDbStatus):
     @classmethod
     def get(cls):
@@ -185,15 +197,24 @@ class MySqlAppStatus(service.BaseDbStatus):
 
 
 class LocalSqlClient(object):
-    """A sqlalchemy wrapper to manage transactions."""
+    """A sqlalchemy wrapper to manage transactions.
 
-    def __init__(self, engine, use_flush=True):
+    Statements run inside a transaction which is committed, after a
+    FLUSH PRIVILEGES, when the context exits. Pure reads should pass
+    read_only=True; they then run without a transaction and without the
+    FLUSH, which takes global locks inside the server.
+    """
+
+    def __init__(self, engine, use_flush=True, read_only=False):
         self.engine = engine
-        self.use_flush = use_flush
+        self.use_flush = use_flush and not read_only
+        self.read_only = read_only
 
     def __enter__(self):
         self.conn = self.engine.connect()
-        self.trans = self.conn.begin()
+        self.trans = None
+        if not self.read_only:
+            self.trans = self.conn.begin()
         return self.conn
 
     def __exit__(self, type, value, traceback):
@@ -210,8 +231,9 @@ class LocalSqlClient(object):
         try:
             return self.conn.execute(t, kwargs)
         except Exception:
-            self.trans.rollback()
-            self.trans = None
+            if self.trans:
+                self.trans.rollback()
+                self.trans = None
             raise
 
 
@@ -221,7 +243,7 @@ class MySqlAdmin(object):
     def _associate_dbs(self, user):
         """Internal. Given a MySQLUser, populate its databases attribute."""
         LOG.debug("Associating dbs to user %s at %s" % (user.name, user.host))
-        with LocalSqlClient(get_engine()) as client:
+        with LocalSqlClient(get_engine(), read_only=True) as client:
             q = sql_query.Query()
             q.columns = ["grantee", "table_schema"]
             q.tables = ["information_schema.SCHEMA_PRIVILEGES"]
@@ -261,7 +283,7 @@ class MySqlAdmin(object):
         user = self._get_user(username, hostname)
         db_access = set()
         grantee = set()
-        with LocalSqlClient(get_engine()) as client:
+        with LocalSqlClient(get_engine(), read_only=True) as client:
             q = sql_query.Query()
             q.columns = ["grantee", "table_schema"]
             q.tables = ["information_schema.SCHEMA_PRIVILEGES"]
@@ -307,20 +329,92 @@ class MySqlAdmin(object):
             for item in users:
                 user = models.MySQLUser()
                 user.deserialize(item)
-                # TODO(cp16net):Should users be allowed to create users
-                # 'os_admin' or 'debian-sys-maint'
-                g = sql_query.Grant(user=user.name, host=user.host,
-                                    clear=user.password)
-                t = text(str(g))
-                client.execute(t)
-                for database in user.databases:
-                    mydb = models.ValidatedMySQLDatabase()
-                    mydb.deserialize(database)
-                    g = sql_query.Grant(permissions='ALL', database=mydb.name,
-                                        user=user.name, host=user.host,
-                                        clear=user.password)
-                    t = text(str(g))
+                self._create_user(client, user)
+
+    def _create_user(self, client, user):
+        """Internal. Grant a MySQLUser access to its databases."""
+        # TODO(cp16net):Should users be allowed to create users
+        # 'os_admin' or 'debian-sys-maint'
+        g = sql_query.Grant(user=user.name, host=user.host,
+                            clear=user.password)
+        t = text(str(g))
+        client.execute(t)
+        for database in user.databases:
+            mydb = models.ValidatedMySQLDatabase()
+            mydb.deserialize(database)
+            g = sql_query.Grant(permissions='ALL', database=mydb.name,
+                                user=user.name, host=user.host,
+                                clear=user.password)
+            t = text(str(g))
+            client.execute(t)
+
+    def bulk_create_databases(self, databases):
+        """Create the list of specified databases unless one exists.
+
+        The existence check and the creation run in a single transaction.
+        Nothing is created if any of the databases already exists. Returns
+        the status of every database, one of BULK_CREATED, BULK_EXISTS or
+        BULK_SKIPPED.
+        """
+        mydbs = []
+        for item in databases:
+            mydb = models.ValidatedMySQLDatabase()
+            mydb.deserialize(item)
+            mydbs.append(mydb)
+        if not mydbs:
+            return []
+        with LocalSqlClient(get_engine()) as client:
+            params = dict(('db%d' % index, mydb.name)
+                          for index, mydb in enumerate(mydbs))
+            q = sql_query.Query()
+            q.columns = ['schema_name']
+            q.tables = ['information_schema.schemata']
+            q.where = ["schema_name IN (%s)" %
+                       ", ".join(':%s' % key for key in sorted(params))]
+            t = text(str(q))
+            existing = set(row['schema_name']
+                           for row in client.execute(t, **params))
+            if not existing:
+                for mydb in mydbs:
+                    cd = sql_query.CreateDatabase(mydb.name,
+                                                  mydb.character_set,
+                                                  mydb.collate)
+                    t = text(str(cd))
                     client.execute(t)
+        return [{'name': mydb.name,
+                 'status': _bulk_status(mydb.name in existing, existing)}
+                for mydb in mydbs]
+
+    def bulk_create_users(self, users):
+        """Create users unless one exists, see bulk_create_databases."""
+        mysql_users = []
+        for item in users:
+            user = models.MySQLUser()
+            user.deserialize(item)
+            mysql_users.append(user)
+        if not mysql_users:
+            return []
+        with LocalSqlClient(get_engine()) as client:
+            params = {}
+            rows = []
+            for index, user in enumerate(mysql_users):
+                params['user%d' % index] = user.name
+                params['host%d' % index] = user.host
+                rows.append('(:user%d, :host%d)' % (index, index))
+            q = sql_query.Query()
+            q.columns = ['User', 'Host']
+            q.tables = ['mysql.user']
+            q.where = ["(User, Host) IN (%s)" % ", ".join(rows)]
+            t = text(str(q))
+            existing = set((row['User'], row['Host'])
+                           for row in client.execute(t, **params))
+            if not existing:
+                for user in mysql_users:
+                    self._create_user(client, user)
+        return [{'name': user.name, 'host': user.host,
+                 'status': _bulk_status((user.name, user.host) in existing,
+                                        existing)}
+                for user in mysql_users]
 
     def delete_database(self, database):
         """Delete the specified database."""
@@ -356,7 +450,7 @@ class MySqlAdmin(object):
                                          ": %(reason)s") %
                                        {'user': username, 'reason': ve.message}
                                        )
-        with LocalSqlClient(get_engine()) as client:
+        with LocalSqlClient(get_engine(), read_only=True) as client:
             q = sql_query.Query()
             q.columns = ['User', 'Host', 'Password']
             q.tables = ['mysql.user']
@@ -407,7 +501,7 @@ class MySqlAdmin(object):
         """List databases the user created on this mysql instance."""
         LOG.debug(_("---Listing Databases---"))
         databases = []
-        with LocalSqlClient(get_engine()) as client:
+        with LocalSqlClient(get_engine(), read_only=True) as client:
             # If you have an external volume mounted at /var/lib/mysql
             # the lost+found directory will show up in mysql as a database
             # which will create errors if you try to do any database ops
@@ -453,59 +547,100 @@ class MySqlAdmin(object):
         """List users that have access to the database."""
         '''
         SELECT
-            User,
-            Host,
-            Marker
+            page.User,
+            page.Host,
+            page.Marker,
+            grants.table_schema
         FROM
             (SELECT
                 User,
                 Host,
-                CONCAT(User, '@', Host) as Marker
-            FROM mysql.user
-            ORDER BY 1, 2) as innerquery
-        WHERE
-            Marker > :marker
+                Marker
+            FROM
+                (SELECT
+                    User,
+                    Host,
+                    CONCAT(User, '@', Host) as Marker
+                FROM mysql.user
+                ORDER BY 1, 2) as innerquery
+            WHERE
+                Marker > :marker
+            ORDER BY
+                Marker
+            LIMIT :limit) as page
+        LEFT JOIN
+            (SELECT
+                grantee,
+                table_schema
+            FROM information_schema.SCHEMA_PRIVILEGES
+            WHERE privilege_type != 'USAGE'
+            GROUP BY grantee, table_schema) as grants
+        ON grants.grantee = CONCAT("'", page.User, "'@'", page.Host, "'")
         ORDER BY
-            Marker
-        LIMIT :limit;
+            page.Marker,
+            grants.table_schema;
         '''
         LOG.debug(_("---Listing Users---"))
-        users = []
-        with LocalSqlClient(get_engine()) as client:
-            mysql_user = models.MySQLUser()
+        page_users = collections.OrderedDict()
+        with LocalSqlClient(get_engine(), read_only=True) as client:
             iq = sql_query.Query()  # Inner query.
             iq.columns = ['User', 'Host', "CONCAT(User, '@', Host) as Marker"]
             iq.tables = ['mysql.user']
             iq.order = ['User', 'Host']
             innerquery = str(iq).rstrip(';')
 
-            oq = sql_query.Query()  # Outer query.
-            oq.columns = ['User', 'Host', 'Marker']
-            oq.tables = ['(%s) as innerquery' % innerquery]
-            oq.where = ["Host != 'localhost'"]
-            oq.order = ['Marker']
+            pq = sql_query.Query()  # Page query.
+            pq.columns = ['User', 'Host', 'Marker']
+            pq.tables = ['(%s) as innerquery' % innerquery]
+            pq.where = ["Host != 'localhost'"]
+            pq.order = ['Marker']
             if marker:
-                oq.where.append("Marker %s '%s'" %
+                pq.where.append("Marker %s '%s'" %
                                 (INCLUDE_MARKER_OPERATORS[include_marker],
                                  marker))
             if limit:
-                oq.limit = limit + 1
+                pq.limit = limit + 1
+            pagequery = str(pq).rstrip(';')
+
+            gq = sql_query.Query()  # Grants query.
+            gq.columns = ['grantee', 'table_schema']
+            gq.tables = ['information_schema.SCHEMA_PRIVILEGES']
+            gq.where = ["privilege_type != 'USAGE'"]
+            gq.group = ['grantee', 'table_schema']
+            grantsquery = str(gq).rstrip(';')
+
+            # The users of the page come back with all of their grants, one
+            # row per user and database, instead of one query per user.
+            oq = sql_query.Query()  # Outer query.
+            oq.columns = ['page.User', 'page.Host', 'page.Marker',
+                          'grants.table_schema']
+            oq.tables = ['(%s) as page LEFT JOIN (%s) as grants ON '
+                         'grants.grantee = '
+                         'CONCAT("\'", page.User, "\'@\'", page.Host, "\'")'
+                         % (pagequery, grantsquery)]
+            oq.order = ['page.Marker', 'grants.table_schema']
             t = text(str(oq))
             result = client.execute(t)
-            next_marker = None
             LOG.debug("result = " + str(result))
-            for count, row in enumerate(result):
-                if count >= limit:
-                    break
-                LOG.debug("user = " + str(row))
-                mysql_user = models.MySQLUser()
-                mysql_user.name = row['User']
-                mysql_user.host = row['Host']
-                self._associate_dbs(mysql_user)
-                next_marker = row['Marker']
-                users.append(mysql_user.serialize())
-        if result.rowcount <= limit:
-            next_marker = None
+            for row in result:
+                mysql_user = page_users.get(row['Marker'])
+                if mysql_user is None:
+                    LOG.debug("user = " + str(row))
+                    mysql_user = models.MySQLUser()
+                    mysql_user.name = row['User']
+                    mysql_user.host = row['Host']
+                    page_users[row['Marker']] = mysql_user
+                if row['table_schema'] is not None:
+                    mysql_db = models.MySQLDatabase()
+                    mysql_db.name = row['table_schema']
+                    mysql_user.databases.append(mysql_db.serialize())
+
+        markers = page_users.keys()[:limit]
+        users = [page_users[user_marker].serialize()
+                 for user_marker in markers]
+        next_marker = None
+        if limit and len(page_users) > limit:
+            next_marker = markers[-1]
         LOG.debug("users = " + str(users))
 
         return users, next_marker
@@ -875,7 +1010,7 @@ class MySqlRootAccess(object):
     @classmethod
     def is_root_enabled(cls):
         """Return True if root access is enabled; False otherwise."""
-        with LocalSqlClient(get_engine()) as client:
+        with LocalSqlClient(get_engine(), read_only=True) as client:
             t = text(sql_query.ROOT_ENABLED)
             result = client.execute(t)
             LOG.debug("Found %s with remote root access" % result.rowcount)
@@ -891,7 +1026,6 @@ class MySqlRootAccess(object):
         user.host = "%"
         user.password = root_password or utils.generate_random_password()
         with LocalSqlClient(get_engine()) as client:
-            print(client)
             try:
                 cu = sql_query.CreateUser(user.name, host=user.host)
                 t = text(str(cu))
@@ -900,8 +1034,8 @@ class MySqlRootAccess(object):
                 # Ignore, user is already created, just reset the password
                 # TODO(rnirmal): More fine grained error checking later on
                 LOG.debug(err)
-        with LocalSqlClient(get_engine()) as client:
-            print(client)
+            # The user and its grants are set up in one transaction so they
+            # share a single FLUSH PRIVILEGES.
             uu = sql_query.UpdateUser(user.name, host=user.host,
                                       clear=user.password)
             t = text(str(uu))
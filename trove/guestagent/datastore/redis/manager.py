@@ -15,6 +15,8 @@
 
 from trove.common import cfg
 from trove.common import exception
+from trove.common import instance as rd_instance
+from trove.guestagent import backup
 from trove.guestagent import dbaas
 from trove.guestagent import volume
 from trove.guestagent.datastore.redis.service import RedisAppStatus
@@ -62,10 +64,17 @@ class Manager(periodic_task.PeriodicTasks):
     def _perform_restore(self, backup_info, context, restore_location, app):
         """
         Perform a restore on this instance,
-        currently it is not implemented.
-        """
-        raise exception.DatastoreOperationNotSupported(
-            operation='_perform_restore', datastore=MANAGER)
+        replacing its data set with the one of the backup.
+        """
+        LOG.info(_("Restoring database from backup %s") % backup_info['id'])
+        try:
+            backup.restore(context, backup_info, restore_location)
+        except Exception:
+            LOG.exception(_("Error performing restore from backup %s") %
+                          backup_info['id'])
+            app.status.set_status(rd_instance.ServiceStatuses.FAILED)
+            raise
+        LOG.info(_("Restored database successfully"))
 
     def prepare(self, context, packages, databases, memory_mb, users,
                 device_path=None, mount_point=None, backup_info=None,
@@ -85,6 +94,8 @@ class Manager(periodic_task.PeriodicTasks):
         app.install_if_needed(packages)
         LOG.info(_('Securing redis now.'))
         app.write_config(config_contents)
+        if backup_info:
+            self._perform_restore(backup_info, context, mount_point, app)
         app.complete_install_or_restart()
         LOG.info(_('"prepare" redis call has finished.'))
 
@@ -122,11 +133,13 @@ class Manager(periodic_task.PeriodicTasks):
 
     def create_backup(self, context, backup_info):
         """
-        This will eventually create a backup. Right now
-        it does nothing.
+        Entry point for initiating a backup for this guest agents db instance.
+        The call currently blocks until the backup is complete or errors.
+
+        :param backup_info: a dictionary containing the db instance id of the
+                            backup task, location, type, and other data.
         """
-        raise exception.DatastoreOperationNotSupported(
-            operation='create_backup', datastore=MANAGER)
+        backup.backup(context, backup_info)
 
     def mount_volume(self, context, device_path=None, mount_point=None):
         device = volume.VolumeDevice(device_path)
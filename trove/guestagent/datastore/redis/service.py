@@ -47,10 +47,66 @@ def _load_redis_options():
     return options
 
 
+def _option_path(options, name, default):
+    return os.path.join(options.get('dir', '/var/lib/redis'),
+                        options.get(name, default).strip('"'))
+
+
+def get_rdb_path():
+    """
+    Gets the path of the dump file redis saves its snapshots to.
+    """
+    return _option_path(_load_redis_options(), 'dbfilename', 'dump.rdb')
+
+
+def get_aof_path():
+    """
+    Gets the path of the append only file of redis.
+    """
+    return _option_path(_load_redis_options(), 'appendfilename',
+                        'appendonly.aof')
+
+
+def is_aof_enabled():
+    """
+    Checks whether redis logs its writes to the append only file.
+    """
+    return _load_redis_options().get('appendonly') == 'yes'
+
+
+def run_redis_cli(*args):
+    """
+    Runs a redis-cli command, with the password if one is set,
+    and returns its output.
+    """
+    options = _load_redis_options()
+    cmd = [system.REDIS_CLI]
+    if 'requirepass' in options:
+        cmd.extend(['-a', options['requirepass']])
+    cmd.extend(args)
+    out, err = utils.execute_with_timeout(*cmd, run_as_root=True,
+                                          root_helper='sudo')
+    return out
+
+
+def get_info():
+    """
+    Gets the fields of the redis INFO command as a str, str dict.
+    So: 'loading:0' becomes {'loading': '0'}
+    """
+    info = {}
+    for line in run_redis_cli('INFO').splitlines():
+        if ':' in line and not line.startswith('#'):
+            key, value = line.strip().split(':', 1)
+            info[key] = value
+    return info
+
+
 class RedisAppStatus(service.BaseDbStatus):
     """
     Handles all of the status updating for the redis guest agent.
     """
+
     @classmethod
     def get(cls):
         """
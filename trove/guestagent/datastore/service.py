@@ -49,6 +49,13 @@ class BaseDbStatus(object):
 
     This is a base class, subclasses must implement real logic for
     determining current status of DB in _get_actual_db_status()
+
+    The status is checked on every update() but only sent to the conductor
+    when it changes, or every status_keepalive_interval seconds otherwise.
+    For one keep-alive interval after the agent starts or the DB server
+    restarts every status is sent, so that the statuses the task manager
+    writes meanwhile, such as PAUSED after a reboot or resize, are
+    corrected at once.
     """
 
     _instance = None
@@ -60,6 +67,13 @@ class BaseDbStatus(object):
             instance_id=CONF.guest_id,
             status=rd_instance.ServiceStatuses.NEW)
         self.restart_mode = False
+        self._last_report = None
+        self._report_all()
+
+    def _report_all(self):
+        """Send every status for the next keep-alive interval."""
+        self._report_all_until = (time.time() +
+                                  CONF.status_keepalive_interval)
 
     def begin_install(self):
         """Called right before DB is prepared."""
@@ -68,6 +82,7 @@ class BaseDbStatus(object):
     def begin_restart(self):
         """Called before restarting DB server."""
         self.restart_mode = True
+        self._report_all()
 
     def end_install_or_restart(self):
         """Called after DB is installed or restarted.
@@ -76,6 +91,7 @@ class BaseDbStatus(object):
         """
         LOG.info("Ending install_if_needed or restart.")
         self.restart_mode = False
+        self._report_all()
         real_status = self._get_actual_db_status()
         LOG.info("Updating status to %s" % real_status)
         self.set_status(real_status)
@@ -118,15 +134,28 @@ class BaseDbStatus(object):
                                           sent=timeutils.float_utcnow())
         LOG.debug("Successfully cast set_status.")
         self.status = status
+        self._last_report = time.time()
+
+    @property
+    def _report_due(self):
+        now = time.time()
+        return (self._last_report is None or
+                now - self._last_report >= CONF.status_keepalive_interval or
+                now < self._report_all_until)
 
     def update(self):
         """Find and report status of DB on this machine.
-        The database is updated and the status is also returned.
+
+        The status is only reported when it changed or when a report is
+        due.
         """
         if self.is_installed and not self._is_restarting:
             LOG.info("Determining status of DB server...")
             status = self._get_actual_db_status()
-            self.set_status(status)
+            if status != self.status or self._report_due:
+                self.set_status(status)
+            else:
+                LOG.debug("DB server status is still %s." % status)
         else:
             LOG.info("DB server is not installed or is in restart mode, so "
                      "for now we'll skip determining the status of DB on this "
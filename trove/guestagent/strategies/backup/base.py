@@ -15,6 +15,7 @@
 #
 
 from trove.guestagent.strategy import Strategy
+from trove.guestagent.strategies.codec import get_codec_strategy
 from trove.openstack.common import log as logging
 from trove.common import cfg, utils
 from eventlet.green import subprocess
@@ -44,11 +45,19 @@ class BackupRunner(Strategy):
     is_zipped = CONF.backup_use_gzip_compression
     is_encrypted = CONF.backup_use_openssl_encryption
     encrypt_key = CONF.backup_aes_cbc_key
+    codec_strategy = CONF.backup_codec_strategy
 
     def __init__(self, filename, **kwargs):
         self.base_filename = filename
         self.process = None
         self.pid = None
+        self.codec = None
+        self.stream = None
+        if self.codec_strategy:
+            codec = get_codec_strategy(self.codec_strategy,
+                                       CONF.backup_codec_namespace)
+            self.codec = codec(self.is_zipped, self.is_encrypted,
+                               self.encrypt_key)
         kwargs.update({'filename': filename})
         self.command = self.cmd % kwargs
         super(BackupRunner, self).__init__()
@@ -63,6 +72,10 @@ class BackupRunner(Strategy):
                                         stderr=subprocess.PIPE,
                                         preexec_fn=os.setsid)
         self.pid = self.process.pid
+        if self.codec:
+            self.stream = self.codec.encode(self.process.stdout)
+        else:
+            self.stream = self.process.stdout
 
     def __enter__(self):
         """Start up the process"""
@@ -97,6 +110,14 @@ class BackupRunner(Strategy):
         """Hook for subclasses to store metadata from the backup."""
         return {}
 
+    def codec_metadata(self):
+        """Metadata telling restores which codec encoded the backup."""
+        if self.codec:
+            return {'codec': self.codec.codec_type,
+                    'codec_zipped': str(self.codec.is_zipped),
+                    'codec_encrypted': str(self.codec.is_encrypted)}
+        return {}
+
     @property
     def filename(self):
         """Subclasses may overwrite this to declare a format (.tar)"""
@@ -110,6 +131,8 @@ class BackupRunner(Strategy):
 
     @property
     def zip_cmd(self):
+        if self.codec:
+            return ''
         return ' | gzip' if self.is_zipped else ''
 
     @property
@@ -118,6 +141,8 @@ class BackupRunner(Strategy):
 
     @property
     def encrypt_cmd(self):
+        if self.codec:
+            return ''
         return (' | openssl enc -aes-256-cbc -salt -pass pass:%s' %
                 self.encrypt_key) if self.is_encrypted else ''
 
@@ -130,7 +155,7 @@ class BackupRunner(Strategy):
         return True
 
     def read(self, chunk_size):
-        return self.process.stdout.read(chunk_size)
+        return self.stream.read(chunk_size)
 
     def _run_pre_backup(self):
         pass
@@ -0,0 +1,55 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from trove.guestagent.common import operating_system
+from trove.guestagent.strategies.backup import base
+from trove.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+class MongoDump(base.BackupRunner):
+    """Implementation of Backup Strategy for MongoDB.
+
+    Streams the archive of mongodump, from MongoDB 3.2 on, without writing
+    the dump to the disk of the guest first.
+    """
+    __strategy_name__ = 'mongodump'
+
+    @property
+    def cmd(self):
+        cmd = ('mongodump'
+               ' --host %s'
+               ' --archive'
+               ' %%(extra_opts)s'
+               ' 2>/tmp/mongodump.log' % operating_system.get_ip_address())
+        return cmd + self.zip_cmd + self.encrypt_cmd
+
+    @property
+    def filename(self):
+        return '%s.archive' % self.base_filename
+
+    def check_process(self):
+        """Check the output from mongodump for a failure."""
+        LOG.debug('Checking mongodump process output')
+        with open('/tmp/mongodump.log', 'r') as backup_log:
+            output = backup_log.read()
+            LOG.info(output)
+            if 'Failed:' in output:
+                LOG.error("Mongodump did not complete successfully")
+                return False
+
+        return True
@@ -0,0 +1,68 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from trove.common import exception
+from trove.common import utils
+from trove.guestagent.datastore.redis import service
+from trove.guestagent.strategies.backup import base
+from trove.openstack.common import log as logging
+from trove.openstack.common.gettextutils import _  # noqa
+
+LOG = logging.getLogger(__name__)
+
+
+class RedisBackup(base.BackupRunner):
+    """Implementation of Backup Strategy for Redis.
+
+    A BGSAVE writes a snapshot of the data set to the dump file, which is
+    then streamed to the storage as it is.
+    """
+    __strategy_name__ = 'redisbackup'
+
+    SAVE_SLEEP_INTERVAL = 2
+    SAVE_TIMEOUT = 3600
+
+    @property
+    def cmd(self):
+        return ('sudo cat %s' % service.get_rdb_path() +
+                self.zip_cmd + self.encrypt_cmd)
+
+    @property
+    def filename(self):
+        return '%s.rdb' % self.base_filename
+
+    def _is_saving(self):
+        info = service.get_info()
+        # Redis before 2.6 names the field without the rdb_ prefix.
+        return info.get('rdb_bgsave_in_progress',
+                        info.get('bgsave_in_progress')) == '1'
+
+    def _run_pre_backup(self):
+        LOG.info(_("Saving a snapshot of redis."))
+        out = service.run_redis_cli('BGSAVE')
+        # A save already in progress is as good as the one asked for.
+        if 'Background sav' not in out:
+            raise base.BackupError(_("Redis could not start a snapshot: "
+                                     "%s") % out)
+        try:
+            utils.poll_until(lambda: not self._is_saving(),
+                             sleep_time=self.SAVE_SLEEP_INTERVAL,
+                             time_out=self.SAVE_TIMEOUT)
+        except exception.PollTimeOut:
+            raise base.BackupError(_("Redis did not finish the snapshot in "
+                                     "%s seconds.") % self.SAVE_TIMEOUT)
+        if service.get_info().get('rdb_last_bgsave_status', 'ok') != 'ok':
+            raise base.BackupError(_("Redis failed to save the snapshot."))
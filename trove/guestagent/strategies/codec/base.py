@@ -0,0 +1,167 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import abc
+import errno
+import os
+
+from eventlet.green import subprocess
+from eventlet import greenthread
+
+from trove.common import cfg
+from trove.guestagent.strategy import Strategy
+from trove.openstack.common import log as logging
+from trove.openstack.common.gettextutils import _  # noqa
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+CHUNK_SIZE = CONF.backup_chunk_size
+
+# The key is handed to openssl through its environment so it does not
+# show up on the process command line.
+KEY_ENV = 'TROVE_BACKUP_KEY'
+ENCRYPT_CMD = ['openssl', 'enc', '-aes-256-cbc', '-salt',
+               '-pass', 'env:%s' % KEY_ENV]
+DECRYPT_CMD = ['openssl', 'enc', '-d', '-aes-256-cbc', '-salt',
+               '-pass', 'env:%s' % KEY_ENV]
+
+
+class CodecError(Exception):
+    """Error encoding or decoding a backup stream."""
+
+
+class ChunkReader(object):
+    """File-like wrapper around an iterator of chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buffer = ''
+        self.offset = 0
+        self.exhausted = False
+
+    def read(self, chunk_size=CHUNK_SIZE):
+        # Green pool iterators block if they are asked for more items once
+        # they have been exhausted, so they are only drained once.
+        while (not self.exhausted and
+               len(self.buffer) - self.offset < chunk_size):
+            try:
+                next_chunk = next(self.chunks)
+            except StopIteration:
+                self.exhausted = True
+                break
+            self.buffer = self.buffer[self.offset:] + next_chunk
+            self.offset = 0
+        chunk = self.buffer[self.offset:self.offset + chunk_size]
+        self.offset += len(chunk)
+        return chunk
+
+
+def iter_chunks(stream, chunk_size=CHUNK_SIZE):
+    """Read a file-like stream until it is exhausted."""
+    chunk = stream.read(chunk_size)
+    while chunk:
+        yield chunk
+        chunk = stream.read(chunk_size)
+
+
+def filter_through(cmd, chunks, env=None):
+    """Stream chunks through a filter process and yield its output.
+
+    The input is fed to the process from a separate green thread so the
+    process never blocks on a full pipe in either direction.
+    """
+    process = subprocess.Popen(cmd, env=env,
+                               stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+
+    def _feed():
+        try:
+            try:
+                for chunk in chunks:
+                    process.stdin.write(chunk)
+            finally:
+                process.stdin.close()
+        except IOError as e:
+            # The process went away before reading all of its input, its
+            # exit status tells what went wrong.
+            if e.errno != errno.EPIPE:
+                raise
+
+    feeder = greenthread.spawn(_feed)
+    for chunk in iter_chunks(process.stdout):
+        yield chunk
+    feeder.wait()
+    if process.wait() != 0:
+        raise CodecError(_("%(cmd)s failed: %(err)s") %
+                         {'cmd': cmd[0], 'err': process.stderr.read()})
+
+
+class Codec(Strategy):
+    """Base class for in-process backup stream codecs.
+
+    A codec sits between the backup process and the storage strategy and
+    takes over the compression and encryption otherwise done by shell
+    commands in the backup and restore pipelines.
+    """
+    __strategy_type__ = 'codec'
+    __strategy_ns__ = 'trove.guestagent.strategies.codec'
+
+    def __init__(self, is_zipped, is_encrypted, key):
+        self.is_zipped = is_zipped
+        self.is_encrypted = is_encrypted
+        self.key = key
+        super(Codec, self).__init__()
+
+    @property
+    def codec_type(self):
+        return type(self).__name__
+
+    def encode(self, stream):
+        """Wrap the output of the backup process in a readable stream."""
+        chunks = iter_chunks(stream)
+        if self.is_zipped:
+            chunks = self.compress(chunks)
+        if self.is_encrypted:
+            chunks = self.encrypt(chunks)
+        return ChunkReader(chunks)
+
+    def decode(self, chunks):
+        """Undo encode on the chunks of a stored backup."""
+        if self.is_encrypted:
+            chunks = self.decrypt(chunks)
+        if self.is_zipped:
+            chunks = self.decompress(chunks)
+        return chunks
+
+    def encrypt(self, chunks):
+        return filter_through(ENCRYPT_CMD, chunks, env=self._key_env())
+
+    def decrypt(self, chunks):
+        return filter_through(DECRYPT_CMD, chunks, env=self._key_env())
+
+    def _key_env(self):
+        env = dict(os.environ)
+        env[KEY_ENV] = self.key
+        return env
+
+    @abc.abstractmethod
+    def compress(self, chunks):
+        """Compress an iterator of chunks."""
+
+    @abc.abstractmethod
+    def decompress(self, chunks):
+        """Decompress an iterator of chunks."""
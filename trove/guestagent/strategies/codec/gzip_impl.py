@@ -0,0 +1,98 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import zlib
+
+from eventlet import greenpool
+from eventlet import tpool
+
+from trove.common import cfg
+from trove.guestagent.strategies.codec import base
+from trove.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+# zlib window bits that select the gzip container format
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def _gzip_block(block, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(block) + compressor.flush()
+
+
+def _iter_blocks(chunks, block_size):
+    """Regroup an iterator of chunks into blocks of block_size bytes."""
+    parts = []
+    length = 0
+    for chunk in chunks:
+        parts.append(chunk)
+        length += len(chunk)
+        if length >= block_size:
+            data = ''.join(parts)
+            while len(data) >= block_size:
+                yield data[:block_size]
+                data = data[block_size:]
+            parts = [data]
+            length = len(data)
+    if length:
+        yield ''.join(parts)
+
+
+class ParallelGzip(base.Codec):
+    """Block parallel gzip, in the manner of pigz.
+
+    The stream is cut into fixed size blocks which are deflated on native
+    threads, since zlib releases the GIL while it works. Every block is
+    written as a complete gzip member. A concatenation of gzip members is
+    itself a valid gzip file, so the output still restores with 'gzip -d'.
+    """
+    __strategy_name__ = 'pgzip'
+
+    def __init__(self, *args, **kwargs):
+        super(ParallelGzip, self).__init__(*args, **kwargs)
+        self.level = CONF.backup_compression_level
+        self.threads = CONF.backup_compression_threads
+        self.block_size = CONF.backup_compression_block_size
+
+    def compress(self, chunks):
+        pool = greenpool.GreenPool(self.threads)
+
+        def _compress(block):
+            return tpool.execute(_gzip_block, block, self.level)
+
+        # imap yields the members in block order and bounds the number of
+        # blocks compressed ahead of the reader.
+        return pool.imap(_compress,
+                         _iter_blocks(chunks, self.block_size))
+
+    def decompress(self, chunks):
+        decompressor = zlib.decompressobj(GZIP_WBITS)
+        for chunk in chunks:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+            # Start a new decompressor for each following gzip member
+            while decompressor.unused_data:
+                unused_data = decompressor.unused_data
+                decompressor = zlib.decompressobj(GZIP_WBITS)
+                data = decompressor.decompress(unused_data)
+                if data:
+                    yield data
+        data = decompressor.flush()
+        if data:
+            yield data
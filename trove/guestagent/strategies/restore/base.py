@@ -14,6 +14,7 @@
 #    under the License.
 #
 from trove.guestagent.strategy import Strategy
+from trove.guestagent.strategies.codec import get_codec_strategy
 from trove.common import cfg
 from trove.common import exception
 from trove.common import utils
@@ -59,6 +60,7 @@ class RestoreRunner(Strategy):
     is_zipped = BACKUP_USE_GZIP
     is_encrypted = BACKUP_USE_OPENSSL
     decrypt_key = BACKUP_DECRYPT_KEY
+    codec_strategy = CONF.backup_codec_strategy
 
     def __init__(self, storage, **kwargs):
         self.storage = storage
@@ -66,8 +68,7 @@ class RestoreRunner(Strategy):
         self.checksum = kwargs.pop('checksum')
         self.restore_location = kwargs.get('restore_location',
                                            '/var/lib/mysql')
-        self.restore_cmd = (self.decrypt_cmd +
-                            self.unzip_cmd +
+        self.restore_cmd = (self.decode_cmd +
                             (self.base_restore_cmd % kwargs))
         super(RestoreRunner, self).__init__()
 
@@ -88,21 +89,64 @@ class RestoreRunner(Strategy):
     def _run_restore(self):
         return self._unpack(self.location, self.checksum, self.restore_cmd)
 
-    def _unpack(self, location, checksum, command):
-        stream = self.storage.load(location, checksum)
+    def _get_codec(self, location, checksum, metadata=None):
+        """Return the codec recorded in the backup metadata, if any.
+
+        The metadata is only loaded when this guest uses a codec. Codecs
+        write the same formats as the shell commands, which decode the
+        backup otherwise.
+        """
+        if metadata is None:
+            if not self.codec_strategy:
+                return None
+            metadata = self.storage.load_metadata(location, checksum)
+        codec_type = metadata.get('codec')
+        if not codec_type:
+            return None
+        LOG.info(_("Decoding backup with codec: %s") % codec_type)
+        codec = get_codec_strategy(codec_type, CONF.backup_codec_namespace)
+        # Decode the way the backup was encoded. Backups that did not
+        # record it were encoded as configured here.
+        is_zipped = metadata.get('codec_zipped', str(self.is_zipped))
+        is_encrypted = metadata.get('codec_encrypted',
+                                    str(self.is_encrypted))
+        return codec(is_zipped == 'True', is_encrypted == 'True',
+                     self.decrypt_key)
+
+    def _unpack(self, location, checksum, command, metadata=None):
+        """Stream a stored backup into the restore command.
+
+        Returns the number of bytes read from the storage.
+        """
+        codec = self._get_codec(location, checksum, metadata)
+        content = {'length': 0}
+
+        def _stored_chunks():
+            for chunk in self.storage.load(location, checksum):
+                content['length'] += len(chunk)
+                yield chunk
+
+        stream = _stored_chunks()
+        if codec:
+            # The codec takes the place of the decrypt and unzip commands
+            stream = codec.decode(stream)
+            command = command[len(self.decode_cmd):]
         process = subprocess.Popen(command, shell=True,
                                    stdin=subprocess.PIPE,
                                    stderr=subprocess.PIPE)
-        content_length = 0
         for chunk in stream:
             process.stdin.write(chunk)
-            content_length += len(chunk)
         process.stdin.close()
         utils.raise_if_process_errored(process, RestoreError)
+        content_length = content['length']
         LOG.info(_("Restored %s bytes from stream.") % content_length)
 
         return content_length
 
+    @property
+    def decode_cmd(self):
+        return self.decrypt_cmd + self.unzip_cmd
+
     @property
     def decrypt_cmd(self):
         if self.is_encrypted:
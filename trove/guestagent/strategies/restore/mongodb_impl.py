@@ -0,0 +1,45 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from trove.guestagent.common import operating_system
+from trove.guestagent.strategies.restore import base
+from trove.openstack.common import log as logging
+from trove.openstack.common.gettextutils import _  # noqa
+
+LOG = logging.getLogger(__name__)
+
+
+class MongoDump(base.RestoreRunner):
+    """Implementation of Restore Strategy for MongoDB.
+
+    Streams the archive into mongorestore, which replaces the collections
+    of the running server with the ones of the backup.
+    """
+    __strategy_name__ = 'mongodump'
+
+    @property
+    def base_restore_cmd(self):
+        return ('mongorestore --host %s --archive --drop'
+                ' 2>/tmp/mongorestore.log' %
+                operating_system.get_ip_address())
+
+    def post_restore(self):
+        with open('/tmp/mongorestore.log', 'r') as restore_log:
+            output = restore_log.read()
+            LOG.info(output)
+            if 'Failed:' in output:
+                raise base.RestoreError(_("Mongorestore did not complete "
+                                          "successfully."))
@@ -19,7 +19,11 @@ import os
 import pexpect
 import tempfile
 
+from eventlet import greenpool
+from eventlet import greenthread
+
 from trove.guestagent.strategies.restore import base
+from trove.openstack.common import excutils
 from trove.openstack.common import log as logging
 from trove.common import exception
 from trove.common import utils
@@ -28,6 +32,10 @@ from trove.openstack.common.gettextutils import _  # noqa
 
 LOG = logging.getLogger(__name__)
 
+# Number of backup metadata lookups made at the same time when the
+# backup chain is known up front.
+METADATA_CONCURRENCY = 10
+
 
 class MySQLRestoreMixin(object):
     """Common utils for restoring MySQL databases"""
@@ -161,14 +169,13 @@ class InnoBackupExIncremental(InnoBackupEx):
     def __init__(self, *args, **kwargs):
         super(InnoBackupExIncremental, self).__init__(*args, **kwargs)
         self.restore_location = kwargs.get('restore_location')
+        self.parents = kwargs.get('parents')
         self.content_length = 0
 
     def _incremental_restore_cmd(self, incremental_dir):
         """Return a command for a restore with a incremental location."""
         args = {'restore_location': incremental_dir}
-        return (self.decrypt_cmd +
-                self.unzip_cmd +
-                (self.base_restore_cmd % args))
+        return self.decode_cmd + (self.base_restore_cmd % args)
 
     def _incremental_prepare_cmd(self, incremental_dir):
         if incremental_dir is not None:
@@ -189,47 +196,107 @@ class InnoBackupExIncremental(InnoBackupEx):
         utils.execute(prepare_cmd, shell=True)
         LOG.info(_("Innobackupex prepare finished successfully"))
 
-    def _incremental_restore(self, location, checksum):
-        """Recursively apply backups from all parents.
-
-        If we are the parent then we restore to the restore_location and
-        we apply the logs to the restore_location only.
+    def _restore_plan(self):
+        """Resolve the backup chain into an ordered restore plan.
 
-        Otherwise if we are an incremental we restore to a subfolder to
-        prevent stomping on the full restore data. Then we run apply log
-        with the '--incremental-dir' flag
+        Returns a list of (location, checksum, metadata) tuples, starting
+        with the full backup and ending with the backup being restored.
+        When the parents were passed in with the backup info, the metadata
+        of every link is looked up at once. Otherwise the chain is walked
+        one parent at a time through the metadata.
         """
-        metadata = self.storage.load_metadata(location, checksum)
-        incremental_dir = None
-        if 'parent_location' in metadata:
-            LOG.info(_("Restoring parent: %(parent_location)s"
-                       " checksum: %(parent_checksum)s") % metadata)
-            parent_location = metadata['parent_location']
-            parent_checksum = metadata['parent_checksum']
-            # Restore parents recursively so backup are applied sequentially
-            self._incremental_restore(parent_location, parent_checksum)
-            # for *this* backup set the incremental_dir
-            # just use the checksum for the incremental path as it is
-            # sufficently unique /var/lib/mysql/<checksum>
-            incremental_dir = os.path.join(self.restore_location, checksum)
+        if self.parents is not None:
+            return self._plan_from_parents()
+
+        plan = []
+        location, checksum = self.location, self.checksum
+        while True:
+            metadata = self.storage.load_metadata(location, checksum)
+            plan.append((location, checksum, metadata))
+            if 'parent_location' not in metadata:
+                break
+            location = metadata['parent_location']
+            checksum = metadata['parent_checksum']
+        plan.reverse()
+        return plan
+
+    def _plan_from_parents(self):
+        links = [(parent['location'], parent['checksum'])
+                 for parent in self.parents]
+        links.append((self.location, self.checksum))
+
+        pool = greenpool.GreenPool(METADATA_CONCURRENCY)
+        metadata = pool.imap(lambda link: self.storage.load_metadata(*link),
+                             links)
+        plan = [link + (meta,) for link, meta in zip(links, metadata)]
+
+        # Make sure the chain we were given is the one the backups were
+        # taken against.
+        parent_location = None
+        for location, checksum, meta in plan:
+            if meta.get('parent_location') != parent_location:
+                raise base.RestoreError(
+                    "Backup %(location)s does not follow %(parent)s in the "
+                    "backup chain." % {'location': location,
+                                       'parent': parent_location})
+            parent_location = location
+        return plan
+
+    def _unpack_link(self, location, checksum, metadata, incremental_dir):
+        """Download and extract one backup of the chain.
+
+        The full backup is extracted to the restore_location. Incrementals
+        are extracted to a subfolder to prevent stomping on the full
+        restore data.
+        """
+        if incremental_dir is not None:
             utils.execute("mkdir", "-p", incremental_dir,
                           root_helper="sudo",
                           run_as_root=True)
             command = self._incremental_restore_cmd(incremental_dir)
         else:
-            # The parent (full backup) use the same command from InnobackupEx
-            # super class and do not set an incremental_dir.
             command = self.restore_cmd
-
-        self.content_length += self._unpack(location, checksum, command)
-        self._incremental_prepare(incremental_dir)
+        self.content_length += self._unpack(location, checksum, command,
+                                            metadata)
 
     def _run_restore(self):
         """Run incremental restore.
 
-        First grab all parents and prepare them with '--redo-only'. After
-        all backups are restored the super class InnoBackupEx post_restore
-        method is called to do the final prepare with '--apply-log'
+        Every backup of the chain is applied with '--redo-only', from the
+        full backup up. The next backup is downloaded and extracted while
+        the current one is being prepared. After all backups are restored
+        the super class InnoBackupEx post_restore method is called to do
+        the final prepare with '--apply-log'
         """
-        self._incremental_restore(self.location, self.checksum)
+        plan = self._restore_plan()
+        LOG.info(_("Restoring a chain of %s backups.") % len(plan))
+
+        # The full backup does not use an incremental_dir. Incrementals
+        # just use the checksum as it is sufficiently unique
+        # /var/lib/mysql/<checksum>
+        incremental_dirs = [None] + [
+            os.path.join(self.restore_location, checksum)
+            for location, checksum, metadata in plan[1:]]
+
+        self._unpack_link(*(plan[0] + (None,)))
+        for index, incremental_dir in enumerate(incremental_dirs):
+            next_unpack = None
+            if index + 1 < len(plan):
+                next_unpack = greenthread.spawn(
+                    self._unpack_link,
+                    *(plan[index + 1] + (incremental_dirs[index + 1],)))
+            try:
+                self._incremental_prepare(incremental_dir)
+            except Exception:
+                with excutils.save_and_reraise_exception():
+                    # Let the next unpack finish, but only report the
+                    # error of the prepare.
+                    if next_unpack is not None:
+                        try:
+                            next_unpack.wait()
+                        except Exception:
+                            LOG.exception(_("Error unpacking the next "
+                                            "backup of the chain."))
+            if next_unpack is not None:
+                next_unpack.wait()
         return self.content_length
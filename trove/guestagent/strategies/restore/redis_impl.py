@@ -0,0 +1,88 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+import re
+
+from trove.common import exception
+from trove.common import utils
+from trove.guestagent.datastore.redis import service
+from trove.guestagent.datastore.redis import system
+from trove.guestagent.strategies.restore import base
+from trove.openstack.common import log as logging
+from trove.openstack.common.gettextutils import _  # noqa
+
+LOG = logging.getLogger(__name__)
+
+
+class RedisBackup(base.RestoreRunner):
+    """Implementation of Restore Strategy for Redis.
+
+    The backup replaces the dump file of the stopped server. With the
+    append only file on, redis would load that file rather than the dump,
+    so the server first starts with it off and then rewrites it from the
+    restored data set.
+    """
+    __strategy_name__ = 'redisbackup'
+
+    LOAD_SLEEP_INTERVAL = 2
+    LOAD_TIMEOUT = 3600
+
+    def __init__(self, *args, **kwargs):
+        self.app = service.RedisApp(service.RedisAppStatus.get())
+        super(RedisBackup, self).__init__(*args, **kwargs)
+
+    @property
+    def base_restore_cmd(self):
+        return 'sudo tee %s >/dev/null' % service.get_rdb_path()
+
+    def pre_restore(self):
+        self.app.stop_db()
+        LOG.info(_("Removing the append only file of redis."))
+        utils.execute_with_timeout('rm', '-f', service.get_aof_path(),
+                                   run_as_root=True, root_helper='sudo')
+
+    def post_restore(self):
+        utils.execute_with_timeout('chown', 'redis:redis',
+                                   service.get_rdb_path(),
+                                   run_as_root=True, root_helper='sudo')
+        if not service.is_aof_enabled():
+            self.app.start_redis()
+            return
+        with open(system.REDIS_CONFIG, 'r') as fd:
+            config_contents = fd.read()
+        self.app.write_config(re.sub(r'(?m)^appendonly\s+yes',
+                                     'appendonly no', config_contents))
+        try:
+            self.app.start_redis()
+            self._wait_for(lambda info: info.get('loading') == '0')
+            LOG.info(_("Rewriting the append only file of redis."))
+            service.run_redis_cli('CONFIG', 'SET', 'appendonly', 'yes')
+            # Redis before 2.6 names the field bgrewriteaof_in_progress.
+            self._wait_for(lambda info: '1' not in (
+                info.get('aof_rewrite_in_progress',
+                         info.get('bgrewriteaof_in_progress')),
+                info.get('aof_rewrite_scheduled')))
+        finally:
+            self.app.write_config(config_contents)
+
+    def _wait_for(self, condition):
+        try:
+            utils.poll_until(service.get_info, condition,
+                             sleep_time=self.LOAD_SLEEP_INTERVAL,
+                             time_out=self.LOAD_TIMEOUT)
+        except exception.PollTimeOut:
+            raise base.RestoreError(_("Redis did not load the backup in "
+                                      "%s seconds.") % self.LOAD_TIMEOUT)
@@ -14,11 +14,16 @@
 #    under the License.
 #
 
+import functools
 import hashlib
+import tempfile
+
+from eventlet import greenpool
 
 from trove.guestagent.strategies.storage import base
 from trove.openstack.common import log as logging
 from trove.openstack.common.gettextutils import _  # noqa
+from trove.common import remote
 from trove.common.remote import create_swift_client
 from trove.common import cfg
 
@@ -28,6 +33,9 @@ CONF = cfg.CONF
 CHUNK_SIZE = CONF.backup_chunk_size
 MAX_FILE_SIZE = CONF.backup_segment_max_size
 BACKUP_CONTAINER = CONF.backup_swift_container
+UPLOAD_CONCURRENCY = CONF.backup_upload_concurrency
+DOWNLOAD_CONCURRENCY = CONF.backup_download_concurrency
+SEGMENT_BUFFER_SIZE = CONF.backup_segment_buffer_size
 
 
 class DownloadError(Exception):
@@ -107,9 +115,6 @@ class SwiftStorage(base.Storage):
         # Create the container if it doesn't already exist
         self.connection.put_container(BACKUP_CONTAINER)
 
-        # Swift Checksum is the checksum of the concatenated segment checksums
-        swift_checksum = hashlib.md5()
-
         # Wrap the output of the backup process to segment it for swift
         stream_reader = StreamReader(stream, filename)
 
@@ -118,21 +123,20 @@ class SwiftStorage(base.Storage):
         location = "%s/%s/%s" % (url, BACKUP_CONTAINER, filename)
 
         # Read from the stream and write to the container in swift
-        while not stream_reader.end_of_file:
-            etag = self.connection.put_object(BACKUP_CONTAINER,
-                                              stream_reader.segment,
-                                              stream_reader)
-
-            segment_checksum = stream_reader.segment_checksum.hexdigest()
+        if UPLOAD_CONCURRENCY > 1:
+            segment_checksums = self._save_segments_concurrently(
+                stream_reader)
+        else:
+            segment_checksums = self._save_segments(stream_reader)
 
-            # Check each segment MD5 hash against swift etag
-            # Raise an error and mark backup as failed
-            if etag != segment_checksum:
-                LOG.error("Error saving data segment to swift. "
-                          "ETAG: %s Segment MD5: %s",
-                          etag, segment_checksum)
-                return False, "Error saving data to Swift!", None, location
+        # A segment MD5 hash did not match its swift etag
+        # Raise an error and mark backup as failed
+        if segment_checksums is None:
+            return False, "Error saving data to Swift!", None, location
 
+        # Swift Checksum is the checksum of the concatenated segment checksums
+        swift_checksum = hashlib.md5()
+        for segment_checksum in segment_checksums:
             swift_checksum.update(segment_checksum)
 
         # Create the manifest file
@@ -166,6 +170,98 @@ class SwiftStorage(base.Storage):
         return (True, "Successfully saved data to Swift!",
                 final_swift_checksum, location)
 
+    def _connection_pool(self, size):
+        """Queue of the storage connection and size - 1 new ones."""
+        return remote.client_pool(
+            self.connection, size,
+            functools.partial(create_swift_client, self.context))
+
+    def _save_segments(self, stream_reader):
+        """Upload the segments one after another.
+
+        Returns the segment checksums in manifest order or None if a segment
+        etag did not match its checksum.
+        """
+        segment_checksums = []
+        while not stream_reader.end_of_file:
+            etag = self.connection.put_object(BACKUP_CONTAINER,
+                                              stream_reader.segment,
+                                              stream_reader)
+
+            segment_checksum = stream_reader.segment_checksum.hexdigest()
+
+            # Check each segment MD5 hash against swift etag
+            if etag != segment_checksum:
+                LOG.error("Error saving data segment to swift. "
+                          "ETAG: %s Segment MD5: %s",
+                          etag, segment_checksum)
+                return None
+
+            segment_checksums.append(segment_checksum)
+        return segment_checksums
+
+    def _save_segments_concurrently(self, stream_reader):
+        """Upload the segments over a pool of swift connections.
+
+        Each segment is read ahead into its own spooled buffer while earlier
+        segments are still being uploaded. At most the pool size plus the
+        segment being read are buffered, so the stream is only read as fast
+        as swift accepts the data.
+
+        Returns the segment checksums in manifest order or None if a segment
+        etag did not match its checksum.
+        """
+        connections = self._connection_pool(UPLOAD_CONCURRENCY)
+        pool = greenpool.GreenPool(UPLOAD_CONCURRENCY)
+        checksums = {}
+        failed = []
+        errors = []
+
+        def _upload(segment, buf, length, segment_checksum):
+            connection = connections.get()
+            try:
+                buf.seek(0)
+                etag = connection.put_object(BACKUP_CONTAINER, segment, buf,
+                                             content_length=length)
+            except Exception as e:
+                LOG.exception(_("Error uploading segment %s to swift."),
+                              segment)
+                failed.append(segment)
+                errors.append(e)
+                return
+            finally:
+                connections.put(connection)
+                buf.close()
+
+            # Check each segment MD5 hash against swift etag
+            if etag != segment_checksum:
+                LOG.error("Error saving data segment to swift. "
+                          "ETAG: %s Segment MD5: %s",
+                          etag, segment_checksum)
+                failed.append(segment)
+
+        while not stream_reader.end_of_file and not failed:
+            segment = stream_reader.segment
+            buf = tempfile.SpooledTemporaryFile(max_size=SEGMENT_BUFFER_SIZE)
+            chunk = stream_reader.read()
+            while chunk:
+                buf.write(chunk)
+                chunk = stream_reader.read()
+
+            segment_checksum = stream_reader.segment_checksum.hexdigest()
+            checksums[segment] = segment_checksum
+            # Blocks until a slot in the pool is free
+            pool.spawn_n(_upload, segment, buf, stream_reader.segment_length,
+                         segment_checksum)
+
+        pool.waitall()
+        # Fail the backup with the first error hit by an upload
+        if errors:
+            raise errors[0]
+        if failed:
+            return None
+        return [checksums[name] for name in sorted(checksums)]
+
     def _explodeLocation(self, location):
         storage_url = "/".join(location.split('/')[:-2])
         container = location.split('/')[-2]
@@ -186,6 +282,15 @@ class SwiftStorage(base.Storage):
         """Restore a backup from the input stream to the restore_location"""
         storage_url, container, filename = self._explodeLocation(location)
 
+        if DOWNLOAD_CONCURRENCY > 1:
+            headers = self.connection.head_object(container, filename)
+            manifest = headers.get('x-object-manifest')
+            if manifest:
+                if CONF.verify_swift_checksum_on_restore:
+                    self._verify_checksum(headers.get('etag', ''),
+                                          backup_checksum)
+                return self._load_segments_concurrently(manifest)
+
         headers, info = self.connection.get_object(container, filename,
                                                    resp_chunk_size=CHUNK_SIZE)
 
@@ -194,6 +299,57 @@ class SwiftStorage(base.Storage):
 
         return info
 
+    def _load_segments_concurrently(self, manifest):
+        """Stream the segments of a manifest, fetching several at once.
+
+        Segments are downloaded ahead of the consumer into spooled buffers
+        over a pool of swift connections and handed out in manifest order.
+        Each segment is checked against its etag from the container listing
+        as it is downloaded.
+        """
+        container, prefix = manifest.split('/', 1)
+        _headers, segments = self.connection.get_container(
+            container, prefix=prefix, full_listing=True)
+        LOG.debug("Downloading %(count)s segments of %(manifest)s." %
+                  {'count': len(segments), 'manifest': manifest})
+
+        connections = self._connection_pool(DOWNLOAD_CONCURRENCY)
+        pool = greenpool.GreenPool(DOWNLOAD_CONCURRENCY)
+
+        def _download(segment):
+            connection = connections.get()
+            buf = tempfile.SpooledTemporaryFile(max_size=SEGMENT_BUFFER_SIZE)
+            try:
+                headers, info = connection.get_object(
+                    container, segment['name'], resp_chunk_size=CHUNK_SIZE)
+                checksum = hashlib.md5()
+                for chunk in info:
+                    checksum.update(chunk)
+                    buf.write(chunk)
+                self._verify_checksum(segment['hash'], checksum.hexdigest())
+                buf.seek(0)
+                return buf, None
+            except Exception as e:
+                buf.close()
+                return None, e
+            finally:
+                connections.put(connection)
+
+        def _stream():
+            # imap keeps the segments in order and bounds the read-ahead
+            for buf, error in pool.imap(_download, segments):
+                if error:
+                    raise error
+                try:
+                    chunk = buf.read(CHUNK_SIZE)
+                    while chunk:
+                        yield chunk
+                        chunk = buf.read(CHUNK_SIZE)
+                finally:
+                    buf.close()
+
+        return _stream()
+
     def _get_attr(self, original):
         """Get a friendly name from an object header key"""
         key = original.replace('-', '_')
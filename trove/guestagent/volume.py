@@ -13,18 +13,30 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
 import os
 import pexpect
+import time
 from tempfile import NamedTemporaryFile
 
+from eventlet import greenpool
+
 from trove.common import cfg
+from trove.common import context
 from trove.common import utils
 from trove.common.exception import GuestError
 from trove.common.exception import ProcessExecutionError
+from trove.conductor import api as conductor_api
+from trove.guestagent.common import timeutils
 from trove.openstack.common import log as logging
 from trove.openstack.common.gettextutils import _
 
 TMP_MOUNT_POINT = "/mnt/volume"
+RSYNC_OPTIONS = ["--safe-links", "--perms", "--owner", "--group", "--xattrs",
+                 "--sparse"]
+# Most files in one batch, so that directories of many small files are
+# still copied in parallel.
+MIGRATION_BATCH_FILES = 1000
 
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
@@ -40,9 +52,7 @@ class VolumeDevice(object):
         self.mount(TMP_MOUNT_POINT, write_to_fstab=False)
         if not mysql_base[-1] == '/':
             mysql_base = "%s/" % mysql_base
-        utils.execute("sudo", "rsync", "--safe-links", "--perms",
-                      "--recursive", "--owner", "--group", "--xattrs",
-                      "--sparse", mysql_base, TMP_MOUNT_POINT)
+        DataMigration(mysql_base, TMP_MOUNT_POINT, self.device_path).run()
         self.unmount(TMP_MOUNT_POINT)
 
     def _check_device_exists(self):
@@ -86,7 +96,17 @@ class VolumeDevice(object):
         child.expect(pexpect.EOF)
 
     def format(self):
-        """Formats the device at device_path and checks the filesystem."""
+        """Formats the device at device_path and checks the filesystem.
+
+        A volume an interrupted data migration was copying to is left as it
+        is, for the migration to resume. Otherwise the checkpoint of any
+        earlier migration goes with the data.
+        """
+        if DataMigration.interrupted_on(self.device_path):
+            LOG.info(_("Not formatting %s, the data migration onto it "
+                       "resumes.") % self.device_path)
+            return
+        DataMigration.discard_checkpoint()
         self._check_device_exists()
         self._format()
         self._check_format()
@@ -151,3 +171,210 @@ class VolumeMountPoint(object):
         utils.execute("sudo", "install", "-o", "root", "-g", "root", "-m",
                       "644", tempfstab.name, "/etc/fstab")
         utils.execute("sudo", "rm", tempfstab.name)
+
+
+def _filesystem_uuid(device_path):
+    """UUID of the filesystem on a device, new each time it is formatted.
+
+    Returns None if the device has no filesystem.
+    """
+    try:
+        out, err = utils.execute("sudo", "blkid", "-s", "UUID", "-o",
+                                 "value", device_path)
+    except ProcessExecutionError:
+        return None
+    return out.strip() or None
+
+
+def _plan_file():
+    return "%s.plan" % CONF.volume_migration_checkpoint
+
+
+class DataMigration(object):
+    """Copies a data directory onto a new volume in batches of files.
+
+    The directory tree is copied first, then volume_migration_workers rsync
+    processes copy the batches of files. The batches are written once to a
+    plan file next to the volume_migration_checkpoint file, and the index
+    of each batch done is appended to the checkpoint, so that a migration
+    of the same directory onto the same filesystem cut short by a restart
+    of the guest only copies the batches left. The progress is reported to
+    the conductor.
+
+    :param device_path: device of the target, whose filesystem UUID ties
+    the checkpoint to the data copied so far
+    """
+
+    def __init__(self, source, target, device_path):
+        self.source = source
+        self.target = target
+        self.device_path = device_path
+        self.checkpoint = CONF.volume_migration_checkpoint
+        self.plan = _plan_file()
+
+    @classmethod
+    def interrupted_on(cls, device_path):
+        """Whether a migration onto the volume at device_path was cut short."""
+        state = cls._read_checkpoint()
+        return (state is not None and state.get('volume') is not None and
+                state.get('volume') == _filesystem_uuid(device_path))
+
+    @classmethod
+    def discard_checkpoint(cls):
+        for path in (CONF.volume_migration_checkpoint, _plan_file()):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def run(self):
+        volume_id = _filesystem_uuid(self.device_path)
+        state = self._load_checkpoint(volume_id)
+        if state is None:
+            self._copy_directories()
+            state = {'source': self.source, 'volume': volume_id,
+                     'batches': self._plan(), 'done': []}
+            self._start_checkpoint(state)
+        else:
+            LOG.info(_("Resuming the migration of %(source)s after "
+                       "%(done)s of %(count)s batches.") %
+                     {'source': self.source, 'done': len(state['done']),
+                      'count': len(state['batches'])})
+        batches = state['batches']
+        total = sum(batch['size'] for batch in batches)
+        progress = {'copied': sum(batches[index]['size']
+                                  for index in state['done']),
+                    'this_run': 0, 'started': time.time()}
+
+        def _copy(index):
+            self._copy_batch(batches[index]['files'])
+            state['done'].append(index)
+            self._checkpoint_batch(index)
+            progress['copied'] += batches[index]['size']
+            progress['this_run'] += batches[index]['size']
+            elapsed = time.time() - progress['started']
+            self._report(progress['copied'], total,
+                         progress['this_run'] / max(elapsed, 0.001))
+
+        pool = greenpool.GreenPool(CONF.volume_migration_workers)
+        threads = [pool.spawn(_copy, index) for index in range(len(batches))
+                   if index not in state['done']]
+        pool.waitall()
+        for thread in threads:
+            # Raises the error of the first batch that failed.
+            thread.wait()
+        self.discard_checkpoint()
+        LOG.info(_("Migrated %(total)s bytes of %(source)s in %(batches)s "
+                   "batches.") % {'total': total, 'source': self.source,
+                                  'batches': len(batches)})
+
+    def _copy_directories(self):
+        utils.execute("sudo", "rsync", "--recursive", "--include=*/",
+                      "--exclude=*", *(RSYNC_OPTIONS +
+                                       [self.source, self.target]))
+
+    def _plan(self):
+        """Split the files of the source into batches.
+
+        Batches follow the order of the listing, which keeps the files of
+        a directory together, and close at volume_migration_batch_size
+        megabytes or MIGRATION_BATCH_FILES files.
+        """
+        out, err = utils.execute("sudo", "find", self.source, "-mindepth",
+                                 "1", "!", "-type", "d", "-printf",
+                                 "%s %P\\0")
+        max_size = CONF.volume_migration_batch_size * 1024 * 1024
+        batches = []
+        batch = None
+        for entry in out.split('\0'):
+            if not entry:
+                continue
+            size, path = entry.split(' ', 1)
+            if (batch is None or batch['size'] >= max_size or
+                    len(batch['files']) >= MIGRATION_BATCH_FILES):
+                batch = {'size': 0, 'files': []}
+                batches.append(batch)
+            batch['size'] += int(size)
+            batch['files'].append(path)
+        return batches
+
+    def _copy_batch(self, files):
+        with NamedTemporaryFile() as files_from:
+            files_from.write('\0'.join(files))
+            files_from.flush()
+            utils.execute("sudo", "rsync", "--from0",
+                          "--files-from=%s" % files_from.name,
+                          *(RSYNC_OPTIONS + [self.source, self.target]))
+
+    @staticmethod
+    def _read_checkpoint():
+        """Read the checkpoint, without the batches of the plan.
+
+        The checkpoint is a JSON line of the source and volume, followed
+        by the index of each batch done, one per line.
+        """
+        checkpoint = CONF.volume_migration_checkpoint
+        if not os.path.exists(checkpoint):
+            return None
+        try:
+            with open(checkpoint, 'r') as fd:
+                state = json.loads(fd.readline())
+                # A line cut short by a crash is not a batch done.
+                state['done'] = [int(line) for line in fd
+                                 if line.endswith('\n')]
+        except ValueError:
+            LOG.warning(_("Ignoring the unreadable migration checkpoint "
+                          "%s.") % checkpoint)
+            return None
+        return state
+
+    def _load_checkpoint(self, volume_id):
+        state = self._read_checkpoint()
+        if state is None:
+            return None
+        if state.get('source') != self.source:
+            LOG.warning(_("Ignoring the migration checkpoint of %s.") %
+                        state.get('source'))
+            return None
+        if volume_id is None or state.get('volume') != volume_id:
+            # The target was formatted since, or can't be told apart.
+            LOG.warning(_("Ignoring the migration checkpoint of another "
+                          "filesystem than the one on %s.") %
+                        self.device_path)
+            return None
+        try:
+            with open(self.plan, 'r') as fd:
+                state['batches'] = json.load(fd)
+        except (IOError, ValueError):
+            LOG.warning(_("Ignoring the migration checkpoint without a "
+                          "readable plan %s.") % self.plan)
+            return None
+        return state
+
+    def _start_checkpoint(self, state):
+        """Write the plan, then a checkpoint with no batch done."""
+        for path, content in ((self.plan, json.dumps(state['batches'])),
+                              (self.checkpoint, "%s\n" % json.dumps(
+                                  {'source': state['source'],
+                                   'volume': state['volume']}))):
+            tmp_path = "%s.tmp" % path
+            with open(tmp_path, 'w') as fd:
+                fd.write(content)
+            os.rename(tmp_path, path)
+
+    def _checkpoint_batch(self, index):
+        with open(self.checkpoint, 'a') as fd:
+            fd.write("%d\n" % index)
+
+    def _report(self, copied, total, rate):
+        LOG.info(_("Migrated %(copied)s of %(total)s bytes at %(rate)d "
+                   "bytes per second.") %
+                 {'copied': copied, 'total': total, 'rate': rate})
+        ctxt = context.TroveContext(user=CONF.nova_proxy_admin_user,
+                                    auth_token=CONF.nova_proxy_admin_pass)
+        payload = {'data_migration': {'copied': copied, 'total': total,
+                                      'rate': int(rate)}}
+        try:
+            conductor_api.API(ctxt).heartbeat(CONF.guest_id, payload,
+                                              sent=timeutils.float_utcnow())
+        except Exception:
+            LOG.exception(_("Error reporting the progress of the data "
+                            "migration."))
@@ -18,6 +18,7 @@
 
 import re
 from datetime import datetime
+from eventlet import greenpool
 from novaclient import exceptions as nova_exceptions
 from oslo.config.cfg import NoSuchOptError
 from trove.common import cfg
@@ -39,6 +40,7 @@ from trove.backup.models import Backup
 from trove.quota.quota import run_with_quotas
 from trove.instance.tasks import InstanceTask
 from trove.instance.tasks import InstanceTasks
+from trove.instance import server_cache
 from trove.taskmanager import api as task_api
 from trove.openstack.common import log as logging
 from trove.openstack.common.gettextutils import _
@@ -53,21 +55,24 @@ def filter_ips(ips, regex):
     return [ip for ip in ips if re.search(regex, ip)]
 
 
-def load_server(context, instance_id, server_id):
+def load_server(context, instance_id, server_id, use_cache=False):
     """
     Loads a server or raises an exception.
     :param context: request context used to access nova
     :param instance_id: the trove instance id corresponding to the nova server
     (informational only)
     :param server_id: the compute instance id which will be retrieved from nova
+    :param use_cache: allow the server to come from the server cache
     :type context: trove.common.context.TroveContext
     :type instance_id: unicode
     :type server_id: unicode
+    :type use_cache: bool
     :rtype: novaclient.v1_1.servers.Server
     """
     client = create_nova_client(context)
     try:
-        server = client.servers.get(server_id)
+        server = server_cache.get_server(client, server_id,
+                                         use_cache=use_cache)
     except nova_exceptions.NotFound:
         LOG.debug("Could not find nova server_id(%s)" % server_id)
         raise exception.ComputeInstanceNotFound(instance_id=instance_id,
@@ -101,7 +106,7 @@ def validate_volume_size(size):
         raise exception.VolumeQuotaExceeded(msg)
 
 
-def load_simple_instance_server_status(context, db_info):
+def load_simple_instance_server_status(context, db_info, use_cache=False):
     """Loads a server or raises an exception."""
     if 'BUILDING' == db_info.task_status.action:
         db_info.server_status = "BUILD"
@@ -109,7 +114,9 @@ def load_simple_instance_server_status(context, db_info):
     else:
         client = create_nova_client(context)
         try:
-            server = client.servers.get(db_info.compute_instance_id)
+            server = server_cache.get_server(client,
+                                             db_info.compute_instance_id,
+                                             use_cache=use_cache)
             db_info.server_status = server.status
             db_info.addresses = server.addresses
         except nova_exceptions.NotFound:
@@ -398,24 +405,28 @@ def load_any_instance(context, id):
     # Try to load an instance with a server.
     # If that fails, try to load it without the server.
     try:
-        return load_instance(BuiltInstance, context, id, needs_server=True)
+        return load_instance(BuiltInstance, context, id, needs_server=True,
+                             use_cache=True)
     except exception.UnprocessableEntity:
         LOG.warn("Could not load instance %s." % id)
-        return load_instance(FreshInstance, context, id, needs_server=False)
+        return load_instance(FreshInstance, context, id, needs_server=False,
+                             use_cache=True)
 
 
-def load_instance(cls, context, id, needs_server=False):
+def load_instance(cls, context, id, needs_server=False, use_cache=False):
     db_info = get_db_info(context, id)
     if not needs_server:
         # TODO(tim.simpson): When we have notifications this won't be
         # necessary and instead we'll just use the server_status field from
         # the instance table.
-        load_simple_instance_server_status(context, db_info)
+        load_simple_instance_server_status(context, db_info,
+                                           use_cache=use_cache)
         server = None
     else:
         try:
             server = load_server(context, db_info.id,
-                                 db_info.compute_instance_id)
+                                 db_info.compute_instance_id,
+                                 use_cache=use_cache)
             #TODO(tim.simpson): Remove this hack when we have notifications!
             db_info.server_status = server.status
             db_info.addresses = server.addresses
@@ -505,6 +516,7 @@ class BaseInstance(SimpleInstance):
             self.update_db(task_status=InstanceTasks.DELETING,
                            configuration_id=None)
             task_api.API(self.context).delete_instance(self.id)
+            server_cache.invalidate(self.db_info.compute_instance_id)
 
         deltas = {'instances': -1}
         if CONF.trove_volume_support:
@@ -742,6 +754,7 @@ class Instance(BuiltInstance):
         LOG.debug("Instance %s set to RESIZING." % self.id)
         task_api.API(self.context).resize_flavor(self.id, old_flavor,
                                                  new_flavor)
+        server_cache.invalidate(self.db_info.compute_instance_id)
 
     def resize_volume(self, new_size):
         def _resize_resources():
@@ -770,6 +783,7 @@ class Instance(BuiltInstance):
         LOG.info("Rebooting instance %s..." % self.id)
         self.update_db(task_status=InstanceTasks.REBOOTING)
         task_api.API(self.context).reboot(self.id)
+        server_cache.invalidate(self.db_info.compute_instance_id)
 
     def restart(self):
         self.validate_can_perform_action()
@@ -788,6 +802,7 @@ class Instance(BuiltInstance):
         LOG.info("Migrating instance id = %s, to host = %s" % (self.id, host))
         self.update_db(task_status=InstanceTasks.MIGRATING)
         task_api.API(self.context).migrate(self.id, host)
+        server_cache.invalidate(self.db_info.compute_instance_id)
 
     def validate_can_perform_action(self):
         """
@@ -863,22 +878,28 @@ class Instance(BuiltInstance):
 
 def create_server_list_matcher(server_list):
     # Returns a method which finds a server from the given list.
+    servers = {}
+    duplicates = set()
+    for server in server_list:
+        if server.id in servers:
+            duplicates.add(server.id)
+        servers[server.id] = server
+
     def find_server(instance_id, server_id):
-        matches = [server for server in server_list if server.id == server_id]
-        if len(matches) == 1:
-            return matches[0]
-        elif len(matches) < 1:
-            # The instance was not found in the list and
-            # this can happen if the instance is deleted from
-            # nova but still in trove database
-            raise exception.ComputeInstanceNotFound(
-                instance_id=instance_id, server_id=server_id)
-        else:
+        if server_id in duplicates:
             # Should never happen, but never say never.
             LOG.error(_("Server %(server)s for instance %(instance)s was"
                         "found twice!") % {'server': server_id,
                                            'instance': instance_id})
             raise exception.TroveError(uuid=instance_id)
+        try:
+            return servers[server_id]
+        except KeyError:
+            # The instance was not found in the list and
+            # this can happen if the instance is deleted from
+            # nova but still in trove database
+            raise exception.ComputeInstanceNotFound(
+                instance_id=instance_id, server_id=server_id)
 
     return find_server
 
@@ -894,8 +915,6 @@ class Instances(object):
 
         if context is None:
             raise TypeError("Argument context not defined.")
-        client = create_nova_client(context)
-        servers = client.servers.list()
 
         db_infos = DBInstance.find_all(tenant_id=context.tenant, deleted=False)
         limit = int(context.limit or Instances.DEFAULT_LIMIT)
@@ -906,45 +925,79 @@ class Instances(object):
                                                   marker=context.marker)
         next_marker = data_view.next_page_marker
 
+        servers = Instances._load_page_servers(context, data_view.collection)
         find_server = create_server_list_matcher(servers)
-        for db in db_infos:
-            LOG.debug("checking for db [id=%s, compute_instance_id=%s]" %
-                      (db.id, db.compute_instance_id))
         ret = Instances._load_servers_status(load_simple_instance, context,
                                              data_view.collection,
                                              find_server)
         return ret, next_marker
 
+    @staticmethod
+    def _load_page_servers(context, db_items):
+        """Load the nova servers of one page of instances.
+
+        Only the servers of the page are fetched, up to
+        server_load_concurrency at once, instead of listing every server of
+        the tenant. Servers that no longer exist are left out.
+        """
+        server_ids = [db.compute_instance_id for db in db_items
+                      if db.compute_instance_id and
+                      InstanceTasks.BUILDING != db.task_status]
+        if not server_ids:
+            return []
+        client = create_nova_client(context)
+
+        def _get_server(server_id):
+            try:
+                return server_cache.get_server(client, server_id), None
+            except nova_exceptions.NotFound:
+                return None, None
+            except Exception as e:
+                return None, e
+
+        servers = []
+        pool = greenpool.GreenPool(
+            max(1, min(CONF.server_load_concurrency, len(server_ids))))
+        for server, error in pool.imap(_get_server, server_ids):
+            if error is not None:
+                raise error
+            if server is not None:
+                servers.append(server)
+        return servers
+
     @staticmethod
     def _load_servers_status(load_instance, context, db_items, find_server):
         ret = []
+        # Look up the service status of every instance in a single query.
+        instance_ids = [db.id for db in db_items]
+        statuses = {}
+        if instance_ids:
+            query = InstanceServiceStatus.query().filter(
+                InstanceServiceStatus.instance_id.in_(instance_ids))
+            statuses = dict((status.instance_id, status)
+                            for status in query.all())
         for db in db_items:
             server = None
-            try:
-                #TODO(tim.simpson): Delete when we get notifications working!
-                if InstanceTasks.BUILDING == db.task_status:
-                    db.server_status = "BUILD"
-                else:
-                    try:
-                        server = find_server(db.id, db.compute_instance_id)
-                        db.server_status = server.status
-                    except exception.ComputeInstanceNotFound:
-                        db.server_status = "SHUTDOWN"  # Fake it...
-                #TODO(tim.simpson): End of hack.
-
-                #volumes = find_volumes(server.id)
-                datastore_status = InstanceServiceStatus.find_by(
-                    instance_id=db.id)
-                if not datastore_status.status:  # This should never happen.
-                    LOG.error(_("Server status could not be read for "
-                                "instance id(%s)") % db.id)
-                    continue
-                LOG.info(_("Server api_status(%s)") %
-                         datastore_status.status.api_status)
-            except exception.ModelNotFoundError:
+            #TODO(tim.simpson): Delete when we get notifications working!
+            if InstanceTasks.BUILDING == db.task_status:
+                db.server_status = "BUILD"
+            else:
+                try:
+                    server = find_server(db.id, db.compute_instance_id)
+                    db.server_status = server.status
+                except exception.ComputeInstanceNotFound:
+                    db.server_status = "SHUTDOWN"  # Fake it...
+            #TODO(tim.simpson): End of hack.
+
+            #volumes = find_volumes(server.id)
+            datastore_status = statuses.get(db.id)
+            # This should never happen.
+            if datastore_status is None or not datastore_status.status:
                 LOG.error(_("Server status could not be read for "
                             "instance id(%s)") % db.id)
                 continue
+            LOG.info(_("Server api_status(%s)") %
+                     datastore_status.status.api_status)
             ret.append(load_instance(context, db, datastore_status,
                                      server=server))
         return ret
@@ -0,0 +1,104 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Short lived cache of the state of nova servers.
+
+Instance show and list requests read servers through this cache so that
+clients polling the API do not turn every request into nova calls. The
+cache lives in memcached when memcached_servers is set, which lets all the
+API workers share it, and in the process otherwise.
+"""
+
+from trove.common import cfg
+from trove.openstack.common import jsonutils
+from trove.openstack.common import log as logging
+from trove.openstack.common import memorycache
+from trove.openstack.common.gettextutils import _
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+KEY_PREFIX = 'trove-server-'
+
+_CACHE = None
+
+
+def get_cache():
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = ServerCache(memorycache.get_client())
+    return _CACHE
+
+
+def invalidate(server_id):
+    """Forget the cached state of a server after acting on it."""
+    get_cache().invalidate(server_id)
+
+
+class ServerCache(object):
+    """Caches the nova representation of servers by compute instance id.
+
+    :param client: memcached compatible client
+    :param ttl: seconds a server stays cached, server_cache_ttl by default
+    """
+
+    def __init__(self, client, ttl=None):
+        self.client = client
+        self.ttl = CONF.server_cache_ttl if ttl is None else ttl
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _key(self, server_id):
+        return str(KEY_PREFIX + server_id)
+
+    def get(self, manager, server_id):
+        """Return the cached server or None.
+
+        :param manager: nova servers manager the server is bound to
+        """
+        if not self.enabled or not server_id:
+            return None
+        info = self.client.get(self._key(server_id))
+        if info is None:
+            return None
+        LOG.debug(_("Using cached state of server %s") % server_id)
+        return manager.resource_class(manager, jsonutils.loads(info),
+                                      loaded=True)
+
+    def set(self, server):
+        if self.enabled:
+            self.client.set(self._key(server.id),
+                            jsonutils.dumps(server._info), time=self.ttl)
+
+    def invalidate(self, server_id):
+        if server_id:
+            self.client.delete(self._key(server_id))
+
+
+def get_server(client, server_id, use_cache=True):
+    """Get a server from nova, or from the cache if it is fresh enough.
+
+    :param client: nova client
+    :param use_cache: read the server from the cache, it is stored in the
+    cache either way
+    """
+    cache = get_cache()
+    server = cache.get(client.servers, server_id) if use_cache else None
+    if server is None:
+        server = client.servers.get(server_id)
+        cache.set(server)
+    return server
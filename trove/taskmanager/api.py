@@ -95,6 +95,12 @@ class API(proxy.RpcProxy):
                                               backup_info=backup_info,
                                               instance_id=instance_id))
 
+    def update_host_guests(self, job_id):
+        LOG.debug("Making async call to update the guests of host job: %s"
+                  % job_id)
+        self.cast(self.context, self.make_msg("update_host_guests",
+                                              job_id=job_id))
+
     def delete_backup(self, backup_id):
         LOG.debug("Making async call to delete backup: %s" % backup_id)
         self.cast(self.context, self.make_msg("delete_backup",
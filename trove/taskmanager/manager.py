@@ -17,6 +17,7 @@ from trove.common.context import TroveContext
 import trove.extensions.mgmt.instances.models as mgmtmodels
 import trove.common.cfg as cfg
 from trove.common import exception
+from trove.extensions.account.models import AccountSummary
 from trove.openstack.common import log as logging
 from trove.openstack.common import importutils
 from trove.openstack.common import periodic_task
@@ -74,6 +75,9 @@ class Manager(periodic_task.PeriodicTasks):
     def delete_backup(self, context, backup_id):
         models.BackupTasks.delete_backup(context, backup_id)
 
+    def update_host_guests(self, context, job_id):
+        models.HostTasks.update_guests(context, job_id)
+
     def create_backup(self, context, backup_info, instance_id):
         instance_tasks = models.BuiltInstanceTasks.load(context, instance_id)
         instance_tasks.create_backup(backup_info)
@@ -108,3 +112,10 @@ class Manager(periodic_task.PeriodicTasks):
             """
             mgmtmodels.publish_exist_events(self.exists_transformer,
                                             self.admin_context)
+
+    if CONF.account_summary_refresh_ticks:
+        @periodic_task.periodic_task(
+            ticks_between_runs=CONF.account_summary_refresh_ticks)
+        def refresh_account_summaries(self, context):
+            """Recount the instances of every account."""
+            AccountSummary.refresh()
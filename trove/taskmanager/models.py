@@ -12,13 +12,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+import json
 import re
 import traceback
 import os.path
+import urllib
 
 from heatclient import exc as heat_exceptions
 from cinderclient import exceptions as cinder_exceptions
+from eventlet import greenpool
 from eventlet import greenthread
+from eventlet import queue
 from novaclient import exceptions as nova_exceptions
 from trove.backup import models as bkup_models
 from trove.common import cfg
@@ -37,6 +42,7 @@ from trove.common import instance as rd_instance
 from trove.common.remote import create_dns_client
 from trove.common.remote import create_heat_client
 from trove.common.remote import create_cinder_client
+from trove.extensions.mgmt.host.models import HostJob
 from trove.extensions.mysql import models as mysql_models
 from trove.configuration.models import Configuration
 from trove.extensions.security_group.models import SecurityGroup
@@ -49,10 +55,12 @@ from trove.instance.models import FreshInstance
 from trove.instance.tasks import InstanceTasks
 from trove.instance.models import InstanceStatus
 from trove.instance.models import InstanceServiceStatus
+from trove.instance import server_cache
 from trove.openstack.common import log as logging
 from trove.openstack.common.gettextutils import _
 from trove.openstack.common.notifier import api as notifier
 from trove.openstack.common import timeutils
+from trove.taskmanager import server_poller
 import trove.common.remote as remote
 
 LOG = logging.getLogger(__name__)
@@ -226,6 +234,11 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
                                'location': backup.location,
                                'type': backup.backup_type,
                                'checksum': backup.checksum,
+                               'parents': [
+                                   {'location': parent.location,
+                                    'checksum': parent.checksum}
+                                   for parent in bkup_models.Backup.
+                                   get_parents(self.context, backup)],
                                }
         self._guest_prepare(flavor['ram'], volume_info,
                             packages, databases, users, backup_info,
@@ -257,9 +270,13 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
         # fails to build properly.
         try:
             usage_timeout = CONF.get(datastore_manager).usage_timeout
-            utils.poll_until(self._service_is_active,
-                             sleep_time=USAGE_SLEEP_TIME,
-                             time_out=usage_timeout)
+            poller = server_poller.get_poller()
+            with poller.waiting(self.db_info.compute_instance_id):
+                utils.poll_until(self._service_is_active,
+                                 sleep_time=USAGE_SLEEP_TIME,
+                                 time_out=usage_timeout,
+                                 backoff=CONF.poll_backoff,
+                                 max_sleep_time=CONF.poll_max_sleep_time)
             self.send_usage_event('create', instance_size=flavor['ram'])
         except PollTimeOut:
             LOG.error(_("Timeout for service changing to active. "
@@ -320,7 +337,8 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
             raise TroveError(_("Service not active, status: %s") % status)
 
         c_id = self.db_info.compute_instance_id
-        nova_status = self.nova_client.servers.get(c_id).status
+        nova_status = server_poller.get_poller().get(self.nova_client,
+                                                     c_id).status
         if nova_status in [InstanceStatus.ERROR,
                            InstanceStatus.FAILED]:
             raise TroveError(_("Server not active, status: %s") % nova_status)
@@ -601,10 +619,6 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
         if dns_support:
             dns_client = create_dns_client(self.context)
 
-            def get_server():
-                c_id = self.db_info.compute_instance_id
-                return self.nova_client.servers.get(c_id)
-
             def ip_is_available(server):
                 LOG.info(_("Polling for ip addresses: $%s ") %
                          server.addresses)
@@ -621,10 +635,9 @@ class FreshInstanceTasks(FreshInstance, NotifyMixin, ConfigurationMixin):
                               {'instance': self.id, 'status': server.status})
                     raise TroveError(status=server.status)
 
-            utils.poll_until(get_server, ip_is_available,
-                             sleep_time=1, time_out=DNS_TIME_OUT)
-            server = self.nova_client.servers.get(
-                self.db_info.compute_instance_id)
+            server = server_poller.poll_server(
+                self.nova_client, self.db_info.compute_instance_id,
+                ip_is_available, sleep_time=1, time_out=DNS_TIME_OUT)
             self.db_info.addresses = server.addresses
             LOG.info(_("Creating dns entry..."))
             ip = self.dns_ip_address
@@ -709,6 +722,7 @@ class BuiltInstanceTasks(BuiltInstance, NotifyMixin, ConfigurationMixin):
         except Exception as ex:
             LOG.exception(_("Error during delete compute server %s")
                           % self.server.id)
+        server_cache.invalidate(server_id)
         try:
             dns_support = CONF.trove_dns_support
             LOG.debug(_("trove dns support = %s") % dns_support)
@@ -774,6 +788,7 @@ class BuiltInstanceTasks(BuiltInstance, NotifyMixin, ConfigurationMixin):
             self.guest.stop_db()
             LOG.debug(_("Rebooting instance %s") % self.id)
             self.server.reboot()
+            server_cache.invalidate(self.db_info.compute_instance_id)
 
             # Poll nova until instance is active
             reboot_time_out = CONF.reboot_time_out
@@ -913,6 +928,35 @@ class BuiltInstanceTasks(BuiltInstance, NotifyMixin, ConfigurationMixin):
         datastore_status.save()
 
 
+def _bulk_delete_request(client, body):
+    """Delete a list of swift objects with a single bulk-delete request.
+
+    Swift answers a bulk delete with 200 and reports the outcome in the
+    body, so a "Response Status" other than 2xx fails the request too.
+    """
+    if not client.url or not client.token:
+        client.url, client.token = client.get_auth()
+    parsed, conn = client.http_connection()
+    headers = {'X-Auth-Token': client.token,
+               'Content-Type': 'text/plain',
+               'Accept': 'application/json'}
+    conn.request('POST', '%s?bulk-delete' % parsed.path, body, headers)
+    resp = conn.getresponse()
+    resp_body = resp.read()
+    if resp.status < 200 or resp.status >= 300:
+        raise ClientException('Bulk delete failed', http_status=resp.status,
+                              http_reason=resp.reason,
+                              http_response_content=resp_body)
+    result = json.loads(resp_body)
+    status = result.get('Response Status', '')
+    if not status.startswith('2'):
+        raise ClientException('Bulk delete failed: %s' % status,
+                              http_status=resp.status,
+                              http_reason=resp.reason,
+                              http_response_content=resp_body)
+    return result
+
+
 class BackupTasks(object):
     @classmethod
     def _parse_manifest(cls, manifest):
@@ -938,20 +982,123 @@ class BackupTasks(object):
             # This is a manifest file, first delete all segments.
             LOG.info(_("Deleting files with prefix: %(cont)s/%(prefix)s") %
                      {'cont': cont, 'prefix': prefix})
-            # list files from container/prefix specified by manifest
-            headers, segments = client.get_container(cont, prefix=prefix)
+            # list all files from container/prefix specified by manifest
+            headers, segments = client.get_container(cont, prefix=prefix,
+                                                     full_listing=True)
             LOG.debug(headers)
-            for segment in segments:
-                name = segment.get('name')
-                if name:
-                    LOG.info(_("Deleting file: %(cont)s/%(name)s") %
-                             {'cont': cont, 'name': name})
-                    client.delete_object(cont, name)
+            names = [segment['name'] for segment in segments
+                     if segment.get('name')]
+            cls.delete_segments(context, client, cont, names)
         # Delete the manifest file
         LOG.info(_("Deleting file: %(cont)s/%(filename)s") %
                  {'cont': cont, 'filename': filename})
         client.delete_object(container, filename)
 
+    @classmethod
+    def delete_segments(cls, context, client, cont, names):
+        """Delete the segments of a backup.
+
+        Segments are deleted with swift bulk-delete requests when the
+        cluster supports them. Whatever is left is deleted by a pool of
+        concurrent requests.
+        """
+        LOG.info(_("Deleting %(count)s segments from %(cont)s") %
+                 {'count': len(names), 'cont': cont})
+        max_deletes = cls._bulk_delete_limit(client)
+        if max_deletes:
+            names = cls._bulk_delete(client, cont, names, max_deletes)
+        if names:
+            cls._delete_concurrently(context, client, cont, names)
+
+    @classmethod
+    def _bulk_delete_limit(cls, client):
+        """Return the number of objects per bulk-delete request.
+
+        Returns None if the swift cluster does not support bulk deletes.
+        """
+        try:
+            capabilities = client.get_capabilities()
+        except Exception as e:
+            LOG.debug(_("Unable to get swift capabilities: %s") % e)
+            return None
+        bulk_delete = capabilities.get('bulk_delete')
+        if not bulk_delete:
+            return None
+        return bulk_delete.get('max_deletes_per_request', 10000)
+
+    @classmethod
+    def _bulk_delete(cls, client, cont, names, max_deletes):
+        """Delete the segments with bulk-delete requests.
+
+        Returns the names of the segments that could not be deleted.
+        """
+        failed = []
+        deleted = 0
+        for start in range(0, len(names), max_deletes):
+            batch = names[start:start + max_deletes]
+            paths = [('/%s/%s' % (cont, name)).encode('utf-8')
+                     for name in batch]
+            body = '\n'.join(urllib.quote(path) for path in paths)
+            try:
+                result = _bulk_delete_request(client, body)
+            except ClientException as e:
+                LOG.warn(_("Bulk delete from %(cont)s failed: %(err)s") %
+                         {'cont': cont, 'err': e})
+                failed.extend(batch)
+                continue
+            # Errors are reported as [quoted path, status] pairs.
+            failed_paths = set(urllib.unquote(path).decode('utf-8')
+                               for path, status in result.get('Errors') or [])
+            batch_failed = [name for name in batch
+                            if '/%s/%s' % (cont, name) in failed_paths]
+            failed.extend(batch_failed)
+            deleted += len(batch) - len(batch_failed)
+            LOG.info(_("Deleted %(deleted)s of %(count)s segments from "
+                       "%(cont)s") % {'deleted': deleted,
+                                      'count': len(names), 'cont': cont})
+        return failed
+
+    @classmethod
+    def _delete_concurrently(cls, context, client, cont, names):
+        """Delete the segments with a pool of concurrent requests.
+
+        Each segment is retried up to backup_delete_retries times before
+        the last error is raised.
+        """
+        concurrency = max(1, min(CONF.backup_delete_concurrency, len(names)))
+        clients = remote.client_pool(
+            client, concurrency,
+            functools.partial(remote.create_swift_client, context))
+        pool = greenpool.GreenPool(concurrency)
+        errors = []
+
+        def _delete(name):
+            swift_client = clients.get()
+            try:
+                for attempt in range(CONF.backup_delete_retries + 1):
+                    try:
+                        swift_client.delete_object(cont, name)
+                        return
+                    except Exception as e:
+                        if getattr(e, 'http_status', None) == 404:
+                            # Already deleted
+                            return
+                        LOG.warn(_("Error deleting %(cont)s/%(name)s "
+                                   "(attempt %(attempt)s): %(err)s") %
+                                 {'cont': cont, 'name': name,
+                                  'attempt': attempt + 1, 'err': e})
+                errors.append(e)
+            finally:
+                clients.put(swift_client)
+
+        for count, result in enumerate(pool.imap(_delete, names), 1):
+            if count % 100 == 0 or count == len(names):
+                LOG.info(_("Deleted %(deleted)s of %(count)s segments from "
+                           "%(cont)s") % {'deleted': count,
+                                          'count': len(names), 'cont': cont})
+        if errors:
+            raise errors[0]
+
     @classmethod
     def delete_backup(cls, context, backup_id):
         #delete backup from swift
@@ -976,6 +1123,59 @@ class BackupTasks(object):
             backup.delete()
 
 
+class HostTasks(object):
+
+    @classmethod
+    def update_guests(cls, context, job_id):
+        """Update the guests of all the instances of a host job.
+
+        Up to host_update_concurrency guests are updated at once and the
+        progress of the job is saved as each of them finishes.
+        """
+        job = HostJob.find_by(id=job_id)
+        instances = job.instances
+        pending = [instance for instance in instances
+                   if instance['status'] == HostJob.INSTANCE_PENDING]
+        LOG.info(_("Updating %(count)s guests on host %(host)s") %
+                 {'count': len(pending), 'host': job.host})
+        job.save_progress(instances, state=HostJob.RUNNING)
+
+        concurrency = max(1, min(CONF.host_update_concurrency, len(pending)))
+        pool = greenpool.GreenPool(concurrency)
+        results = queue.LightQueue()
+
+        def _update(instance):
+            try:
+                remote.create_guest_client(context,
+                                           instance['id']).update_guest()
+                results.put((instance, None))
+            except Exception as e:
+                LOG.error(_("Unable to update instance %(id)s: %(err)s") %
+                          {'id': instance['id'], 'err': e})
+                results.put((instance, e))
+
+        def _spawn_all():
+            for instance in pending:
+                pool.spawn_n(_update, instance)
+
+        greenthread.spawn_n(_spawn_all)
+        failed = False
+        for _count in range(len(pending)):
+            instance, error = results.get()
+            if error is None:
+                instance['status'] = HostJob.INSTANCE_UPDATED
+            else:
+                instance['status'] = HostJob.INSTANCE_FAILED
+                instance['error'] = str(error)
+                failed = True
+            job.save_progress(instances)
+
+        job.save_progress(instances, state=(HostJob.FAILED if failed
+                                            else HostJob.COMPLETED))
+        LOG.info(_("Finished updating the guests on host %(host)s: "
+                   "%(state)s") % {'host': job.host, 'state': job.state})
+
+
 class ResizeVolumeAction(ConfigurationMixin):
     """Performs volume resize action."""
 
@@ -1053,7 +1253,9 @@ class ResizeVolumeAction(ConfigurationMixin):
             return volume.status == 'available'
         utils.poll_until(volume_available,
                          sleep_time=2,
-                         time_out=CONF.volume_time_out)
+                         time_out=CONF.volume_time_out,
+                         backoff=CONF.poll_backoff,
+                         max_sleep_time=CONF.poll_max_sleep_time)
 
         LOG.debug(_("Successfully detached volume %(vol_id)s from instance "
                     "%(id)s") % {'vol_id': self.instance.volume_id,
@@ -1074,7 +1276,9 @@ class ResizeVolumeAction(ConfigurationMixin):
             return volume.status == 'in-use'
         utils.poll_until(volume_in_use,
                          sleep_time=2,
-                         time_out=CONF.volume_time_out)
+                         time_out=CONF.volume_time_out,
+                         backoff=CONF.poll_backoff,
+                         max_sleep_time=CONF.poll_max_sleep_time)
 
         LOG.debug(_("Successfully attached volume %(vol_id)s to instance "
                   "%(id)s") % {'vol_id': self.instance.volume_id,
@@ -1128,7 +1332,9 @@ class ResizeVolumeAction(ConfigurationMixin):
                 return volume.size == self.new_size
             utils.poll_until(volume_is_new_size,
                              sleep_time=2,
-                             time_out=CONF.volume_time_out)
+                             time_out=CONF.volume_time_out,
+                             backoff=CONF.poll_backoff,
+                             max_sleep_time=CONF.poll_max_sleep_time)
 
             self.instance.update_db(volume_size=self.new_size)
         except PollTimeOut:
@@ -1300,6 +1506,7 @@ class ResizeActionBase(ConfigurationMixin):
         try:
             LOG.debug(_("Initiating nova action"))
             self._initiate_nova_action()
+            server_cache.invalidate(self.instance.db_info.compute_instance_id)
             LOG.debug(_("Waiting for nova action"))
             self._wait_for_nova_action()
             LOG.debug(_("Asserting nova status is ok"))
@@ -1328,8 +1535,10 @@ class ResizeActionBase(ConfigurationMixin):
                             "Nova server status is not ACTIVE"))
 
             LOG.error(_("Error resizing instance %s.") % self.instance.id)
+            server_cache.invalidate(self.instance.db_info.compute_instance_id)
             raise ex
 
+        server_cache.invalidate(self.instance.db_info.compute_instance_id)
         LOG.debug(_("Recording success"))
         self._record_action_success()
         LOG.debug(_("end resize method _perform_nova_action instance: %s") %
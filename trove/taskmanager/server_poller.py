@@ -0,0 +1,180 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Shared lookups of the servers the builds of a task manager wait on.
+
+Every build polls nova for its server until the server, and then the guest,
+is up. When many builds wait at once a single listing of all the servers
+serves them all, rather than one servers.get per build and check.
+"""
+
+import contextlib
+import datetime
+import time
+
+from eventlet import event
+
+from trove.common import cfg
+from trove.common import remote
+from trove.common import utils
+from trove.common.context import TroveContext
+from trove.openstack.common import log as logging
+from trove.openstack.common.gettextutils import _
+from trove.openstack.common import timeutils
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+# Servers that changed up to this many seconds before the last listing are
+# listed again, in case the clocks of nova and the task manager differ.
+CHANGES_SINCE_MARGIN = 60
+
+_POLLER = None
+
+
+def get_poller():
+    global _POLLER
+    if _POLLER is None:
+        _POLLER = ServerPoller(TroveContext(
+            user=CONF.nova_proxy_admin_user,
+            auth_token=CONF.nova_proxy_admin_pass,
+            tenant=CONF.nova_proxy_admin_tenant_name))
+    return _POLLER
+
+
+def poll_server(client, server_id, condition, sleep_time=1, time_out=None):
+    """Get a server until it passes condition, then return it.
+
+    The checks back off by poll_backoff up to poll_max_sleep_time.
+    """
+    poller = get_poller()
+    with poller.waiting(server_id):
+        return utils.poll_until(lambda: poller.get(client, server_id),
+                                condition, sleep_time=sleep_time,
+                                time_out=time_out, backoff=CONF.poll_backoff,
+                                max_sleep_time=CONF.poll_max_sleep_time)
+
+
+class ServerPoller(object):
+    """Looks up the servers of the builds waiting in this task manager.
+
+    While fewer than server_list_threshold builds wait, each lookup is a
+    servers.get. From then on a listing of the servers, at most
+    server_list_max_age seconds old, serves the lookups and only one
+    listing is made at a time. Servers missing from the listing, such as
+    the ones created after it, are still got one by one.
+
+    Each listing only asks nova for the servers that changed since the
+    previous one, or since the builds started waiting, and keeps the
+    servers of the waiting builds it found before.
+
+    :param context: admin context the servers are listed with
+    """
+
+    def __init__(self, context):
+        self.context = context
+        # (server id, time the build started waiting) of the waiting builds
+        self._waiting = []
+        self._servers = {}
+        self._listed_at = None
+        # Start of the last listing that succeeded
+        self._synced_at = None
+        self._listing = None
+
+    @contextlib.contextmanager
+    def waiting(self, server_id):
+        """Count a build as waiting on its server while in the block."""
+        build = (server_id, time.time())
+        self._waiting.append(build)
+        try:
+            yield
+        finally:
+            self._waiting.remove(build)
+
+    def get(self, client, server_id):
+        """Get a server.
+
+        :param client: nova client of the build, used for the servers that
+        are got one by one
+        """
+        if len(self._waiting) >= CONF.server_list_threshold:
+            server = self._listed_servers().get(server_id)
+            if server is not None:
+                return server
+        return client.servers.get(server_id)
+
+    def _listed_servers(self):
+        if self._listing is not None:
+            # Another build is listing the servers already.
+            return self._listing.wait()
+        if (self._listed_at is not None and
+                time.time() - self._listed_at < CONF.server_list_max_age):
+            return self._servers
+        self._listing = event.Event()
+        try:
+            self._servers = self._list_servers()
+        finally:
+            self._listed_at = time.time()
+            listing, self._listing = self._listing, None
+            listing.send(self._servers)
+        return self._servers
+
+    def _list_servers(self):
+        started = time.time()
+        waiting = dict(self._waiting)
+        if not waiting:
+            return {}
+        since = min(waiting.values())
+        if self._synced_at is not None:
+            since = max(since, self._synced_at)
+        search_opts = {'all_tenants': 1,
+                       'changes-since': timeutils.isotime(
+                           datetime.datetime.utcfromtimestamp(
+                               since - CHANGES_SINCE_MARGIN))}
+        try:
+            client = remote.create_admin_nova_client(self.context)
+            listed = self._list_pages(client, search_opts)
+        except Exception:
+            LOG.exception(_("Error listing the servers, getting them one by "
+                            "one instead."))
+            self._synced_at = None
+            return {}
+        self._synced_at = started
+        LOG.debug(_("Listed %(listed)s changed servers for %(waiting)s "
+                    "waiting builds.") % {'listed': len(listed),
+                                          'waiting': len(waiting)})
+        servers = dict((server_id, server)
+                       for server_id, server in self._servers.items()
+                       if server_id in waiting)
+        servers.update((server.id, server) for server in listed
+                       if server.id in waiting)
+        return servers
+
+    def _list_pages(self, client, search_opts):
+        """List the servers page after page.
+
+        Nova returns at most osapi_max_limit servers per request, so the
+        listing goes on from the last server of each page until a page
+        comes back empty.
+        """
+        servers = []
+        marker = None
+        while True:
+            page = client.servers.list(search_opts=search_opts,
+                                       marker=marker)
+            if not page:
+                return servers
+            servers.extend(page)
+            marker = page[-1].id
@@ -332,7 +332,7 @@ class FakeServers(object):
                 for volume in self.get(server_id).volumes
                 if volume.mapping is not None]
 
-    def list(self):
+    def list(self, search_opts=None):
         return [v for (k, v) in self.db.items() if self.can_see(v.id)]
 
     def schedule_delete(self, id, time_from_now):
@@ -29,6 +29,7 @@ from trove.common.limits import Limit
 from trove.limits import views
 from trove.limits.service import LimitsController
 from trove.openstack.common import jsonutils
+from trove.openstack.common import memorycache
 from trove.quota.quota import QUOTAS
 
 TEST_LIMITS = [
@@ -204,6 +205,10 @@ class LimitMiddlewareTest(BaseLimitTestSuite):
         # Test that middleware selected correct limiter class.
         assert isinstance(self.app._limiter, TestLimiter)
 
+    def test_default_limit_class(self):
+        app = limits.RateLimitingMiddleware(self._empty_app)
+        self.assertTrue(isinstance(app._limiter, limits.BucketLimiter))
+
     def test_good_request(self):
         # Test successful GET request through middleware.
         request = webob.Request.blank("/")
@@ -482,6 +487,103 @@ class LimiterTest(BaseLimitTestSuite):
         self.assertEqual(expected, results)
 
 
+class BucketLimiterTest(BaseLimitTestSuite):
+    """
+    Tests for the `limits.BucketLimiter` class.
+    """
+
+    def setUp(self):
+        super(BucketLimiterTest, self).setUp()
+        userlimits = {'user:user3': ''}
+        self.limiter = limits.BucketLimiter(TEST_LIMITS, **userlimits)
+        self.set_time(0.0)
+
+    def set_time(self, now, limiter=None):
+        (limiter or self.limiter)._get_time = Mock(return_value=now)
+
+    def _check(self, num, verb, url, username=None, limiter=None):
+        limiter = limiter or self.limiter
+        return [limiter.check_for_delay(verb, url, username)[0]
+                for x in xrange(num)]
+
+    def test_no_delay_GET(self):
+        delay = self.limiter.check_for_delay("GET", "/anything")
+        self.assertEqual(delay, (None, None))
+
+    def test_delay_PUT(self):
+        expected = [None] * 10 + [6.0]
+        self.assertEqual(expected, self._check(11, "PUT", "/anything"))
+
+    def test_delay_POST(self):
+        self.assertEqual([None] * 7, self._check(7, "POST", "/anything"))
+        self.assertAlmostEqual(60.0 / 7.0,
+                               self._check(1, "POST", "/anything")[0], 8)
+
+    def test_delay_POST_mgmt(self):
+        self.assertEqual([None] * 3, self._check(3, "POST", "/mgmt"))
+        self.assertAlmostEqual(60.0 / 3.0,
+                               self._check(1, "POST", "/mgmt")[0], 4)
+
+    def test_delay_GET_other_url(self):
+        self.assertEqual([None] * 11, self._check(11, "GET", "/mgmt"))
+
+    def test_multiple_delays(self):
+        expected = [None] * 10 + [6.0] * 10
+        self.assertEqual(expected, self._check(20, "PUT", "/anything"))
+
+        self.set_time(1.0)
+        self.assertEqual([5.0] * 10, self._check(10, "PUT", "/anything"))
+
+    def test_delay_PUT_wait(self):
+        expected = [None] * 10 + [6.0]
+        self.assertEqual(expected, self._check(11, "PUT", "/anything"))
+
+        self.set_time(6.0)
+        self.assertEqual([None, 6.0], self._check(2, "PUT", "/anything"))
+
+    def test_multiple_users(self):
+        expected = [None] * 10 + [6.0] * 10
+        self.assertEqual(expected,
+                         self._check(20, "PUT", "/anything", "user1"))
+        expected = [None] * 10 + [6.0] * 5
+        self.assertEqual(expected,
+                         self._check(15, "PUT", "/anything", "user2"))
+        self.assertEqual([None] * 20,
+                         self._check(20, "PUT", "/anything", "user3"))
+
+    def test_idle_buckets_are_swept(self):
+        self._check(2, "PUT", "/anything", "user1")
+        self.assertEqual(1, len(self.limiter.buckets))
+
+        self.set_time(limits.BucketLimiter.SWEEP_INTERVAL)
+        self._check(1, "GET", "/anything", "user2")
+        self.assertEqual({}, self.limiter.buckets)
+
+    def test_get_limits(self):
+        self._check(4, "PUT", "/anything")
+        put = self.limiter.get_limits()[3]
+        self.assertEqual("PUT", put['verb'])
+        self.assertEqual(6, put['remaining'])
+        self.assertEqual(0, put['resetTime'])
+
+        self._check(7, "PUT", "/anything")
+        put = self.limiter.get_limits()[3]
+        self.assertEqual(0, put['remaining'])
+        self.assertEqual(6, put['resetTime'])
+
+    def test_shared_budget(self):
+        client = memorycache.Client()
+        other = limits.BucketLimiter(TEST_LIMITS, client=client)
+        self.limiter = limits.BucketLimiter(TEST_LIMITS, client=client)
+        self.set_time(0.0)
+        self.set_time(0.0, other)
+
+        self.assertEqual([None] * 5, self._check(5, "PUT", "/anything"))
+        self.assertEqual([None] * 5 + [6.0],
+                         self._check(6, "PUT", "/anything", limiter=other))
+        self.assertEqual({}, self.limiter.buckets)
+
+
 class WsgiLimiterTest(BaseLimitTestSuite):
     """
     Tests for `limits.WsgiLimiter` class.
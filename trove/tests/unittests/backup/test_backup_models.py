@@ -14,9 +14,11 @@
 
 import datetime
 from mock import MagicMock, patch
+from sqlalchemy import desc
 import testtools
 
 from trove.backup import models
+from trove.backup import views
 from trove.common import context
 from trove.common import exception
 from trove.common import utils
@@ -84,6 +86,8 @@ class BackupCreateTest(testtools.TestCase):
     def test_create_incremental(self):
         instance = MagicMock()
         parent = MagicMock(spec=models.DBBackup)
+        parent.root_id = 'root_uuid'
+        parent.depth = 1
         with patch.object(instance_models.BuiltInstance, 'load',
                           return_value=instance):
             instance.validate_can_perform_action = MagicMock(
@@ -118,6 +122,9 @@ class BackupCreateTest(testtools.TestCase):
                                          db_record['state'])
                         self.assertEqual('parent_uuid',
                                          db_record['parent_id'])
+                        self.assertEqual('root_uuid',
+                                         db_record['root_id'])
+                        self.assertEqual(2, db_record['depth'])
 
     def test_create_instance_not_found(self):
         self.assertRaises(exception.NotFound, models.Backup.create,
@@ -196,6 +203,7 @@ class BackupDeleteTest(testtools.TestCase):
 
     def test_delete_backup_is_running(self):
         backup = MagicMock()
+        backup.root_id = 'backup_id'
         backup.is_running = True
         with patch.object(models.Backup, 'get_by_id', return_value=backup):
             self.assertRaises(exception.UnprocessableEntity,
@@ -203,6 +211,7 @@ class BackupDeleteTest(testtools.TestCase):
 
     def test_delete_backup_swift_token_invalid(self):
         backup = MagicMock()
+        backup.root_id = 'backup_id'
         backup.is_running = False
         with patch.object(models.Backup, 'get_by_id', return_value=backup):
             with patch.object(models.Backup, 'verify_swift_auth_token',
@@ -298,6 +307,83 @@ class BackupORMTest(testtools.TestCase):
         self.backup.delete()
         self.assertFalse(models.Backup.running(self.instance_id))
 
+    def _create_child(self, parent):
+        return models.DBBackup.create(tenant_id=self.context.tenant,
+                                      name=BACKUP_NAME_2,
+                                      state=BACKUP_STATE,
+                                      instance_id=self.instance_id,
+                                      parent_id=parent.id,
+                                      root_id=parent.root_id,
+                                      depth=parent.depth + 1,
+                                      deleted=False)
+
+    def _create_chain(self):
+        self.backup.root_id = self.backup.id
+        self.backup.depth = 0
+        self.backup.save()
+        child = self._create_child(self.backup)
+        grandchild = self._create_child(child)
+        sibling = self._create_child(self.backup)
+        self.addCleanup(child.delete)
+        self.addCleanup(grandchild.delete)
+        self.addCleanup(sibling.delete)
+        return child, grandchild, sibling
+
+    def test_get_parents(self):
+        child, grandchild, sibling = self._create_chain()
+        parents = models.Backup.get_parents(self.context, grandchild)
+        self.assertEqual([self.backup.id, child.id],
+                         [parent.id for parent in parents])
+        self.assertEqual([], models.Backup.get_parents(self.context,
+                                                       self.backup))
+
+    def test_get_descendants(self):
+        child, grandchild, sibling = self._create_chain()
+        descendants = models.Backup.get_descendants(self.context, child)
+        self.assertEqual([grandchild.id],
+                         [descendant.id for descendant in descendants])
+        descendants = models.Backup.get_descendants(self.context,
+                                                    self.backup)
+        self.assertEqual(grandchild.id, descendants[0].id)
+        self.assertEqual(set([child.id, sibling.id]),
+                         set(descendant.id for descendant in descendants[1:]))
+
+    def test_delete_chain(self):
+        child, grandchild, sibling = self._create_chain()
+        with patch.object(models.Backup, '_delete') as delete:
+            models.Backup.delete(self.context, child.id)
+        self.assertEqual([grandchild.id, child.id],
+                         [call[0][1] for call in delete.call_args_list])
+
+    def test_list_chain(self):
+        child, grandchild, sibling = self._create_chain()
+        backups, marker = models.Backup.list(self.context,
+                                             chain=self.backup.id)
+        self.assertIsNone(marker)
+        self.assertEqual(set([self.backup.id, child.id, grandchild.id,
+                              sibling.id]),
+                         set(backup.id for backup in backups))
+        backups, marker = models.Backup.list(self.context, chain=child.id)
+        self.assertEqual([], backups)
+
+    def test_view_chain(self):
+        child, grandchild, sibling = self._create_chain()
+        child.size = 0.5
+        child.chain_size = 2.5
+        data = views.BackupView(child).data()['backup']
+        self.assertEqual(self.backup.id, data['root_id'])
+        self.assertEqual(1, data['depth'])
+        self.assertEqual(2.5, data['chain_size'])
+
+    def test_update_chain_size(self):
+        child, grandchild, sibling = self._create_chain()
+        self.backup.size = 2.0
+        self.backup.update_chain_size()
+        self.backup.save()
+        child.size = 0.5
+        child.update_chain_size()
+        self.assertEqual(2.5, child.chain_size)
+
     def test_filename(self):
         self.assertEqual(BACKUP_FILENAME, self.backup.filename)
 
@@ -325,40 +411,76 @@ class PaginationTests(testtools.TestCase):
         query = models.DBBackup.query()
         query.filter_by(instance_id=self.instance_id).delete()
 
+    def _backup_ids(self, backups):
+        return [backup.id for backup in backups]
+
     def test_pagination_list(self):
+        expected = self._backup_ids(
+            models.DBBackup.query().filter_by(tenant_id=self.context.tenant)
+            .order_by(desc(models.DBBackup.updated),
+                      desc(models.DBBackup.id)).all())
         # page one
         backups, marker = models.Backup.list(self.context)
-        self.assertEqual(20, marker)
-        self.assertEqual(20, len(backups))
+        self.assertIsNotNone(marker)
+        self.assertEqual(expected[:20], self._backup_ids(backups))
         # page two
-        self.context.marker = 20
+        self.context.marker = marker
         backups, marker = models.Backup.list(self.context)
-        self.assertEqual(40, marker)
-        self.assertEqual(20, len(backups))
+        self.assertIsNotNone(marker)
+        self.assertEqual(expected[20:40], self._backup_ids(backups))
         # page three
-        self.context.marker = 40
+        self.context.marker = marker
         backups, marker = models.Backup.list(self.context)
         self.assertIsNone(marker)
-        self.assertEqual(10, len(backups))
+        self.assertEqual(expected[40:], self._backup_ids(backups))
 
     def test_pagination_list_for_instance(self):
         # page one
         backups, marker = models.Backup.list_for_instance(self.context,
                                                           self.instance_id)
-        self.assertEqual(20, marker)
         self.assertEqual(20, len(backups))
         # page two
-        self.context.marker = 20
-        backups, marker = models.Backup.list(self.context)
-        self.assertEqual(40, marker)
+        self.context.marker = marker
+        backups, marker = models.Backup.list_for_instance(self.context,
+                                                          self.instance_id)
         self.assertEqual(20, len(backups))
         # page three
-        self.context.marker = 40
+        self.context.marker = marker
         backups, marker = models.Backup.list_for_instance(self.context,
                                                           self.instance_id)
         self.assertIsNone(marker)
         self.assertEqual(10, len(backups))
 
+    def test_pagination_new_backups(self):
+        backups, marker = models.Backup.list(self.context)
+        models.DBBackup.create(tenant_id=self.context.tenant,
+                               state=BACKUP_STATE,
+                               instance_id=self.instance_id,
+                               name='Backup-new', deleted=False)
+
+        # A backup made meanwhile does not shift the next pages.
+        self.context.marker = marker
+        next_page, marker = models.Backup.list(self.context)
+
+        self.assertEqual(20, len(next_page))
+        self.assertEqual(set(), set(self._backup_ids(backups)) &
+                         set(self._backup_ids(next_page)))
+
+    def test_pagination_offset_marker(self):
+        expected, _marker = models.Backup.list(self.context)
+
+        self.context.marker = '10'
+        backups, marker = models.Backup.list(self.context)
+
+        self.assertEqual(self._backup_ids(expected)[10:],
+                         self._backup_ids(backups)[:10])
+
+    def test_pagination_invalid_marker(self):
+        self.context.marker = 'not-a-marker'
+
+        self.assertRaises(exception.BadRequest, models.Backup.list,
+                          self.context)
+
 
 class OrderingTests(testtools.TestCase):
 
@@ -15,6 +15,7 @@
 import testtools
 from mock import Mock, MagicMock, patch
 import hashlib
+from swiftclient import client as swift_exceptions
 
 from trove.common.context import TroveContext
 from trove.tests.fakes.swift import FakeSwiftConnection
@@ -129,6 +130,78 @@ class SwiftStorageSaveChecksumTests(testtools.TestCase):
                          "Incorrect swift location was returned.")
 
 
+class MockSegmentedStream(object):
+    """Stream that hands out data in small reads."""
+
+    def __init__(self, data, read_size=64):
+        self.data = data
+        self.read_size = read_size
+        self.offset = 0
+
+    def read(self, chunk_size):
+        chunk = self.data[self.offset:self.offset + self.read_size]
+        self.offset += len(chunk)
+        return chunk
+
+
+class SwiftStorageConcurrentSaveTests(testtools.TestCase):
+    """SwiftStorage.save uploading several segments at the same time"""
+
+    def setUp(self):
+        super(SwiftStorageConcurrentSaveTests, self).setUp()
+        self.swift_client = FakeSwiftConnection()
+        self.data = ''.join(chr(65 + i % 26) for i in range(1100))
+        concurrency_patch = patch.object(swift, 'UPLOAD_CONCURRENCY', 3)
+        concurrency_patch.start()
+        self.addCleanup(concurrency_patch.stop)
+        # Segments of 128 bytes, so the stream spans several segments
+        reader_patch = patch.object(
+            swift, 'StreamReader',
+            side_effect=lambda stream, filename: StreamReader(
+                stream, filename, max_file_size=swift.CHUNK_SIZE + 100))
+        reader_patch.start()
+        self.addCleanup(reader_patch.stop)
+
+    def _save(self, backup_id):
+        with patch.object(swift, 'create_swift_client',
+                          return_value=self.swift_client):
+            storage_strategy = SwiftStorage(TroveContext())
+            return storage_strategy.save('%s.gz.enc' % backup_id,
+                                         MockSegmentedStream(self.data))
+
+    def test_concurrent_save(self):
+        success, note, checksum, location = self._save('123')
+
+        self.assertTrue(success, "The backup should have been successful.")
+        self.assertEqual('http://mockswift/v1/database_backups/123.gz.enc',
+                         location)
+        segments = sorted(self.swift_client.container_objects)
+        self.assertEqual(9, len(segments))
+        self.assertEqual('123_00000000', segments[0])
+        self.assertEqual(self.data,
+                         ''.join(self.swift_client.container_objects[name]
+                                 for name in segments))
+        expected = hashlib.md5()
+        for name in segments:
+            expected.update(hashlib.md5(
+                self.swift_client.container_objects[name]).hexdigest())
+        self.assertEqual(expected.hexdigest(), checksum)
+
+    def test_concurrent_save_segment_etag_mismatch(self):
+        success, note, checksum, location = self._save('bad_segment_etag_1')
+
+        self.assertFalse(success, "The backup should have failed!")
+        self.assertTrue(note.startswith("Error saving data to Swift!"))
+        self.assertIsNone(checksum)
+
+    def test_concurrent_save_upload_error(self):
+        self.swift_client.put_object = Mock(
+            side_effect=swift_exceptions.ClientException('PUT failed'))
+
+        self.assertRaises(swift_exceptions.ClientException,
+                          self._save, '123')
+
+
 class SwiftStorageUtils(testtools.TestCase):
 
     def setUp(self):
@@ -208,6 +281,78 @@ class SwiftStorageLoad(testtools.TestCase):
                           backup_checksum)
 
 
+class FakeSegmentedSwiftConnection(FakeSwiftConnection):
+    """Serve the stored segments back through a DLO manifest."""
+
+    def head_object(self, container, name):
+        headers = super(FakeSegmentedSwiftConnection, self).head_object(
+            container, name)
+        if self.manifest_name == name:
+            headers['x-object-manifest'] = self.manifest_prefix
+        return headers
+
+    def get_container(self, container, prefix='', **kwargs):
+        prefix = prefix.split('/')[-1]
+        return None, [{'name': name,
+                       'hash': hashlib.md5(contents).hexdigest()}
+                      for name, contents in
+                      sorted(self.container_objects.iteritems())
+                      if name.startswith(prefix)]
+
+    def get_object(self, container, name, resp_chunk_size=None):
+        contents = self.container_objects[name]
+        return ({'etag': '"%s"' % hashlib.md5(contents).hexdigest()},
+                iter([contents[i:i + resp_chunk_size]
+                      for i in range(0, len(contents), resp_chunk_size)]))
+
+
+class SwiftStorageConcurrentLoadTests(testtools.TestCase):
+    """SwiftStorage.load downloading several segments at the same time"""
+
+    def setUp(self):
+        super(SwiftStorageConcurrentLoadTests, self).setUp()
+        self.swift_client = FakeSegmentedSwiftConnection()
+        self.data = ''.join(chr(65 + i % 26) for i in range(1100))
+        self.swift_client.manifest_prefix = 'database_backups/123_'
+        self.swift_client.manifest_name = '123.gz.enc'
+        for number, offset in enumerate(range(0, len(self.data), 128)):
+            name = '123_%08d' % number
+            self.swift_client.container_objects[name] = (
+                self.data[offset:offset + 128])
+        self.location = 'http://mockswift/v1/database_backups/123.gz.enc'
+        self.checksum = self.swift_client.head_object(
+            'database_backups', '123.gz.enc')['etag'].strip('"')
+        concurrency_patch = patch.object(swift, 'DOWNLOAD_CONCURRENCY', 3)
+        concurrency_patch.start()
+        self.addCleanup(concurrency_patch.stop)
+
+    def _load(self, checksum):
+        with patch.object(swift, 'create_swift_client',
+                          return_value=self.swift_client):
+            storage_strategy = SwiftStorage(TroveContext())
+            return ''.join(storage_strategy.load(self.location, checksum))
+
+    def test_concurrent_load(self):
+        self.assertEqual(self.data, self._load(self.checksum))
+
+    def test_concurrent_load_checksum_mismatch(self):
+        self.assertRaises(SwiftDownloadIntegrityError,
+                          self._load, 'not-the-manifest-checksum')
+
+    def test_concurrent_load_segment_checksum_mismatch(self):
+        self.swift_client.container_objects['123_00000004'] = 'corrupt'
+        _headers, segments = self.swift_client.get_container(
+            'database_backups', prefix='database_backups/123_')
+        segments[4]['hash'] = hashlib.md5('original').hexdigest()
+        with patch.object(self.swift_client, 'get_container',
+                          return_value=(None, segments)):
+            # The manifest checksum still matches, only the segment is bad
+            checksum = self.swift_client.head_object(
+                'database_backups', '123.gz.enc')['etag'].strip('"')
+            self.assertRaises(SwiftDownloadIntegrityError,
+                              self._load, checksum)
+
+
 class MockBackupStream(MockBackupRunner):
 
     def read(self, chunk_size):
@@ -0,0 +1,39 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sys
+
+from mock import patch
+from testtools import TestCase
+from trove.openstack.common import memorycache
+
+
+class GetClientTest(TestCase):
+
+    def test_local_cache(self):
+        with patch.object(memorycache.LOG, 'warning') as warning:
+            client = memorycache.get_client()
+
+        self.assertIsInstance(client, memorycache.Client)
+        self.assertFalse(warning.called)
+
+    def test_memcache_missing(self):
+        # A None entry makes the import of the module fail.
+        with patch.dict(sys.modules, {'memcache': None}):
+            with patch.object(memorycache.LOG, 'warning') as warning:
+                client = memorycache.get_client(['127.0.0.1:11211'])
+
+        self.assertIsInstance(client, memorycache.Client)
+        self.assertEqual(1, warning.call_count)
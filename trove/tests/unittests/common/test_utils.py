@@ -0,0 +1,68 @@
+#    Copyright 2014 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import MagicMock
+from mock import patch
+from testtools import TestCase
+
+from trove.common import exception
+from trove.common import utils
+
+
+class PollUntilBackoffTest(TestCase):
+
+    def setUp(self):
+        super(PollUntilBackoffTest, self).setUp()
+        self.slept = []
+        self.now = [1000.0]
+
+        def _sleep(seconds):
+            self.slept.append(seconds)
+            self.now[0] += seconds
+
+        for target, name, side_effect in (
+                (utils.greenthread, 'sleep', _sleep),
+                (utils.time, 'time', lambda: self.now[0]),
+                # Sleep the longest time the jitter allows.
+                (utils.random, 'uniform', lambda low, high: high)):
+            patcher = patch.object(target, name, side_effect=side_effect)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_backs_off(self):
+        retriever = MagicMock(side_effect=range(10))
+
+        result = utils.poll_until(retriever, lambda value: value == 5,
+                                  sleep_time=1, backoff=2, max_sleep_time=10)
+
+        self.assertEqual(5, result)
+        self.assertEqual([1, 2, 4, 8, 10], self.slept)
+
+    def test_jitter(self):
+        utils.random.uniform.side_effect = lambda low, high: low
+        retriever = MagicMock(side_effect=range(10))
+
+        utils.poll_until(retriever, lambda value: value == 3,
+                         sleep_time=2, backoff=2)
+
+        self.assertEqual([1, 2, 4], self.slept)
+
+    def test_time_out(self):
+        retriever = MagicMock(return_value=False)
+
+        self.assertRaises(exception.PollTimeOut, utils.poll_until,
+                          retriever, sleep_time=1, time_out=10, backoff=2)
+        # The last check happens at the deadline.
+        self.assertEqual([1, 2, 4, 3], self.slept)
+        self.assertEqual(5, retriever.call_count)
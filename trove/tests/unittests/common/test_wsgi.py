@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 #
+from trove.common import exception
 import trove.common.wsgi as wsgi
 import webob
 
@@ -39,3 +40,40 @@ class TestWsgi(testtools.TestCase):
         self.assertThat(ctx, Not(Is(None)))
         self.assertThat(ctx.user, Equals(user_id))
         self.assertThat(ctx.auth_token, Equals(token))
+
+
+class TestControllerValidation(testtools.TestCase):
+
+    class FakeController(wsgi.Controller):
+        schemas = {
+            'create': {
+                'type': 'object',
+                'required': ['name'],
+                'properties': {'name': {'type': 'string'}},
+            },
+        }
+
+    def setUp(self):
+        super(TestControllerValidation, self).setUp()
+        self.controller = self.FakeController()
+
+    def test_validator_is_compiled_once(self):
+        schema = self.FakeController.schemas['create']
+        validator = wsgi.Controller.get_validator(schema)
+        self.assertThat(wsgi.Controller.get_validator(schema), Is(validator))
+
+    def test_validator_per_schema(self):
+        first = wsgi.Controller.get_validator({'type': 'object'})
+        second = wsgi.Controller.get_validator({'type': 'object'})
+        self.assertThat(first, Not(Is(second)))
+
+    def test_validate_request(self):
+        self.controller.validate_request('create',
+                                         {'body': {'name': 'test'}})
+
+    def test_validate_request_errors(self):
+        error = self.assertRaises(exception.BadRequest,
+                                  self.controller.validate_request,
+                                  'create', {'body': {'name': 1}})
+        self.assertThat(str(error), Equals(
+            "Validation error: name 1 is not of type 'string'"))
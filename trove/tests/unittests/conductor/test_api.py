@@ -0,0 +1,137 @@
+#    Copyright 2014 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import MagicMock
+from mock import patch
+from testtools import TestCase
+
+from trove.common import cfg
+from trove.common import utils
+from trove.conductor import api as conductor_api
+from trove.conductor import manager as conductor_manager
+
+CONF = cfg.CONF
+
+
+class PartitionTest(TestCase):
+
+    def setUp(self):
+        super(PartitionTest, self).setUp()
+        CONF.set_override('conductor_partitions', 4)
+        self.addCleanup(CONF.clear_override, 'conductor_partitions')
+        conductor_api._partitions = None
+        self.addCleanup(setattr, conductor_api, '_partitions', None)
+
+    def test_instance_topic_unpartitioned(self):
+        CONF.set_override('conductor_partitions', 1)
+
+        self.assertEqual(CONF.conductor_queue,
+                         conductor_api.instance_topic('instance-id'))
+
+    def test_instance_topic(self):
+        topics = [conductor_api.partition_topic(partition)
+                  for partition in range(4)]
+        instance_ids = [utils.generate_uuid() for i in range(100)]
+
+        used = [conductor_api.instance_topic(instance_id)
+                for instance_id in instance_ids]
+
+        self.assertEqual(set(topics), set(used))
+        # The messages of an instance always go to the same topic.
+        self.assertEqual(used, [conductor_api.instance_topic(instance_id)
+                                for instance_id in instance_ids])
+
+    def test_first_partition_worker_consumes_queue(self):
+        service = MagicMock(topic=conductor_api.partition_topic(0))
+
+        conductor_manager.Manager().initialize_service_hook(service)
+
+        consumer_call = service.conn.create_consumer.call_args
+        self.assertEqual(CONF.conductor_queue, consumer_call[0][0])
+
+    def test_partition_worker(self):
+        service = MagicMock(topic=conductor_api.partition_topic(2))
+
+        conductor_manager.Manager().initialize_service_hook(service)
+
+        self.assertFalse(service.conn.create_consumer.called)
+
+    def _partition_warnings(self, partition, instance_id):
+        manager = conductor_manager.Manager()
+        service = MagicMock(topic=conductor_api.partition_topic(partition))
+        manager.initialize_service_hook(service)
+        with patch.object(conductor_manager.LOG, 'warn') as warn:
+            manager._check_partition(instance_id, 'heartbeat')
+        return warn.call_count
+
+    def test_check_partition(self):
+        instance_id = utils.generate_uuid()
+        topic = conductor_api.instance_topic(instance_id)
+        partition = [conductor_api.partition_topic(partition)
+                     for partition in range(4)].index(topic)
+        self.assertEqual(0, self._partition_warnings(partition, instance_id))
+
+    def test_check_partition_mismatch(self):
+        # A guest that still uses 3 partitions sends the messages of this
+        # instance to the worker of partition 1 rather than 2.
+        instance_id = 'instance-27'
+        self.assertEqual(conductor_api.partition_topic(2),
+                         conductor_api.instance_topic(instance_id))
+        self.assertEqual(conductor_api.partition_topic(1),
+                         conductor_api.instance_topic(instance_id, 3))
+        self.assertEqual(1, self._partition_warnings(1, instance_id))
+
+    def test_get_partitions(self):
+        self.assertEqual(4, conductor_manager.Manager().get_partitions(None))
+
+    def _topics(self, instance_id, count=1):
+        api = conductor_api.API(None)
+        return [api._instance_topic(instance_id) for i in range(count)]
+
+    def test_guest_gets_partitions_from_conductor(self):
+        # The guest's own setting does not matter.
+        CONF.set_override('conductor_partitions', 1)
+        instance_id = 'instance-27'
+        with patch.object(conductor_api.API, 'call',
+                          return_value=3) as call:
+            topics = self._topics(instance_id, 2)
+
+        self.assertEqual([conductor_api.partition_topic(1)] * 2, topics)
+        self.assertEqual(1, call.call_count)
+        self.assertEqual('get_partitions', call.call_args[0][1]['method'])
+
+    def test_guest_asks_again(self):
+        with patch.object(conductor_api.API, 'call',
+                          return_value=4) as call:
+            self._topics('instance-27')
+            count, got_at = conductor_api._partitions
+            conductor_api._partitions = (
+                count, got_at - conductor_api.PARTITIONS_MAX_AGE - 1)
+            self._topics('instance-27')
+
+        self.assertEqual(2, call.call_count)
+
+    def test_guest_sends_to_queue_without_partitions(self):
+        with patch.object(conductor_api.API, 'call',
+                          side_effect=Exception('timeout')):
+            topics = self._topics('instance-27')
+
+        self.assertEqual([CONF.conductor_queue], topics)
+
+    def test_unpartitioned_worker(self):
+        service = MagicMock(topic=CONF.conductor_queue)
+
+        conductor_manager.Manager().initialize_service_hook(service)
+
+        self.assertFalse(service.conn.create_consumer.called)
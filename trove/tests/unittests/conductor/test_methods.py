@@ -13,16 +13,22 @@
 #    under the License.
 
 import testtools
+from mock import patch
 from trove.backup import models as bkup_models
+from trove.common import cfg
 from trove.common import exception as t_exception
 from trove.common import utils
 from trove.common.instance import ServiceStatuses
 from trove.conductor import manager as conductor_manager
+from trove.conductor import models as conductor_models
+from trove.conductor.models import LastSeen
 from trove.guestagent.common import timeutils
 from trove.instance import models as t_models
 from trove.tests.unittests.util import util
 
 
+CONF = cfg.CONF
+
 # See LP bug #1255178
 OLD_DBB_SAVE = bkup_models.DBBackup.save
 
@@ -34,6 +40,8 @@ class ConductorMethodTests(testtools.TestCase):
         super(ConductorMethodTests, self).setUp()
         util.init_db()
         self.cond_mgr = conductor_manager.Manager()
+        # Write the last seen times through to the database.
+        self.cond_mgr._last_seen.flush_interval = 0
         self.instance_id = utils.generate_uuid()
 
     def tearDown(self):
@@ -161,6 +169,75 @@ class ConductorMethodTests(testtools.TestCase):
         iss = self._get_iss(iss_id)
         self.assertEqual(ServiceStatuses.NEW, iss.status)
 
+    def test_heartbeat_records_last_seen(self):
+        self._create_iss()
+        now = timeutils.float_utcnow()
+        self.cond_mgr.heartbeat(None, self.instance_id, {}, sent=now)
+        self.cond_mgr.heartbeat(None, self.instance_id, {}, sent=now + 60)
+        self.assertEqual({self.instance_id: now + 60},
+                         LastSeen.load_all([self.instance_id], 'heartbeat'))
+
+    def test_heartbeat_unchanged_status_not_saved(self):
+        self._create_iss()
+        payload = {'service_status': ServiceStatuses.NEW.description}
+        with patch.object(t_models.InstanceServiceStatus, 'save') as save:
+            self.cond_mgr.heartbeat(None, self.instance_id, payload,
+                                    sent=timeutils.float_utcnow())
+        self.assertFalse(save.called)
+
+    # --- Tests for batched heartbeats ---
+
+    def _batched_heartbeats(self, heartbeats):
+        with patch.object(conductor_manager.CONF,
+                          'conductor_heartbeat_window', 5):
+            with patch.object(conductor_manager.greenthread,
+                              'spawn_after') as spawn_after:
+                for instance_id, payload, sent in heartbeats:
+                    self.cond_mgr.heartbeat(None, instance_id, payload,
+                                            sent=sent)
+        self.assertEqual(1, spawn_after.call_count)
+        with patch.object(self.cond_mgr, '_write_heartbeats',
+                          wraps=self.cond_mgr._write_heartbeats) as write:
+            self.cond_mgr._flush_heartbeats()
+        self.assertEqual(1, write.call_count)
+        return write.call_args[0][0]
+
+    def test_batched_heartbeats_keep_newest(self):
+        iss_id = self._create_iss()
+        now = timeutils.float_utcnow()
+        building = {'service_status': ServiceStatuses.BUILDING.description}
+        running = {'service_status': ServiceStatuses.RUNNING.description}
+        written = self._batched_heartbeats([
+            (self.instance_id, building, now),
+            (self.instance_id, running, now + 60),
+            (self.instance_id, building, now + 30)])
+        self.assertEqual({self.instance_id: (now + 60,
+                                             ServiceStatuses.RUNNING)},
+                         written)
+        self.assertEqual(ServiceStatuses.RUNNING, self._get_iss(iss_id).status)
+        self.assertEqual({}, self.cond_mgr._heartbeats)
+
+    def test_batched_heartbeats_keep_status_change(self):
+        iss_id = self._create_iss()
+        now = timeutils.float_utcnow()
+        building = {'service_status': ServiceStatuses.BUILDING.description}
+        self._batched_heartbeats([(self.instance_id, building, now),
+                                  (self.instance_id, {}, now + 60)])
+        self.assertEqual(ServiceStatuses.BUILDING,
+                         self._get_iss(iss_id).status)
+
+    def test_batched_heartbeats_many_instances(self):
+        iss_id = self._create_iss()
+        other_id = utils.generate_uuid()
+        now = timeutils.float_utcnow()
+        running = {'service_status': ServiceStatuses.RUNNING.description}
+        self._batched_heartbeats([(self.instance_id, running, now),
+                                  (other_id, running, now)])
+        self.assertEqual(ServiceStatuses.RUNNING, self._get_iss(iss_id).status)
+        self.assertEqual({self.instance_id: now},
+                         LastSeen.load_all([self.instance_id, other_id],
+                                           'heartbeat'))
+
     def test_backup_newer_timestamp_accepted(self):
         old_name = "oldname"
         new_name = "renamed"
@@ -188,3 +265,90 @@ class ConductorMethodTests(testtools.TestCase):
                                     sent=past, name=new_name)
         bkup = self._get_backup(bkup_id)
         self.assertEqual(old_name, bkup.name)
+
+    # --- Tests for the last seen times ---
+
+    def test_last_seen_shared_between_workers(self):
+        CONF.set_override('trove_conductor_workers', 2)
+        self.addCleanup(CONF.clear_override, 'trove_conductor_workers')
+        self.cond_mgr = conductor_manager.Manager()
+        other_mgr = conductor_manager.Manager()
+        self.assertFalse(self.cond_mgr._message_too_old(
+            self.instance_id, 'update_backup', 10.0))
+        self.assertFalse(other_mgr._message_too_old(
+            self.instance_id, 'update_backup', 20.0))
+        self.assertTrue(self.cond_mgr._message_too_old(
+            self.instance_id, 'update_backup', 15.0))
+
+    def _assert_last_seen_cached(self):
+        last_seen = conductor_manager.Manager()._last_seen
+        self.assertEqual(CONF.conductor_last_seen_cache_size, last_seen.size)
+        self.assertEqual(CONF.conductor_last_seen_flush_interval,
+                         last_seen.flush_interval)
+
+    def test_last_seen_cached_by_single_worker(self):
+        self._assert_last_seen_cached()
+
+    def test_last_seen_cached_when_partitioned(self):
+        CONF.set_override('conductor_partitions', 4)
+        CONF.set_override('trove_conductor_workers', 2)
+        self.addCleanup(CONF.clear_override, 'conductor_partitions')
+        self.addCleanup(CONF.clear_override, 'trove_conductor_workers')
+        self._assert_last_seen_cached()
+
+
+class LastSeenCacheTests(testtools.TestCase):
+    def setUp(self):
+        super(LastSeenCacheTests, self).setUp()
+        util.init_db()
+        self.cache = conductor_models.LastSeenCache(2, 5)
+        spawn_after = patch.object(conductor_models.greenthread,
+                                   'spawn_after')
+        self.spawn_after = spawn_after.start()
+        self.addCleanup(spawn_after.stop)
+        self.instance_ids = [utils.generate_uuid() for i in range(3)]
+
+    def test_miss_loads_from_db(self):
+        LastSeen.create(self.instance_ids[0], 'heartbeat', 10.0)
+        with patch.object(LastSeen, 'load_all',
+                          wraps=LastSeen.load_all) as load_all:
+            found = self.cache.get_many(self.instance_ids[:2], 'heartbeat')
+            self.assertEqual({self.instance_ids[0]: 10.0}, found)
+            # Both the hit and the instance without a row are cached
+            found = self.cache.get_many(self.instance_ids[:2], 'heartbeat')
+            self.assertEqual({self.instance_ids[0]: 10.0}, found)
+        self.assertEqual(1, load_all.call_count)
+
+    def test_write_behind(self):
+        self.cache.update_many('heartbeat', {self.instance_ids[0]: 10.0})
+        self.cache.update_many('heartbeat', {self.instance_ids[0]: 20.0})
+        self.assertEqual(1, self.spawn_after.call_count)
+        self.assertEqual({}, LastSeen.load_all(self.instance_ids,
+                                               'heartbeat'))
+        self.cache._flush_later()
+        self.assertEqual({self.instance_ids[0]: 20.0},
+                         LastSeen.load_all(self.instance_ids, 'heartbeat'))
+        self.cache.update_many('heartbeat', {self.instance_ids[0]: 30.0})
+        self.cache.flush()
+        self.assertEqual({self.instance_ids[0]: 30.0},
+                         LastSeen.load_all(self.instance_ids, 'heartbeat'))
+
+    def test_bounded_size(self):
+        for sent, instance_id in enumerate(self.instance_ids):
+            self.cache.update_many('heartbeat', {instance_id: float(sent)})
+        self.assertEqual(2, len(self.cache._cache))
+        # The evicted update is still pending, so it is not read from the
+        # database.
+        with patch.object(LastSeen, 'load_all') as load_all:
+            self.assertEqual(
+                {self.instance_ids[0]: 0.0},
+                self.cache.get_many(self.instance_ids[:1], 'heartbeat'))
+        self.assertFalse(load_all.called)
+
+    def test_failed_flush_is_retried(self):
+        self.cache.update_many('heartbeat', {self.instance_ids[0]: 10.0})
+        with patch.object(LastSeen, 'save_all', side_effect=RuntimeError):
+            self.assertRaises(RuntimeError, self.cache.flush)
+        self.cache.flush()
+        self.assertEqual({self.instance_ids[0]: 10.0},
+                         LastSeen.load_all(self.instance_ids, 'heartbeat'))
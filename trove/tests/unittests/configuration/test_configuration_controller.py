@@ -14,10 +14,18 @@
 #    under the License.
 #
 
+import json
+
 import jsonschema
+from mock import MagicMock
+from mock import patch
 from testtools import TestCase
 from trove.configuration.service import ConfigurationsController
+from trove.common import cfg
 from trove.common import configurations
+from trove.common import exception
+
+CONF = cfg.CONF
 
 
 class TestConfigurationParser(TestCase):
@@ -124,3 +132,71 @@ class TestConfigurationController(TestCase):
         self.assertIsNotNone(schema)
         validator = jsonschema.Draft4Validator(schema)
         self.assertTrue(validator.is_valid(body))
+
+
+class TestValidationRules(TestCase):
+    def setUp(self):
+        super(TestValidationRules, self).setUp()
+        patcher = patch.dict(configurations._RULES, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _template(self, *names):
+        rules = {'configuration-parameters': [
+            {'name': name, 'type': 'integer', 'min': 0, 'max': 1}
+            for name in names]}
+        return MagicMock(**{'render.return_value': json.dumps(rules)})
+
+    def test_rules_are_parsed_once(self):
+        template = self._template('autocommit')
+        with patch.object(configurations.ENV, 'get_template',
+                          return_value=template):
+            rules = configurations.load_validation_rules('mysql')
+            self.assertIs(rules, configurations.load_validation_rules('mysql'))
+
+        self.assertEqual(1, template.render.call_count)
+        self.assertEqual(0, rules.get('autocommit').min)
+
+    def test_rules_reload_on_change(self):
+        with patch.object(configurations.ENV, 'get_template',
+                          side_effect=[self._template('autocommit'),
+                                       self._template('local_infile')]):
+            configurations.load_validation_rules('mysql')
+            rules = configurations.load_validation_rules('mysql')
+
+        self.assertIsNone(rules.get('autocommit'))
+        self.assertIsNotNone(rules.get('local_infile'))
+
+    def test_rules_without_reload(self):
+        CONF.set_override('validation_rules_reload', False)
+        self.addCleanup(CONF.clear_override, 'validation_rules_reload')
+        with patch.object(configurations.ENV, 'get_template',
+                          return_value=self._template('autocommit')) as get:
+            configurations.load_validation_rules('mysql')
+            configurations.load_validation_rules('mysql')
+
+        self.assertEqual(1, get.call_count)
+
+    def test_rules_not_supported(self):
+        self.assertRaises(exception.UnprocessableEntity,
+                          configurations.load_validation_rules, 'unknown')
+
+    def test_validate_configuration(self):
+        ConfigurationsController._validate_configuration(
+            {'connect_timeout': 10, 'character_set_client': 'utf8'},
+            datastore_manager='mysql')
+
+    def test_validate_configuration_errors(self):
+        for values in ({'unknown': 1}, {'connect_timeout': 0},
+                       {'connect_timeout': 65536},
+                       {'connect_timeout': '10'},
+                       {'character_set_client': 1}):
+            self.assertRaises(exception.UnprocessableEntity,
+                              ConfigurationsController._validate_configuration,
+                              values, datastore_manager='mysql')
+
+    def test_configs_require_restart(self):
+        self.assertTrue(configurations.do_configs_require_restart(
+            {'autocommit': 1, 'innodb_file_per_table': 1}))
+        self.assertFalse(configurations.do_configs_require_restart(
+            {'autocommit': 1}))
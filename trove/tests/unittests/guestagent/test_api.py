@@ -102,6 +102,16 @@ class ApiTest(testtools.TestCase):
         self.api.create_user('test_user')
         self._verify_rpc_cast(exp_msg, rpc.cast)
 
+    def test_bulk_create_users(self):
+        exp_resp = [{'name': 'test_user', 'host': '%', 'status': 'created'}]
+        rpc.call = mock.Mock(return_value=exp_resp)
+        exp_msg = RpcMsgMatcher('bulk_create_users', 'users')
+        # execute
+        resp = self.api.bulk_create_users(['test_user'])
+        # verify
+        self.assertThat(resp, Is(exp_resp))
+        self._verify_rpc_call(exp_msg, rpc.call)
+
     def test_rpc_cast_exception(self):
         rpc.cast = mock.Mock(side_effect=IOError('host down'))
         exp_msg = RpcMsgMatcher('create_user', 'users')
@@ -149,6 +159,16 @@ class ApiTest(testtools.TestCase):
         # verify
         self._verify_rpc_cast(exp_msg, rpc.cast)
 
+    def test_bulk_create_databases(self):
+        exp_resp = [{'name': 'db1', 'status': 'created'}]
+        rpc.call = mock.Mock(return_value=exp_resp)
+        exp_msg = RpcMsgMatcher('bulk_create_databases', 'databases')
+        # execute
+        resp = self.api.bulk_create_databases(['db1'])
+        # verify
+        self.assertThat(resp, Is(exp_resp))
+        self._verify_rpc_call(exp_msg, rpc.call)
+
     def test_list_databases(self):
         exp_resp = ['db1', 'db2', 'db3']
         rpc.call = mock.Mock(return_value=exp_resp)
@@ -12,13 +12,24 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import gzip
+import StringIO
 import testtools
 import mock
 
+from eventlet import greenthread
+
 import trove.guestagent.strategies.backup.base as backupBase
 import trove.guestagent.strategies.restore.base as restoreBase
+import trove.guestagent.strategies.restore.mysql_impl as restoreMysql
+import trove.guestagent.strategies.restore.mongodb_impl as restoreMongo
+import trove.guestagent.strategies.restore.redis_impl as restoreRedis
 
+from trove.guestagent.strategies.backup import mongodb_impl
 from trove.guestagent.strategies.backup import mysql_impl
+from trove.guestagent.strategies.backup import redis_impl
+from trove.guestagent.strategies.codec import base as codecBase
+from trove.guestagent.strategies.codec import gzip_impl
 from trove.common import utils
 
 BACKUP_XTRA_CLS = ("trove.guestagent.strategies.backup."
@@ -244,3 +255,348 @@ class GuestAgentBackupTest(testtools.TestCase):
                             location="filename", checksum="md5")
         self.assertEqual(restr.restore_cmd,
                          DECRYPT + PIPE + UNZIP + PIPE + SQLDUMP_RESTORE)
+
+
+class RedisBackupTest(testtools.TestCase):
+
+    def setUp(self):
+        super(RedisBackupTest, self).setUp()
+        backupBase.BackupRunner.is_zipped = True
+        backupBase.BackupRunner.is_encrypted = False
+        restoreBase.RestoreRunner.is_zipped = True
+        restoreBase.RestoreRunner.is_encrypted = False
+        service = redis_impl.service
+        for name, value in [('get_rdb_path', '/var/lib/redis/dump.rdb'),
+                            ('get_aof_path', '/var/lib/redis/appendonly.aof'),
+                            ('is_aof_enabled', False)]:
+            patcher = mock.patch.object(service, name, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(service, 'RedisApp')
+        self.app = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.run_redis_cli = self._patch_service('run_redis_cli')
+        self.get_info = self._patch_service('get_info')
+        self.execute = self._patch_service('execute_with_timeout',
+                                           module=restoreRedis.utils)
+
+    def _patch_service(self, name, module=redis_impl.service):
+        patcher = mock.patch.object(module, name)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def _restore_runner(self):
+        return restoreRedis.RedisBackup(mock.Mock(), location="filename",
+                                        checksum="md5",
+                                        restore_location="/var/lib/redis")
+
+    def test_backup_command(self):
+        bkup = redis_impl.RedisBackup(12345, extra_opts="")
+        self.assertEqual("sudo cat /var/lib/redis/dump.rdb" + PIPE + ZIP,
+                         bkup.command)
+        self.assertEqual("12345.rdb.gz", bkup.manifest)
+
+    def test_backup_waits_for_snapshot(self):
+        self.run_redis_cli.return_value = "Background saving started\n"
+        self.get_info.side_effect = [{'rdb_bgsave_in_progress': '1'},
+                                     {'rdb_bgsave_in_progress': '0'},
+                                     {'rdb_last_bgsave_status': 'ok'}]
+        bkup = redis_impl.RedisBackup(12345, extra_opts="")
+        with mock.patch.object(bkup, 'SAVE_SLEEP_INTERVAL', 0):
+            bkup._run_pre_backup()
+        self.run_redis_cli.assert_called_once_with('BGSAVE')
+        self.assertEqual(3, self.get_info.call_count)
+
+    def test_backup_snapshot_not_started(self):
+        self.run_redis_cli.return_value = "ERR no permission\n"
+        bkup = redis_impl.RedisBackup(12345, extra_opts="")
+        self.assertRaises(backupBase.BackupError, bkup._run_pre_backup)
+        self.assertFalse(self.get_info.called)
+
+    def test_backup_snapshot_failed(self):
+        self.run_redis_cli.return_value = "Background saving started\n"
+        self.get_info.side_effect = [{'rdb_bgsave_in_progress': '0'},
+                                     {'rdb_last_bgsave_status': 'err'}]
+        bkup = redis_impl.RedisBackup(12345, extra_opts="")
+        self.assertRaises(backupBase.BackupError, bkup._run_pre_backup)
+
+    def test_restore_command(self):
+        runner = self._restore_runner()
+        self.assertEqual(UNZIP + PIPE +
+                         "sudo tee /var/lib/redis/dump.rdb >/dev/null",
+                         runner.restore_cmd)
+
+    def test_restore_without_aof(self):
+        runner = self._restore_runner()
+        with mock.patch.object(runner, '_run_restore', return_value=10):
+            self.assertEqual(10, runner.restore())
+        self.app.stop_db.assert_called_once_with()
+        self.app.start_redis.assert_called_once_with()
+        self.assertFalse(self.app.write_config.called)
+
+    def test_restore_rewrites_aof(self):
+        redis_impl.service.is_aof_enabled.return_value = True
+        self.get_info.side_effect = [{'loading': '0'},
+                                     {'aof_rewrite_in_progress': '1'},
+                                     {'aof_rewrite_in_progress': '0',
+                                      'aof_rewrite_scheduled': '0'}]
+        runner = self._restore_runner()
+        config = "dir /var/lib/redis\nappendonly yes\n"
+        with mock.patch.object(runner, '_run_restore', return_value=10):
+            with mock.patch.object(runner, 'LOAD_SLEEP_INTERVAL', 0):
+                with mock.patch('__builtin__.open',
+                                mock.mock_open(read_data=config)):
+                    runner.restore()
+        self.assertEqual([mock.call("dir /var/lib/redis\nappendonly no\n"),
+                          mock.call(config)],
+                         self.app.write_config.call_args_list)
+        self.run_redis_cli.assert_called_once_with('CONFIG', 'SET',
+                                                   'appendonly', 'yes')
+        self.assertEqual(3, self.get_info.call_count)
+
+
+class MongoDumpTest(testtools.TestCase):
+
+    def setUp(self):
+        super(MongoDumpTest, self).setUp()
+        backupBase.BackupRunner.is_zipped = True
+        backupBase.BackupRunner.is_encrypted = False
+        restoreBase.RestoreRunner.is_zipped = True
+        restoreBase.RestoreRunner.is_encrypted = False
+        patcher = mock.patch.object(mongodb_impl.operating_system,
+                                    'get_ip_address',
+                                    return_value='10.0.0.2')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_backup_command(self):
+        bkup = mongodb_impl.MongoDump(12345, extra_opts="--oplog")
+        self.assertEqual("mongodump --host 10.0.0.2 --archive --oplog"
+                         " 2>/tmp/mongodump.log" + PIPE + ZIP, bkup.command)
+        self.assertEqual("12345.archive.gz", bkup.manifest)
+
+    def test_backup_check_process(self):
+        bkup = mongodb_impl.MongoDump(12345, extra_opts="")
+        with mock.patch('__builtin__.open',
+                        mock.mock_open(read_data="done dumping")):
+            self.assertTrue(bkup.check_process())
+        with mock.patch('__builtin__.open',
+                        mock.mock_open(read_data="Failed: no reachable")):
+            self.assertFalse(bkup.check_process())
+
+    def test_restore_command(self):
+        runner = restoreMongo.MongoDump(mock.Mock(), location="filename",
+                                        checksum="md5",
+                                        restore_location="/var/lib/mongodb")
+        self.assertEqual(UNZIP + PIPE + "mongorestore --host 10.0.0.2"
+                         " --archive --drop 2>/tmp/mongorestore.log",
+                         runner.restore_cmd)
+        with mock.patch('__builtin__.open',
+                        mock.mock_open(read_data="Failed: bad archive")):
+            self.assertRaises(restoreBase.RestoreError, runner.post_restore)
+
+
+class BackupCodecTest(testtools.TestCase):
+
+    def setUp(self):
+        super(BackupCodecTest, self).setUp()
+        self.data = ''.join(chr(65 + i % 26) * (i % 7 + 1)
+                            for i in range(5000))
+        block_size = mock.patch.object(gzip_impl.CONF,
+                                       'backup_compression_block_size', 1000)
+        block_size.start()
+        self.addCleanup(block_size.stop)
+
+    def tearDown(self):
+        super(BackupCodecTest, self).tearDown()
+        backupBase.BackupRunner.codec_strategy = None
+        restoreBase.RestoreRunner.codec_strategy = None
+
+    def _encode(self, codec):
+        encoded = codec.encode(StringIO.StringIO(self.data))
+        return ''.join(codecBase.iter_chunks(encoded, 100))
+
+    def test_parallel_gzip_is_gzip_compatible(self):
+        codec = gzip_impl.ParallelGzip(True, False, CRYPTO_KEY)
+        encoded = self._encode(codec)
+        self.assertEqual(self.data,
+                         gzip.GzipFile(fileobj=StringIO.StringIO(encoded))
+                         .read())
+
+    def test_parallel_gzip_round_trip(self):
+        codec = gzip_impl.ParallelGzip(True, False, CRYPTO_KEY)
+        encoded = self._encode(codec)
+        # Feed the decoder chunks that don't line up with the gzip members
+        chunks = [encoded[i:i + 333] for i in range(0, len(encoded), 333)]
+        self.assertEqual(self.data, ''.join(codec.decode(chunks)))
+
+    def test_encrypt_key_not_on_command_line(self):
+        codec = gzip_impl.ParallelGzip(False, True, CRYPTO_KEY)
+        with mock.patch.object(codecBase, 'filter_through',
+                               return_value=iter(['x'])) as filter_through:
+            self.assertEqual('x', self._encode(codec))
+        cmd = filter_through.call_args[0][0]
+        self.assertNotIn(CRYPTO_KEY, ' '.join(cmd))
+        self.assertEqual(CRYPTO_KEY,
+                         filter_through.call_args[1]['env'][codecBase.KEY_ENV])
+
+    def test_filter_through(self):
+        chunks = [self.data[i:i + 500] for i in range(0, len(self.data), 500)]
+        self.assertEqual(self.data,
+                         ''.join(codecBase.filter_through(['cat'], chunks)))
+
+    def test_filter_through_failure(self):
+        self.assertRaises(codecBase.CodecError, list,
+                          codecBase.filter_through(['false'], ['data']))
+
+    def test_backup_with_codec_command(self):
+        backupBase.BackupRunner.is_zipped = True
+        backupBase.BackupRunner.is_encrypted = True
+        backupBase.BackupRunner.codec_strategy = 'ParallelGzip'
+        RunnerClass = utils.import_class(BACKUP_XTRA_CLS)
+        bkup = RunnerClass(12345, extra_opts="")
+        self.assertEqual(XTRA_BACKUP, bkup.command)
+        self.assertEqual("12345.xbstream.gz.enc", bkup.manifest)
+        self.assertEqual({'codec': 'ParallelGzip', 'codec_zipped': 'True',
+                          'codec_encrypted': 'True'}, bkup.codec_metadata())
+
+    def _restore(self, storage):
+        RunnerClass = utils.import_class(RESTORE_SQLDUMP_CLS)
+        restr = RunnerClass(storage, restore_location="/var/lib/mysql",
+                            location="filename", checksum="md5")
+        with mock.patch.object(restoreBase.subprocess, 'Popen') as popen:
+            popen.return_value.stderr.read.return_value = ''
+            length = restr._unpack("filename", "md5", restr.restore_cmd)
+        written = ''.join(call[0][0] for call in
+                          popen.return_value.stdin.write.call_args_list)
+        return length, popen.call_args[0][0], written
+
+    def test_restore_with_codec(self):
+        restoreBase.RestoreRunner.is_zipped = True
+        restoreBase.RestoreRunner.is_encrypted = False
+        restoreBase.RestoreRunner.codec_strategy = 'ParallelGzip'
+        codec = gzip_impl.ParallelGzip(True, False, CRYPTO_KEY)
+        encoded = self._encode(codec)
+        storage = mock.Mock()
+        storage.load_metadata.return_value = {'codec': 'ParallelGzip'}
+        storage.load.return_value = iter([encoded])
+
+        length, command, written = self._restore(storage)
+
+        # The length is the one of the stored backup
+        self.assertEqual(len(encoded), length)
+        self.assertEqual(SQLDUMP_RESTORE, command)
+        self.assertEqual(self.data, written)
+
+    def test_restore_with_codec_decodes_as_recorded(self):
+        # The backup was not compressed, whatever this guest is set to do
+        restoreBase.RestoreRunner.is_zipped = True
+        restoreBase.RestoreRunner.is_encrypted = False
+        restoreBase.RestoreRunner.codec_strategy = 'ParallelGzip'
+        storage = mock.Mock()
+        storage.load_metadata.return_value = {'codec': 'ParallelGzip',
+                                              'codec_zipped': 'False',
+                                              'codec_encrypted': 'False'}
+        storage.load.return_value = iter([self.data])
+
+        length, command, written = self._restore(storage)
+
+        self.assertEqual(len(self.data), length)
+        self.assertEqual(SQLDUMP_RESTORE, command)
+        self.assertEqual(self.data, written)
+
+    def test_restore_without_codec_skips_metadata(self):
+        restoreBase.RestoreRunner.is_zipped = True
+        restoreBase.RestoreRunner.is_encrypted = False
+        storage = mock.Mock()
+        storage.load.return_value = iter(['zipped'])
+
+        length, command, written = self._restore(storage)
+
+        self.assertFalse(storage.load_metadata.called)
+        self.assertEqual(6, length)
+        self.assertEqual(UNZIP + PIPE + SQLDUMP_RESTORE, command)
+        self.assertEqual('zipped', written)
+
+
+class IncrementalRestorePlanTest(testtools.TestCase):
+
+    def setUp(self):
+        super(IncrementalRestorePlanTest, self).setUp()
+        self.metadata = {
+            'full': {},
+            'inc1': {'parent_location': 'full', 'parent_checksum': 'md5-0'},
+            'inc2': {'parent_location': 'inc1', 'parent_checksum': 'md5-1'},
+        }
+        self.storage = mock.Mock()
+        self.storage.load_metadata.side_effect = (
+            lambda location, checksum: self.metadata[location])
+        self.parents = [{'location': 'full', 'checksum': 'md5-0'},
+                        {'location': 'inc1', 'checksum': 'md5-1'}]
+
+    def _runner(self, parents=None):
+        RunnerClass = utils.import_class(RESTORE_XTRA_INCR_CLS)
+        return RunnerClass(self.storage, restore_location="/var/lib/mysql",
+                           location="inc2", checksum="md5-2",
+                           parents=parents)
+
+    def test_plan_from_parents(self):
+        plan = self._runner(self.parents)._restore_plan()
+        self.assertEqual([('full', 'md5-0', self.metadata['full']),
+                          ('inc1', 'md5-1', self.metadata['inc1']),
+                          ('inc2', 'md5-2', self.metadata['inc2'])], plan)
+        self.assertEqual(3, self.storage.load_metadata.call_count)
+
+    def test_plan_from_metadata(self):
+        plan = self._runner()._restore_plan()
+        self.assertEqual(['full', 'inc1', 'inc2'],
+                         [location for location, _, _ in plan])
+        self.assertEqual(['md5-0', 'md5-1', 'md5-2'],
+                         [checksum for _, checksum, _ in plan])
+
+    def test_plan_broken_chain(self):
+        self.metadata['inc1'] = {'parent_location': 'other',
+                                 'parent_checksum': 'md5-x'}
+        runner = self._runner(self.parents)
+        self.assertRaises(restoreBase.RestoreError, runner._restore_plan)
+
+    def test_run_restore_overlaps_unpack_and_prepare(self):
+        events = []
+
+        def _unpack(location, checksum, command, metadata=None):
+            events.append('unpack %s' % location)
+            return 10
+
+        def _prepare(incremental_dir):
+            # Yield so the unpack of the next backup gets to run
+            greenthread.sleep(0)
+            events.append('prepare %s' % incremental_dir)
+
+        runner = self._runner(self.parents)
+        with mock.patch.object(restoreMysql.utils, 'execute') as execute:
+            with mock.patch.object(runner, '_unpack', side_effect=_unpack):
+                with mock.patch.object(runner, '_incremental_prepare',
+                                       side_effect=_prepare):
+                    length = runner._run_restore()
+
+        self.assertEqual(30, length)
+        self.assertEqual(['unpack full',
+                          'unpack inc1',
+                          'prepare None',
+                          'unpack inc2',
+                          'prepare /var/lib/mysql/md5-1',
+                          'prepare /var/lib/mysql/md5-2'], events)
+        self.assertEqual(2, execute.call_count)
+
+    def test_run_restore_prepare_error_not_hidden(self):
+        def _unpack(location, checksum, command, metadata=None):
+            if location == 'inc1':
+                raise restoreBase.RestoreError('unpack failed')
+            return 10
+
+        runner = self._runner(self.parents)
+        with mock.patch.object(runner, '_unpack', side_effect=_unpack):
+            with mock.patch.object(runner, '_incremental_prepare',
+                                   side_effect=ValueError('prepare failed')):
+                error = self.assertRaises(ValueError, runner._run_restore)
+        self.assertEqual('prepare failed', str(error))
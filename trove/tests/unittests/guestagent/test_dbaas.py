@@ -66,6 +66,11 @@ FAKE_USER = [{"_name": "random", "_password": "guesswhat",
 
 conductor_api.API.heartbeat = Mock()
 
+# mock_sql_connection replaces the context manager of LocalSqlClient for
+# good, so keep the real one around for the tests of the client itself.
+LOCAL_SQL_CLIENT_ENTER = dbaas.LocalSqlClient.__dict__['__enter__']
+LOCAL_SQL_CLIENT_EXIT = dbaas.LocalSqlClient.__dict__['__exit__']
+
 
 class FakeAppStatus(BaseDbStatus):
 
@@ -173,6 +178,47 @@ class MySqlAdminMockTest(testtools.TestCase):
         self.assertThat(len(databases), Is(3))
 
 
+class LocalSqlClientTest(testtools.TestCase):
+
+    def setUp(self):
+        super(LocalSqlClientTest, self).setUp()
+        for name, method in (('__enter__', LOCAL_SQL_CLIENT_ENTER),
+                             ('__exit__', LOCAL_SQL_CLIENT_EXIT)):
+            patcher = patch.object(dbaas.LocalSqlClient, name, method)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.engine = MagicMock()
+        self.conn = self.engine.connect.return_value
+
+    def test_commit_flushes_privileges(self):
+        with dbaas.LocalSqlClient(self.engine) as client:
+            client.execute('GRANT')
+
+        self.assertTrue(self.conn.begin.called)
+        self.conn.execute.assert_any_call(dbaas.FLUSH)
+        self.assertTrue(self.conn.begin.return_value.commit.called)
+        self.assertTrue(self.conn.close.called)
+
+    def test_read_only_skips_transaction_and_flush(self):
+        with dbaas.LocalSqlClient(self.engine, read_only=True) as client:
+            client.execute('SELECT')
+
+        self.assertFalse(self.conn.begin.called)
+        self.conn.execute.assert_called_once_with('SELECT')
+        self.assertTrue(self.conn.close.called)
+
+    def test_read_only_error_closes_connection(self):
+        self.conn.execute.side_effect = ValueError
+
+        def _read():
+            with dbaas.LocalSqlClient(self.engine, read_only=True) as client:
+                client.execute('SELECT')
+
+        self.assertRaises(ValueError, _read)
+        self.assertFalse(self.conn.begin.called)
+        self.assertTrue(self.conn.close.called)
+
+
 class MySqlAdminTest(testtools.TestCase):
 
     def setUp(self):
@@ -300,6 +346,57 @@ class MySqlAdminTest(testtools.TestCase):
                              "Create user queries are not the same")
             self.assertEqual(2, dbaas.LocalSqlClient.execute.call_count)
 
+    def test_bulk_create_databases(self):
+        dbaas.LocalSqlClient.execute.return_value = []
+
+        results = self.mySqlAdmin.bulk_create_databases([FAKE_DB, FAKE_DB_2])
+
+        self.assertEqual(3, dbaas.LocalSqlClient.execute.call_count)
+        args, kwargs = dbaas.LocalSqlClient.execute.call_args_list[0]
+        self.assertTrue("schema_name IN (:db0, :db1)" in args[0].text)
+        self.assertEqual({'db0': 'testDB', 'db1': 'testDB2'}, kwargs)
+        args, _ = dbaas.LocalSqlClient.execute.call_args_list[2]
+        self.assertTrue("CREATE DATABASE IF NOT EXISTS `testDB2`"
+                        in args[0].text)
+        self.assertEqual([{'name': 'testDB', 'status': 'created'},
+                          {'name': 'testDB2', 'status': 'created'}],
+                         results)
+
+    def test_bulk_create_databases_existing(self):
+        dbaas.LocalSqlClient.execute.return_value = [
+            {'schema_name': 'testDB2'}]
+
+        results = self.mySqlAdmin.bulk_create_databases([FAKE_DB, FAKE_DB_2])
+
+        self.assertEqual(1, dbaas.LocalSqlClient.execute.call_count)
+        self.assertEqual([{'name': 'testDB', 'status': 'skipped'},
+                          {'name': 'testDB2', 'status': 'exists'}],
+                         results)
+
+    def test_bulk_create_users(self):
+        dbaas.LocalSqlClient.execute.return_value = []
+        user = dict(FAKE_USER[0], _host='%')
+
+        results = self.mySqlAdmin.bulk_create_users([user])
+
+        self.assertEqual(3, dbaas.LocalSqlClient.execute.call_count)
+        args, kwargs = dbaas.LocalSqlClient.execute.call_args_list[0]
+        self.assertTrue("(User, Host) IN ((:user0, :host0))" in args[0].text)
+        self.assertEqual({'user0': 'random', 'host0': '%'}, kwargs)
+        self.assertEqual([{'name': 'random', 'host': '%',
+                           'status': 'created'}], results)
+
+    def test_bulk_create_users_existing(self):
+        dbaas.LocalSqlClient.execute.return_value = [
+            {'User': 'random', 'Host': '%'}]
+        user = dict(FAKE_USER[0], _host='%')
+
+        results = self.mySqlAdmin.bulk_create_users([user])
+
+        self.assertEqual(1, dbaas.LocalSqlClient.execute.call_count)
+        self.assertEqual([{'name': 'random', 'host': '%',
+                           'status': 'exists'}], results)
+
     def test_list_databases(self):
         self.mySqlAdmin.list_databases()
         args, _ = dbaas.LocalSqlClient.execute.call_args
@@ -443,6 +540,50 @@ class MySqlAdminTest(testtools.TestCase):
 
         self.assertTrue("AND Marker >= '" + marker + "'" in args[0].text)
 
+    def test_list_users_fetches_grants_in_page_query(self):
+        self.mySqlAdmin.list_users(limit=2)
+        self.assertEqual(1, dbaas.LocalSqlClient.execute.call_count)
+        args, _ = dbaas.LocalSqlClient.execute.call_args
+
+        expected = ["FROM information_schema.SCHEMA_PRIVILEGES",
+                    "GROUP BY grantee, table_schema",
+                    "LEFT JOIN",
+                    "ORDER BY page.Marker, grants.table_schema",
+                    ]
+        for text in expected:
+            self.assertTrue(text in args[0].text, "%s not in query." % text)
+
+    def test_list_users_groups_databases(self):
+        def _row(user, host, schema):
+            return {'User': user, 'Host': host,
+                    'Marker': '%s@%s' % (user, host),
+                    'table_schema': schema}
+        dbaas.LocalSqlClient.execute.return_value = [
+            _row('alice', '%', 'db1'),
+            _row('alice', '%', 'db2'),
+            _row('bob', '%', None),
+            _row('carol', '%', 'db1'),
+        ]
+
+        users, next_marker = self.mySqlAdmin.list_users(limit=2)
+
+        self.assertEqual(['alice', 'bob'], [user['_name'] for user in users])
+        self.assertEqual(['db1', 'db2'],
+                         [db['_name'] for db in users[0]['_databases']])
+        self.assertEqual([], users[1]['_databases'])
+        self.assertEqual('bob@%', next_marker)
+
+    def test_list_users_last_page(self):
+        dbaas.LocalSqlClient.execute.return_value = [
+            {'User': 'alice', 'Host': '%', 'Marker': 'alice@%',
+             'table_schema': 'db1'},
+        ]
+
+        users, next_marker = self.mySqlAdmin.list_users(limit=2)
+
+        self.assertEqual(1, len(users))
+        self.assertIsNone(next_marker)
+
     def test_get_user(self):
         """
         Unit tests for mySqlAdmin.get_user.
@@ -1131,6 +1272,75 @@ class BaseDbStatusTest(testtools.TestCase):
                          wait_for_real_status_to_change_to
                          (rd_instance.ServiceStatuses.SHUTDOWN, 10))
 
+    def _running_status(self, last_report_age=0):
+        self.baseDbStatus = BaseDbStatus()
+        self.baseDbStatus.status = rd_instance.ServiceStatuses.RUNNING
+        self.baseDbStatus._last_report = time.time() - last_report_age
+        # The agent started more than a keep-alive interval ago.
+        self.baseDbStatus._report_all_until = 0
+        self.baseDbStatus._get_actual_db_status = Mock(
+            return_value=rd_instance.ServiceStatuses.RUNNING)
+        patcher = patch.object(self.baseDbStatus, 'set_status')
+        self.set_status = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_update_unchanged_status(self):
+        self._running_status()
+
+        self.baseDbStatus.update()
+
+        self.assertTrue(self.baseDbStatus._get_actual_db_status.called)
+        self.assertFalse(self.set_status.called)
+
+    def test_update_changed_status(self):
+        self._running_status()
+        self.baseDbStatus._get_actual_db_status.return_value = (
+            rd_instance.ServiceStatuses.SHUTDOWN)
+
+        self.baseDbStatus.update()
+
+        self.set_status.assert_called_once_with(
+            rd_instance.ServiceStatuses.SHUTDOWN)
+
+    def test_update_keepalive(self):
+        self._running_status(
+            last_report_age=dbaas.CONF.status_keepalive_interval)
+
+        self.baseDbStatus.update()
+
+        self.set_status.assert_called_once_with(
+            rd_instance.ServiceStatuses.RUNNING)
+
+    def test_update_hung_server(self):
+        self._running_status()
+        self.baseDbStatus._get_actual_db_status.return_value = (
+            rd_instance.ServiceStatuses.BLOCKED)
+
+        self.baseDbStatus.update()
+
+        self.set_status.assert_called_once_with(
+            rd_instance.ServiceStatuses.BLOCKED)
+
+    def test_update_reports_all_after_start(self):
+        self._running_status()
+        self.baseDbStatus._report_all()
+
+        self.baseDbStatus.update()
+
+        self.set_status.assert_called_once_with(
+            rd_instance.ServiceStatuses.RUNNING)
+
+    def test_update_reports_all_after_restart(self):
+        self._running_status()
+        self.baseDbStatus.begin_restart()
+        self.baseDbStatus.end_install_or_restart()
+        self.set_status.reset_mock()
+
+        self.baseDbStatus.update()
+
+        self.set_status.assert_called_once_with(
+            rd_instance.ServiceStatuses.RUNNING)
+
 
 class MySqlAppStatusTest(testtools.TestCase):
 
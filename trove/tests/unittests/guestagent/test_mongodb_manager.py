@@ -17,6 +17,7 @@ import os
 import testtools
 from mock import MagicMock
 from trove.common.context import TroveContext
+from trove.guestagent import backup
 from trove.guestagent import volume
 from trove.guestagent.datastore.mongodb import service as mongo_service
 from trove.guestagent.datastore.mongodb import manager as mongo_manager
@@ -36,6 +37,7 @@ class GuestAgentMongoDBManagerTest(testtools.TestCase):
         self.origin_mount = volume.VolumeDevice.mount
         self.origin_stop_db = mongo_service.MongoDBApp.stop_db
         self.origin_start_db = mongo_service.MongoDBApp.start_db
+        self.origin_restore = backup.restore
 
     def tearDown(self):
         super(GuestAgentMongoDBManagerTest, self).tearDown()
@@ -46,6 +48,7 @@ class GuestAgentMongoDBManagerTest(testtools.TestCase):
         volume.VolumeDevice.mount = self.origin_mount
         mongo_service.MongoDBApp.stop_db = self.origin_stop_db
         mongo_service.MongoDBApp.start_db = self.origin_start_db
+        backup.restore = self.origin_restore
 
     def test_update_status(self):
         self.manager.status = MagicMock()
@@ -78,6 +81,7 @@ class GuestAgentMongoDBManagerTest(testtools.TestCase):
         mock_app.start_db = MagicMock(return_value=None)
         mock_app.clear_storage = MagicMock(return_value=None)
         os.path.exists = MagicMock(return_value=is_db_installed)
+        backup.restore = MagicMock(return_value=None)
 
         # invocation
         self.manager.prepare(context=self.context, databases=None,
@@ -93,3 +97,6 @@ class GuestAgentMongoDBManagerTest(testtools.TestCase):
         mock_app.stop_db.assert_any_call()
         VolumeDevice.format.assert_any_call()
         VolumeDevice.migrate_data.assert_any_call('/var/lib/mongodb')
+        if backup_info:
+            backup.restore.assert_any_call(self.context, backup_info,
+                                           '/var/lib/mongodb')
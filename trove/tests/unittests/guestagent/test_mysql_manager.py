@@ -16,6 +16,7 @@ import os
 
 import testtools
 from mock import MagicMock
+from mock import patch
 from testtools.matchers import Is, Equals, Not
 from trove.common.context import TroveContext
 from trove.guestagent import volume
@@ -70,6 +71,18 @@ class GuestAgentManagerTest(testtools.TestCase):
         self.manager.create_user(self.context, ['user1'])
         dbaas.MySqlAdmin.create_user.assert_any_call(['user1'])
 
+    def test_bulk_create_databases(self):
+        with patch.object(dbaas.MySqlAdmin, 'bulk_create_databases',
+                          return_value=[]) as bulk_create:
+            self.manager.bulk_create_databases(self.context, ['db1'])
+            bulk_create.assert_any_call(['db1'])
+
+    def test_bulk_create_users(self):
+        with patch.object(dbaas.MySqlAdmin, 'bulk_create_users',
+                          return_value=[]) as bulk_create:
+            self.manager.bulk_create_users(self.context, ['user1'])
+            bulk_create.assert_any_call(['user1'])
+
     def test_delete_database(self):
         databases = ['db1']
         dbaas.MySqlAdmin.delete_database = MagicMock(return_value=None)
@@ -67,6 +67,12 @@ class RedisGuestAgentManagerTest(testtools.TestCase):
     def test_prepare_redis_not_installed(self):
         self._prepare_dynamic(is_redis_installed=False)
 
+    def test_prepare_redis_from_backup(self):
+        self._prepare_dynamic(backup_info={'id': 'backup_id_123abc',
+                                           'location': 'fake-location',
+                                           'type': 'RedisBackup',
+                                           'checksum': 'fake-checksum'})
+
     def _prepare_dynamic(self, device_path='/dev/vdb', is_redis_installed=True,
                          backup_info=None, is_root_enabled=False,
                          mount_point='var/lib/redis'):
@@ -96,6 +102,11 @@ class RedisGuestAgentManagerTest(testtools.TestCase):
         redis_service.RedisApp.install_if_needed.assert_any_call(self.packages)
         redis_service.RedisApp.write_config.assert_any_call(None)
         redis_service.RedisApp.complete_install_or_restart.assert_any_call()
+        if backup_info:
+            backup.restore.assert_any_call(self.context, backup_info,
+                                           '/var/lib/redis')
+        else:
+            self.assertFalse(backup.restore.called)
 
     def test_restart(self):
         mock_status = MagicMock()
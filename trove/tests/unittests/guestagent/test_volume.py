@@ -11,13 +11,19 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import json
 import os
+import shutil
+import tempfile
 import testtools
 import pexpect
-from mock import Mock, MagicMock
+from mock import Mock, MagicMock, patch
 from trove.guestagent import volume
+from trove.common import cfg
 from trove.common import utils
 
+CONF = cfg.CONF
+
 
 def _setUp_fake_spawn(return_val=0):
     fake_spawn = pexpect.spawn('echo')
@@ -44,9 +50,12 @@ class VolumeDeviceTest(testtools.TestCase):
 
         origin_unmount = self.volumeDevice.unmount
         self.volumeDevice.unmount = MagicMock()
-        self.volumeDevice.migrate_data('/')
+        with patch.object(volume, 'DataMigration') as migration:
+            self.volumeDevice.migrate_data('/var/lib/mysql')
+        migration.assert_called_once_with('/var/lib/mysql/',
+                                          volume.TMP_MOUNT_POINT, '/dev/vdb')
+        migration.return_value.run.assert_called_once_with()
         self.assertEqual(1, fake_spawn.expect.call_count)
-        self.assertEqual(1, utils.execute.call_count)
         self.assertEqual(1, self.volumeDevice.unmount.call_count)
         utils.execute = origin_execute
         self.volumeDevice.unmount = origin_unmount
@@ -146,6 +155,164 @@ class VolumeDeviceTest(testtools.TestCase):
         os.path.exists = origin_
 
 
+class DataMigrationTest(testtools.TestCase):
+
+    def setUp(self):
+        super(DataMigrationTest, self).setUp()
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.checkpoint = os.path.join(tmp_dir, 'migration')
+        CONF.set_override('volume_migration_checkpoint', self.checkpoint)
+        CONF.set_override('volume_migration_batch_size', 1)
+        self.addCleanup(CONF.clear_override, 'volume_migration_checkpoint')
+        self.addCleanup(CONF.clear_override, 'volume_migration_batch_size')
+        # Three files of 512K and one of 2M
+        self.listing = ''.join('%s %s\0' % (size, name) for size, name in
+                               [(524288, 'ibdata1'), (524288, 'db/t.frm'),
+                                (524288, 'db/t.ibd'), (2097152, 'ib_log')])
+        self.batches = []
+        patcher = patch.object(volume.utils, 'execute',
+                               side_effect=self._execute)
+        self.execute = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(volume.conductor_api, 'API')
+        self.conductor = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.uuid = 'f1e2d3c4'
+        self.migration = volume.DataMigration('/var/lib/mysql/',
+                                              '/mnt/volume', '/dev/vdb')
+
+    def _execute(self, *cmd, **kwargs):
+        if cmd[1] == 'find':
+            return self.listing, ''
+        if cmd[1] == 'blkid':
+            return '%s\n' % self.uuid, ''
+        files_from = [arg for arg in cmd if arg.startswith('--files-from=')]
+        if files_from:
+            with open(files_from[0][len('--files-from='):]) as fd:
+                self.batches.append(fd.read().split('\0'))
+        return '', ''
+
+    def test_plan(self):
+        batches = self.migration._plan()
+
+        self.assertEqual([{'size': 1048576, 'files': ['ibdata1',
+                                                      'db/t.frm']},
+                          {'size': 2621440, 'files': ['db/t.ibd',
+                                                      'ib_log']}],
+                         batches)
+
+    def test_run(self):
+        self.migration.run()
+
+        self.assertEqual([['db/t.ibd', 'ib_log'], ['ibdata1', 'db/t.frm']],
+                         sorted(self.batches))
+        # The filesystem UUID, the directory tree, the listing and the two
+        # batches
+        self.assertEqual(5, self.execute.call_count)
+        self.assertFalse(os.path.exists(self.checkpoint))
+        self.assertFalse(os.path.exists(self.migration.plan))
+        self.assertEqual(2, self.conductor.heartbeat.call_count)
+        payload = self.conductor.heartbeat.call_args[0][1]
+        self.assertEqual(3670016, payload['data_migration']['copied'])
+        self.assertEqual(3670016, payload['data_migration']['total'])
+
+    def _interrupt(self):
+        self.migration._start_checkpoint(
+            {'source': '/var/lib/mysql/', 'volume': self.uuid,
+             'batches': self.migration._plan()})
+        self.migration._checkpoint_batch(0)
+        self.execute.reset_mock()
+
+    def test_run_resumes(self):
+        self._interrupt()
+
+        self.migration.run()
+
+        self.assertEqual([['db/t.ibd', 'ib_log']], self.batches)
+        self.assertEqual(2, self.execute.call_count)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_run_resumes_after_format(self):
+        self._interrupt()
+        device = volume.VolumeDevice('/dev/vdb')
+        with patch.object(device, '_format') as format:
+            device.format()
+        self.assertFalse(format.called)
+
+        self.migration.run()
+
+        self.assertEqual([['db/t.ibd', 'ib_log']], self.batches)
+
+    def test_run_after_format(self):
+        self._interrupt()
+        # The volume was formatted since the checkpoint was written.
+        self.uuid = 'a9b8c7d6'
+
+        self.migration.run()
+
+        self.assertEqual(2, len(self.batches))
+        self.assertTrue(any('--include=*/' in call[0]
+                            for call in self.execute.call_args_list))
+
+    def test_format_discards_checkpoint(self):
+        self._interrupt()
+        self.uuid = 'a9b8c7d6'
+        device = volume.VolumeDevice('/dev/vdb')
+        with patch.object(device, '_format') as format:
+            with patch.object(device, '_check_format'):
+                device.format()
+
+        self.assertEqual(1, format.call_count)
+        self.assertFalse(os.path.exists(self.checkpoint))
+        self.assertFalse(os.path.exists(self.migration.plan))
+
+    def test_run_ignores_other_checkpoint(self):
+        with open(self.migration.plan, 'w') as fd:
+            json.dump([], fd)
+        with open(self.checkpoint, 'w') as fd:
+            fd.write('%s\n' % json.dumps({'source': '/var/lib/other/',
+                                          'volume': self.uuid}))
+
+        self.migration.run()
+
+        self.assertEqual(2, len(self.batches))
+
+    def test_run_failed_batch_checkpointed(self):
+        def _execute(*cmd):
+            if '--files-from=' in ' '.join(cmd) and self.batches:
+                raise volume.ProcessExecutionError('rsync failed')
+            return self._execute(*cmd)
+        self.execute.side_effect = _execute
+        CONF.set_override('volume_migration_workers', 1)
+        self.addCleanup(CONF.clear_override, 'volume_migration_workers')
+
+        self.assertRaises(volume.ProcessExecutionError, self.migration.run)
+
+        # Only the index of the batch done is added after the plan.
+        with open(self.checkpoint) as fd:
+            self.assertEqual(['0\n'], fd.readlines()[1:])
+        with open(self.migration.plan) as fd:
+            self.assertEqual(self.migration._plan(), json.load(fd))
+
+    def test_run_resumes_without_cut_short_batch(self):
+        self._interrupt()
+        with open(self.checkpoint, 'a') as fd:
+            fd.write('1')
+
+        self.migration.run()
+
+        self.assertEqual([['db/t.ibd', 'ib_log']], self.batches)
+
+    def test_run_without_plan(self):
+        self._interrupt()
+        os.remove(self.migration.plan)
+
+        self.migration.run()
+
+        self.assertEqual(2, len(self.batches))
+
+
 class VolumeMountPointTest(testtools.TestCase):
     def setUp(self):
         super(VolumeMountPointTest, self).setUp()
@@ -12,16 +12,23 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from eventlet import greenpool
 from mock import Mock
+from mock import patch
+from novaclient import exceptions as nova_exceptions
 from testtools import TestCase
 from trove.common import cfg
+from trove.common import utils
 from trove.common.instance import ServiceStatuses
+from trove.instance import models
 from trove.instance.models import filter_ips
 from trove.instance.models import InstanceServiceStatus
 from trove.instance.models import DBInstance
 from trove.instance.models import Instance
+from trove.instance.models import Instances
 from trove.instance.models import SimpleInstance
 from trove.instance.tasks import InstanceTasks
+from trove.tests.unittests.util import util
 
 CONF = cfg.CONF
 
@@ -84,3 +91,86 @@ class SimpleInstanceTest(TestCase):
         self.assertTrue('10.123.123.123' in ip)
         self.assertTrue('123.123.123.123' in ip)
         self.assertTrue('15.123.123.123' in ip)
+
+
+class InstancesLoadTest(TestCase):
+
+    def setUp(self):
+        super(InstancesLoadTest, self).setUp()
+        util.init_db()
+        self.context = Mock(tenant=utils.generate_uuid())
+        self.db_infos = [self._create_instance(InstanceTasks.NONE),
+                         self._create_instance(InstanceTasks.NONE),
+                         self._create_instance(InstanceTasks.BUILDING)]
+        self.servers = dict((db.compute_instance_id,
+                             Mock(id=db.compute_instance_id,
+                                  status='ACTIVE'))
+                            for db in self.db_infos[:1])
+        self.client = Mock()
+        self.client.servers.get.side_effect = self._get_server
+
+    def _create_instance(self, task_status):
+        db_info = DBInstance.create(name='instance',
+                                    tenant_id=self.context.tenant,
+                                    compute_instance_id=utils.generate_uuid(),
+                                    datastore_version_id='ds-version-id',
+                                    task_status=task_status)
+        status = InstanceServiceStatus.create(
+            instance_id=db_info.id, status=ServiceStatuses.RUNNING)
+        self.addCleanup(status.delete)
+        self.addCleanup(db_info.delete)
+        return db_info
+
+    def _get_server(self, server_id):
+        try:
+            return self.servers[server_id]
+        except KeyError:
+            raise nova_exceptions.NotFound(404)
+
+    def test_load_page_servers(self):
+        with patch.object(models, 'create_nova_client',
+                          return_value=self.client):
+            servers = Instances._load_page_servers(self.context,
+                                                   self.db_infos)
+        self.assertEqual(self.servers.values(), servers)
+        # Building instances are not looked up and the tenant's servers
+        # are never listed.
+        self.assertEqual(sorted(db.compute_instance_id
+                                for db in self.db_infos[:2]),
+                         sorted(call[0][0] for call in
+                                self.client.servers.get.call_args_list))
+        self.assertFalse(self.client.servers.list.called)
+
+    def test_load_page_servers_concurrency(self):
+        CONF.set_override('server_load_concurrency', 1)
+        self.addCleanup(CONF.clear_override, 'server_load_concurrency')
+        with patch.object(models, 'create_nova_client',
+                          return_value=self.client):
+            with patch.object(models, 'greenpool') as pool:
+                pool.GreenPool.side_effect = greenpool.GreenPool
+                servers = Instances._load_page_servers(self.context,
+                                                       self.db_infos)
+        pool.GreenPool.assert_called_once_with(1)
+        self.assertEqual(self.servers.values(), servers)
+
+    def test_load_servers_status(self):
+        find_server = models.create_server_list_matcher(
+            self.servers.values())
+        loaded = Instances._load_servers_status(
+            lambda context, db, status, server=None: (db, status, server),
+            self.context, self.db_infos, find_server)
+        self.assertEqual(['ACTIVE', 'SHUTDOWN', 'BUILD'],
+                         [db.server_status for db, _, _ in loaded])
+        self.assertEqual([db.id for db in self.db_infos],
+                         [status.instance_id for _, status, _ in loaded])
+        self.assertEqual(self.servers.values() + [None, None],
+                         [server for _, _, server in loaded])
+
+    def test_load_servers_status_missing(self):
+        self.db_infos.append(DBInstance(InstanceTasks.NONE,
+                                        id=utils.generate_uuid()))
+        find_server = models.create_server_list_matcher([])
+        loaded = Instances._load_servers_status(
+            lambda context, db, status, server=None: db,
+            self.context, self.db_infos, find_server)
+        self.assertEqual(3, len(loaded))
@@ -0,0 +1,76 @@
+# Copyright 2014 OpenStack Foundation
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import Mock
+from mock import patch
+from novaclient.v1_1 import servers
+from testtools import TestCase
+from trove.instance import server_cache
+from trove.openstack.common import memorycache
+from trove.openstack.common import timeutils
+
+
+class ServerCacheTest(TestCase):
+
+    def setUp(self):
+        super(ServerCacheTest, self).setUp()
+        self.manager = Mock(resource_class=servers.Server)
+        self.server = servers.Server(self.manager,
+                                     {'id': 'server-id',
+                                      'status': 'ACTIVE',
+                                      'addresses': {'private': []}},
+                                     loaded=True)
+        self.cache = server_cache.ServerCache(memorycache.Client(), ttl=5)
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+
+    def test_get_cached_server(self):
+        self.cache.set(self.server)
+        server = self.cache.get(self.manager, 'server-id')
+        self.assertEqual('ACTIVE', server.status)
+        self.assertEqual({'private': []}, server.addresses)
+        self.assertEqual(self.manager, server.manager)
+
+    def test_get_uncached_server(self):
+        self.assertIsNone(self.cache.get(self.manager, 'server-id'))
+
+    def test_cached_server_expires(self):
+        self.cache.set(self.server)
+        timeutils.advance_time_seconds(5)
+        self.assertIsNone(self.cache.get(self.manager, 'server-id'))
+
+    def test_invalidate(self):
+        self.cache.set(self.server)
+        self.cache.invalidate('server-id')
+        self.assertIsNone(self.cache.get(self.manager, 'server-id'))
+
+    def test_disabled(self):
+        cache = server_cache.ServerCache(memorycache.Client(), ttl=0)
+        cache.set(self.server)
+        self.assertIsNone(cache.get(self.manager, 'server-id'))
+
+    def test_get_server(self):
+        client = Mock()
+        client.servers = self.manager
+        self.manager.get.return_value = self.server
+        with patch.object(server_cache, 'get_cache',
+                          return_value=self.cache):
+            server_cache.get_server(client, 'server-id')
+            server = server_cache.get_server(client, 'server-id')
+            self.assertEqual(1, self.manager.get.call_count)
+            self.assertEqual('ACTIVE', server.status)
+
+            server_cache.get_server(client, 'server-id', use_cache=False)
+            self.assertEqual(2, self.manager.get.call_count)
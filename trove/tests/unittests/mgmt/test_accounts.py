@@ -0,0 +1,119 @@
+#    Copyright 2014 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import MagicMock
+from mock import patch
+from testtools import TestCase
+
+from trove.common import cfg
+from trove.common import utils
+from trove.extensions.account import models
+from trove.instance.models import DBInstance
+from trove.instance.tasks import InstanceTasks
+from trove.tests.unittests.util import util
+
+CONF = cfg.CONF
+
+
+class AccountsSummaryTest(TestCase):
+
+    def setUp(self):
+        super(AccountsSummaryTest, self).setUp()
+        util.init_db()
+        # Runs last, once the instances are deleted.
+        self.addCleanup(models.AccountSummary.refresh)
+        # Tenants sorting after any other tenant in the test database.
+        self.prefix = 'zz-%s' % utils.generate_uuid()
+        self.tenants = ['%s-%s' % (self.prefix, i) for i in range(3)]
+        for tenant_id, count in zip(self.tenants, [2, 1, 3]):
+            for i in range(count):
+                self._create_instance(tenant_id)
+        self._create_instance(self.tenants[1], deleted=True)
+
+    def _create_instance(self, tenant_id, deleted=False):
+        db_info = DBInstance.create(
+            name='account-instance',
+            compute_instance_id=utils.generate_uuid(),
+            task_status=InstanceTasks.NONE,
+            tenant_id=tenant_id,
+            datastore_version_id=utils.generate_uuid())
+        if deleted:
+            db_info.delete()
+        else:
+            self.addCleanup(db_info.delete)
+
+    def _context(self, limit=None, marker=None):
+        return MagicMock(limit=limit, marker=marker or self.prefix)
+
+    def test_instance_counts(self):
+        counts = models.instance_counts(marker=self.prefix)
+
+        self.assertEqual(zip(self.tenants, [2, 1, 3]), counts)
+
+    def test_load(self):
+        summary = models.AccountsSummary.load(self._context())
+
+        self.assertEqual([{'id': self.tenants[0], 'num_instances': 2},
+                          {'id': self.tenants[1], 'num_instances': 1},
+                          {'id': self.tenants[2], 'num_instances': 3}],
+                         summary.accounts)
+        self.assertIsNone(summary.next_marker)
+
+    def test_load_pages(self):
+        summary = models.AccountsSummary.load(self._context(limit=2))
+
+        self.assertEqual(self.tenants[:2],
+                         [account['id'] for account in summary.accounts])
+        self.assertEqual(self.tenants[1], summary.next_marker)
+
+        summary = models.AccountsSummary.load(
+            self._context(limit=2, marker=summary.next_marker))
+
+        self.assertEqual([{'id': self.tenants[2], 'num_instances': 3}],
+                         summary.accounts)
+        self.assertIsNone(summary.next_marker)
+
+    def test_load_refreshed_summaries(self):
+        CONF.set_override('account_summary_refresh_ticks', 10)
+        self.addCleanup(CONF.clear_override, 'account_summary_refresh_ticks')
+
+        models.AccountSummary.refresh()
+        self._create_instance(self.tenants[0])
+        summary = models.AccountsSummary.load(self._context())
+
+        # Counts are only as fresh as the last refresh.
+        self.assertEqual([2, 1, 3], [account['num_instances']
+                                     for account in summary.accounts])
+
+        models.AccountSummary.refresh()
+        summary = models.AccountsSummary.load(self._context())
+
+        self.assertEqual([3, 1, 3], [account['num_instances']
+                                     for account in summary.accounts])
+
+    def test_load_account_pages(self):
+        context = MagicMock(limit=2, marker=None)
+        with patch.object(models, 'create_nova_client'):
+            with patch.object(models.MgmtInstances,
+                              'load_status_from_existing',
+                              side_effect=lambda ctx, db_infos, servers:
+                              db_infos):
+                account = models.Account.load(context, self.tenants[2])
+                context.marker = account.next_marker
+                last_page = models.Account.load(context, self.tenants[2])
+
+        self.assertEqual(2, len(account.instances))
+        self.assertEqual(account.instances[-1].id, account.next_marker)
+        self.assertEqual(1, len(last_page.instances))
+        self.assertIsNone(last_page.next_marker)
@@ -0,0 +1,181 @@
+#    Copyright 2014 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from mock import MagicMock
+from mock import patch
+from testtools import TestCase
+
+from trove.common import cfg
+from trove.common import exception
+from trove.common import utils
+from trove.common.instance import ServiceStatuses
+from trove.extensions.mgmt.host import models
+from trove.extensions.mgmt.host import views
+from trove.instance.models import DBInstance
+from trove.instance.models import InstanceServiceStatus
+from trove.instance.tasks import InstanceTasks
+from trove.taskmanager import models as taskmanager_models
+from trove.tests.unittests.util import util
+
+CONF = cfg.CONF
+
+
+class HostInfo(object):
+
+    def __init__(self, name, server_ids):
+        self.name = name
+        self.percentUsed = 10
+        self.totalRAM = 2048
+        self.usedRAM = 1024
+        self.instances = [{'uuid': server_id, 'name': server_id}
+                          for server_id in server_ids]
+
+
+class DetailedHostTest(TestCase):
+
+    def setUp(self):
+        super(DetailedHostTest, self).setUp()
+        util.init_db()
+        self.db_infos = []
+        for i in range(3):
+            db_info = DBInstance.create(
+                name='host-instance-%s' % i,
+                compute_instance_id=utils.generate_uuid(),
+                task_status=InstanceTasks.NONE,
+                tenant_id='tenant-%s' % i,
+                datastore_version_id=utils.generate_uuid())
+            status = InstanceServiceStatus.create(
+                instance_id=db_info.id, status=ServiceStatuses.RUNNING)
+            self.db_infos.append(db_info)
+            self.addCleanup(db_info.delete)
+            self.addCleanup(status.delete)
+
+    def _server_ids(self):
+        return [db_info.compute_instance_id for db_info in self.db_infos]
+
+    def test_load_instances_in_batch(self):
+        unknown = utils.generate_uuid()
+        host_info = HostInfo('host1', self._server_ids() + [unknown])
+
+        with patch.object(models, 'SimpleInstance') as simple_instance:
+            simple_instance.return_value.status = 'ACTIVE'
+            with patch.object(DBInstance, 'find_by') as find_by:
+                host = models.DetailedHost(host_info)
+        self.assertFalse(find_by.called)
+
+        self.assertEqual(4, len(host.instances))
+        for db_info, instance in zip(self.db_infos, host.instances):
+            self.assertEqual(db_info.id, instance['id'])
+            self.assertEqual(db_info.tenant_id, instance['tenant_id'])
+            self.assertEqual(db_info.compute_instance_id,
+                             instance['server_id'])
+            self.assertEqual('ACTIVE', instance['status'])
+            self.assertFalse('uuid' in instance)
+        self.assertEqual(unknown, host.instances[3]['server_id'])
+        self.assertIsNone(host.instances[3]['id'])
+
+    def test_update_all_starts_job(self):
+        host_info = HostInfo('host1', self._server_ids())
+        host_info.instances[0]['uuid'] = utils.generate_uuid()
+        with patch.object(models, 'SimpleInstance'):
+            host = models.DetailedHost(host_info)
+
+        with patch.object(models.task_api, 'API') as task_api:
+            job = host.update_all(MagicMock())
+        self.addCleanup(job.delete)
+
+        task_api.return_value.update_host_guests.assert_called_once_with(
+            job.id)
+        self.assertEqual(models.HostJob.QUEUED, job.state)
+        self.assertEqual([models.HostJob.INSTANCE_SKIPPED,
+                          models.HostJob.INSTANCE_PENDING,
+                          models.HostJob.INSTANCE_PENDING],
+                         [instance['status'] for instance in job.instances])
+
+
+class HostJobTest(TestCase):
+
+    def setUp(self):
+        super(HostJobTest, self).setUp()
+        util.init_db()
+        self.instances = [{'id': 'instance-%s' % i, 'server_id': 'server-%s'
+                           % i} for i in range(5)]
+        self.job = models.HostJob.create('host1', 'update', self.instances)
+        self.addCleanup(self.job.delete)
+
+    def test_load(self):
+        job = models.HostJob.load('host1', self.job.id)
+
+        self.assertEqual(self.job.id, job.id)
+        self.assertEqual(5, len(job.instances))
+        self.assertRaises(exception.NotFound, models.HostJob.load,
+                          'host2', self.job.id)
+
+    def test_load_all(self):
+        job = models.HostJob.create('host1', 'update', self.instances)
+        self.addCleanup(job.delete)
+
+        jobs = models.HostJob.load_all('host1')
+
+        self.assertEqual(set([self.job.id, job.id]),
+                         set(host_job.id for host_job in jobs))
+        self.assertEqual([], models.HostJob.load_all('host2'))
+
+    def test_update_guests(self):
+        CONF.set_override('host_update_concurrency', 2)
+        self.addCleanup(CONF.clear_override, 'host_update_concurrency')
+        saved = []
+        save_progress = self.job.save_progress
+
+        def _save_progress(instances, state=None):
+            saved.append(sum(1 for instance in instances
+                             if instance['status'] !=
+                             models.HostJob.INSTANCE_PENDING))
+            save_progress(instances, state)
+
+        client = MagicMock()
+        client.update_guest.side_effect = [None, None,
+                                           exception.GuestError('boom'),
+                                           None, None]
+        with patch.object(taskmanager_models.HostJob, 'find_by',
+                          return_value=self.job):
+            with patch.object(self.job, 'save_progress',
+                              side_effect=_save_progress):
+                with patch.object(taskmanager_models.remote,
+                                  'create_guest_client',
+                                  return_value=client):
+                    taskmanager_models.HostTasks.update_guests(
+                        MagicMock(), self.job.id)
+
+        self.assertEqual(5, client.update_guest.call_count)
+        # Progress is saved once per instance as its guest is updated.
+        self.assertEqual([0, 1, 2, 3, 4, 5, 5], saved)
+        job = models.HostJob.load('host1', self.job.id)
+        self.assertEqual(models.HostJob.FAILED, job.state)
+        statuses = [instance['status'] for instance in job.instances]
+        self.assertEqual(4, statuses.count(models.HostJob.INSTANCE_UPDATED))
+        self.assertEqual(1, statuses.count(models.HostJob.INSTANCE_FAILED))
+        data = views.HostJobView(job).data()['job']
+        self.assertEqual({'UPDATED': 4, 'FAILED': 1}, data['counts'])
+
+    def test_update_guests_completed(self):
+        client = MagicMock()
+        with patch.object(taskmanager_models.remote, 'create_guest_client',
+                          return_value=client):
+            taskmanager_models.HostTasks.update_guests(MagicMock(),
+                                                       self.job.id)
+
+        job = models.HostJob.load('host1', self.job.id)
+        self.assertEqual(models.HostJob.COMPLETED, job.state)
+        self.assertEqual(5, client.update_guest.call_count)
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 #
+import contextlib
+
 from mock import MagicMock, patch, ANY
 from testtools import TestCase
 from testtools.matchers import Equals, Is, Not
@@ -56,6 +58,15 @@ class MockMgmtInstanceTest(TestCase):
     def tearDown(self):
         super(MockMgmtInstanceTest, self).tearDown()
 
+    @contextlib.contextmanager
+    def page_instances(self, instances):
+        db_infos = [instance.db_info for instance in instances]
+        with patch.object(mgmtmodels.NotificationTransformer,
+                          '_page_db_infos', return_value=[db_infos]):
+            with patch.object(mgmtmodels.NovaNotificationTransformer,
+                              '_load_instances', return_value=instances):
+                yield
+
     @staticmethod
     def build_db_instance(status, task_status=InstanceTasks.DELETING):
         return DBInstance(task_status,
@@ -79,8 +90,8 @@ class TestNotificationTransformer(MockMgmtInstanceTest):
         db_instance = MockMgmtInstanceTest.build_db_instance(
             status, InstanceTasks.BUILDING)
 
-        with patch.object(DatabaseModelBase, 'find_all',
-                          return_value=[db_instance]):
+        with patch.object(mgmtmodels.NotificationTransformer,
+                          '_page_db_infos', return_value=[[db_instance]]):
             stub_dsv_db_info = MagicMock(
                 spec=datastore_models.DBDatastoreVersion)
             stub_dsv_db_info.id = "test_datastore_version"
@@ -93,16 +104,16 @@ class TestNotificationTransformer(MockMgmtInstanceTest):
             stub_datastore_version = datastore_models.DatastoreVersion(
                 stub_dsv_db_info)
 
-            def side_effect_func(*args, **kwargs):
-                if 'instance_id' in kwargs:
-                    return InstanceServiceStatus(
-                        rd_instance.ServiceStatuses.BUILDING)
-                else:
-                    return stub_datastore_version
+            service_status = InstanceServiceStatus(
+                rd_instance.ServiceStatuses.BUILDING,
+                instance_id=db_instance.id)
 
             with patch.object(DatabaseModelBase, 'find_by',
-                              side_effect=side_effect_func):
-                payloads = transformer()
+                              return_value=stub_datastore_version):
+                with patch.object(InstanceServiceStatus, 'query') as query:
+                    query.return_value.filter.return_value.all.return_value = [
+                        service_status]
+                    payloads = transformer()
                 self.assertIsNotNone(payloads)
                 self.assertThat(len(payloads), Equals(1))
                 payload = payloads[0]
@@ -111,6 +122,21 @@ class TestNotificationTransformer(MockMgmtInstanceTest):
                 self.assertThat(payload['audit_period_ending'], Not(Is(None)))
                 self.assertThat(payload['state'], Equals(status.lower()))
 
+    def test_page_db_infos(self):
+        CONF.set_override('exists_notification_batch_size', 2)
+        self.addCleanup(CONF.clear_override, 'exists_notification_batch_size')
+        transformer = mgmtmodels.NotificationTransformer(context=self.context)
+        query = MagicMock()
+        query.paginated_collection.side_effect = [(['a', 'b'], 'b'),
+                                                  (['c'], None)]
+
+        with patch.object(DBInstance, 'find_all', return_value=query):
+            pages = list(transformer._page_db_infos())
+
+        self.assertEqual([['a', 'b'], ['c']], pages)
+        query.paginated_collection.assert_any_call(limit=2, marker=None)
+        query.paginated_collection.assert_any_call(limit=2, marker='b')
+
     def test_get_service_id(self):
         id_map = {
             'mysql': '123',
@@ -153,6 +179,20 @@ class TestNovaNotificationTransformer(MockMgmtInstanceTest):
             self.assertThat(transformer._lookup_flavor('2'),
                             Equals('unknown'))
 
+    def test_load_flavors(self):
+        flavors = [MagicMock(spec=Flavor, id=i) for i in range(1, 3)]
+        for flavor in flavors:
+            flavor.name = 'db.%s' % flavor.id
+        transformer = mgmtmodels.NovaNotificationTransformer(
+            context=self.context)
+
+        with patch.object(self.flavor_mgr, 'list', return_value=flavors):
+            with patch.object(self.flavor_mgr, 'get') as get:
+                transformer._load_flavors()
+                self.assertThat(transformer._lookup_flavor('2'),
+                                Equals('db.2'))
+        self.assertFalse(get.called)
+
     def test_tranformer(self):
         status = rd_instance.ServiceStatuses.BUILDING.api_status
         db_instance = MockMgmtInstanceTest.build_db_instance(
@@ -182,8 +222,7 @@ class TestNovaNotificationTransformer(MockMgmtInstanceTest):
         with patch.object(DatabaseModelBase, 'find_by',
                           return_value=stub_datastore_version):
 
-            with patch.object(mgmtmodels, 'load_mgmt_instances',
-                              return_value=[mgmt_instance]):
+            with self.page_instances([mgmt_instance]):
 
                 with patch.object(self.flavor_mgr, 'get', return_value=flavor):
 
@@ -235,8 +274,7 @@ class TestNovaNotificationTransformer(MockMgmtInstanceTest):
                                                                   db_instance,
                                                                   server,
                                                                   None)
-                    with patch.object(mgmtmodels, 'load_mgmt_instances',
-                                      return_value=[mgmt_instance]):
+                    with self.page_instances([mgmt_instance]):
                         with patch.object(self.flavor_mgr,
                                           'get', return_value=flavor):
 
@@ -281,8 +319,7 @@ class TestNovaNotificationTransformer(MockMgmtInstanceTest):
 
         with patch.object(Backup, 'running', return_value=None):
             self.assertThat(mgmt_instance.status, Equals('SHUTDOWN'))
-            with patch.object(mgmtmodels, 'load_mgmt_instances',
-                              return_value=[mgmt_instance]):
+            with self.page_instances([mgmt_instance]):
                 with patch.object(self.flavor_mgr, 'get', return_value=flavor):
                     # invocation
                     transformer = mgmtmodels.NovaNotificationTransformer(
@@ -305,8 +342,7 @@ class TestNovaNotificationTransformer(MockMgmtInstanceTest):
 
         with patch.object(Backup, 'running', return_value=None):
             self.assertThat(mgmt_instance.status, Equals('SHUTDOWN'))
-            with patch.object(mgmtmodels, 'load_mgmt_instances',
-                              return_value=[mgmt_instance]):
+            with self.page_instances([mgmt_instance]):
                 with patch.object(self.flavor_mgr, 'get', return_value=flavor):
                     # invocation
                     transformer = mgmtmodels.NovaNotificationTransformer(
@@ -330,8 +366,7 @@ class TestNovaNotificationTransformer(MockMgmtInstanceTest):
         flavor = MagicMock(spec=Flavor)
         flavor.name = 'db.small'
 
-        with patch.object(mgmtmodels, 'load_mgmt_instances',
-                          return_value=[mgmt_instance]):
+        with self.page_instances([mgmt_instance]):
             with patch.object(self.flavor_mgr, 'get', return_value=flavor):
                 transformer = mgmtmodels.NovaNotificationTransformer(
                     context=self.context)
@@ -369,8 +404,7 @@ class TestMgmtInstanceTasks(MockMgmtInstanceTest):
         flavor = MagicMock(spec=Flavor)
         flavor.name = 'db.small'
 
-        with patch.object(mgmtmodels, 'load_mgmt_instances',
-                          return_value=[mgmt_instance]):
+        with self.page_instances([mgmt_instance]):
             with patch.object(self.flavor_mgr, 'get', return_value=flavor):
                 self.assertThat(self.context.auth_token,
                                 Is('some_secret_password'))
@@ -387,3 +421,16 @@ class TestMgmtInstanceTasks(MockMgmtInstanceTest):
                                                     'INFO',
                                                     ANY)
                     self.assertThat(self.context.auth_token, Is(None))
+
+    def test_public_exists_events_in_batches(self):
+        transformer = MagicMock()
+        transformer.iter_batches.return_value = iter([['a', 'b'], ['c']])
+
+        with patch.object(notifier, 'notify', return_value=None):
+            mgmtmodels.publish_exist_events(transformer, self.context)
+
+            self.assertEqual(3, notifier.notify.call_count)
+            notifier.notify.assert_any_call(self.context, 'test_host',
+                                            'trove.instance.exists', 'INFO',
+                                            'c')
+        self.assertFalse(transformer.called)
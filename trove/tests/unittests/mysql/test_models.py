@@ -0,0 +1,95 @@
+#    Copyright 2014 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+from mock import MagicMock
+from mock import patch
+from testtools import TestCase
+
+from trove.common import cfg
+from trove.common import exception
+from trove.extensions.mysql import models
+
+CONF = cfg.CONF
+
+USERS = [{'_name': 'joe', '_host': '%', '_password': 'secret',
+          '_databases': []},
+         {'_name': 'sue', '_host': '%', '_password': 'secret',
+          '_databases': []}]
+SCHEMAS = [{'_name': 'db1'}, {'_name': 'db2'}]
+
+
+class BulkCreateTest(TestCase):
+
+    def setUp(self):
+        super(BulkCreateTest, self).setUp()
+        self.context = MagicMock()
+        instance = MagicMock()
+        instance.datastore_version.manager = 'mysql'
+        self.client = MagicMock()
+        for target, value in (('load_and_verify', instance),
+                              ('create_guest_client', self.client)):
+            patcher = patch.object(models, target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        CONF.set_override('bulk_create', True, group='mysql')
+        self.addCleanup(CONF.clear_override, 'bulk_create', group='mysql')
+
+    def test_create_users(self):
+        self.client.bulk_create_users.return_value = [
+            {'name': 'joe', 'host': '%', 'status': 'created'},
+            {'name': 'sue', 'host': '%', 'status': 'created'}]
+
+        models.User.create(self.context, 'instance-id', USERS)
+
+        self.client.bulk_create_users.assert_called_once_with(USERS)
+        self.assertFalse(self.client.list_users.called)
+        self.assertFalse(self.client.create_user.called)
+
+    def test_create_users_existing(self):
+        self.client.bulk_create_users.return_value = [
+            {'name': 'joe', 'host': '%', 'status': 'skipped'},
+            {'name': 'sue', 'host': '%', 'status': 'exists'}]
+
+        self.assertRaises(exception.UserAlreadyExists, models.User.create,
+                          self.context, 'instance-id', USERS)
+
+    def test_create_schemas(self):
+        self.client.bulk_create_databases.return_value = [
+            {'name': 'db1', 'status': 'created'},
+            {'name': 'db2', 'status': 'created'}]
+
+        models.Schema.create(self.context, 'instance-id', SCHEMAS)
+
+        self.client.bulk_create_databases.assert_called_once_with(SCHEMAS)
+        self.assertFalse(self.client.list_databases.called)
+        self.assertFalse(self.client.create_database.called)
+
+    def test_create_schemas_existing(self):
+        self.client.bulk_create_databases.return_value = [
+            {'name': 'db1', 'status': 'exists'},
+            {'name': 'db2', 'status': 'skipped'}]
+
+        self.assertRaises(exception.DatabaseAlreadyExists,
+                          models.Schema.create,
+                          self.context, 'instance-id', SCHEMAS)
+
+    def test_create_schemas_without_bulk(self):
+        CONF.set_override('bulk_create', False, group='mysql')
+        self.client.list_databases.return_value = ([], None)
+
+        models.Schema.create(self.context, 'instance-id', SCHEMAS)
+
+        self.assertFalse(self.client.bulk_create_databases.called)
+        self.assertEqual(2, self.client.list_databases.call_count)
+        self.client.create_database.assert_called_once_with(SCHEMAS)
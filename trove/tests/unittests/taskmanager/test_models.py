@@ -12,6 +12,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import datetime
+import json
+import urlparse
 
 import testtools
 from mock import Mock, MagicMock, patch
@@ -346,7 +348,9 @@ class FreshInstanceTasksTest(testtools.TestCase):
 class ResizeVolumeTest(testtools.TestCase):
     def setUp(self):
         super(ResizeVolumeTest, self).setUp()
-        utils.poll_until = Mock()
+        poll_patcher = patch.object(utils, 'poll_until')
+        poll_patcher.start()
+        self.addCleanup(poll_patcher.stop)
         timeutils.isotime = Mock()
         self.instance = Mock()
         self.old_vol_size = 1
@@ -405,7 +409,7 @@ class ResizeVolumeTest(testtools.TestCase):
         self.instance.reset_mock()
 
     def test_resize_volume_poll_timeout(self):
-        utils.poll_until = Mock(side_effect=PollTimeOut)
+        utils.poll_until.side_effect = PollTimeOut
         self.assertRaises(PollTimeOut, self.action._verify_extend)
         self.assertEqual(2, self.instance.volume_client.volumes.get.call_count)
         utils.poll_until.side_effect = None
@@ -609,10 +613,112 @@ class BackupTasksTest(testtools.TestCase):
             return_value=self.container_content)
         self.swift_client.delete_object = MagicMock(return_value=None)
         self.swift_client.delete_container = MagicMock(return_value=None)
+        self.swift_client.get_capabilities = MagicMock(
+            side_effect=ClientException("foo"))
 
     def tearDown(self):
         super(BackupTasksTest, self).tearDown()
 
+    def _delete_manifest(self):
+        manifest = {'x-object-manifest': 'z_CLOUD/12e48'}
+        with patch.object(self.swift_client, 'head_object',
+                          return_value=manifest):
+            taskmanager_models.BackupTasks.delete_files_from_swift(
+                'dummy context', '12e48.xbstream.gz')
+
+    def _deleted_objects(self):
+        return [call[0] for call in
+                self.swift_client.delete_object.call_args_list]
+
+    def test_delete_files_lists_all_segments(self):
+        self._delete_manifest()
+        self.swift_client.get_container.assert_called_once_with(
+            'z_CLOUD', prefix='12e48', full_listing=True)
+        self.assertEqual([('z_CLOUD', 'first'),
+                          ('z_CLOUD', 'second'),
+                          ('z_CLOUD', 'third'),
+                          ('database_backups', '12e48.xbstream.gz')],
+                         self._deleted_objects())
+
+    def test_delete_files_retries_segment(self):
+        attempts = []
+
+        def _delete_object(cont, name):
+            attempts.append(name)
+            if attempts.count(name) == 1 and name == 'second':
+                raise ClientException("foo")
+
+        self.swift_client.delete_object.side_effect = _delete_object
+        self._delete_manifest()
+        self.assertEqual(2, attempts.count('second'))
+        self.assertEqual(1, attempts.count('third'))
+
+    def _bulk_response(self, result, status=200):
+        conn = MagicMock()
+        conn.getresponse.return_value.status = status
+        conn.getresponse.return_value.read.return_value = json.dumps(result)
+        self.swift_client.url = 'http://swift/v1/AUTH_tenant'
+        self.swift_client.token = 'token'
+        self.swift_client.http_connection = MagicMock(
+            return_value=(urlparse.urlparse(self.swift_client.url), conn))
+        return conn
+
+    def test_delete_files_bulk_delete(self):
+        self.swift_client.get_capabilities = MagicMock(
+            return_value={'bulk_delete': {'max_deletes_per_request': 2}})
+        conn = self._bulk_response({'Response Status': '200 OK',
+                                    'Errors': []})
+        self._delete_manifest()
+        requests = [call[0] for call in conn.request.call_args_list]
+        self.assertEqual(['/v1/AUTH_tenant?bulk-delete'] * 2,
+                         [request[1] for request in requests])
+        self.assertEqual(['/z_CLOUD/first\n/z_CLOUD/second',
+                          '/z_CLOUD/third'],
+                         [request[2] for request in requests])
+        self.assertEqual('token', requests[0][3]['X-Auth-Token'])
+        self.assertEqual([('database_backups', '12e48.xbstream.gz')],
+                         self._deleted_objects())
+
+    def test_delete_files_bulk_delete_errors(self):
+        self.swift_client.get_capabilities = MagicMock(
+            return_value={'bulk_delete': {'max_deletes_per_request': 10}})
+        self._bulk_response({'Response Status': '200 OK',
+                             'Errors': [['/z_CLOUD/second', '409 Conflict']]})
+        self._delete_manifest()
+        self.assertEqual([('z_CLOUD', 'second'),
+                          ('database_backups', '12e48.xbstream.gz')],
+                         self._deleted_objects())
+
+    def test_delete_files_bulk_delete_failed_status(self):
+        self.swift_client.get_capabilities = MagicMock(
+            return_value={'bulk_delete': {'max_deletes_per_request': 10}})
+        self._bulk_response({'Response Status': '502 Bad Gateway',
+                             'Errors': []})
+        self._delete_manifest()
+        self.assertEqual([('z_CLOUD', 'first'),
+                          ('z_CLOUD', 'second'),
+                          ('z_CLOUD', 'third'),
+                          ('database_backups', '12e48.xbstream.gz')],
+                         self._deleted_objects())
+
+    def test_bulk_delete_counts_deleted_segments(self):
+        self._bulk_response({'Response Status': '400 Bad Request',
+                             'Errors': [['/z_CLOUD/second', '409 Conflict']]})
+        self.assertEqual(
+            ['first', 'second', 'third'],
+            taskmanager_models.BackupTasks._bulk_delete(
+                self.swift_client, 'z_CLOUD', ['first', 'second', 'third'],
+                10))
+        self._bulk_response({'Response Status': '200 OK',
+                             'Errors': [['/z_CLOUD/second', '409 Conflict']]})
+        with patch.object(taskmanager_models.LOG, 'info') as info:
+            self.assertEqual(
+                ['second'],
+                taskmanager_models.BackupTasks._bulk_delete(
+                    self.swift_client, 'z_CLOUD',
+                    ['first', 'second', 'third'], 10))
+        self.assertIn('Deleted 2 of 3 segments', info.call_args[0][0])
+
     def test_delete_backup_nolocation(self):
         self.backup.location = ''
         taskmanager_models.BackupTasks.delete_backup('dummy context',
@@ -0,0 +1,171 @@
+#    Copyright 2014 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+from eventlet import greenpool
+from eventlet import greenthread
+from mock import MagicMock
+from mock import patch
+from testtools import TestCase
+
+from trove.common import cfg
+from trove.taskmanager import server_poller
+
+CONF = cfg.CONF
+
+
+class FakeServer(object):
+
+    def __init__(self, id):
+        self.id = id
+
+
+class ServerPollerTest(TestCase):
+
+    def setUp(self):
+        super(ServerPollerTest, self).setUp()
+        CONF.set_override('server_list_threshold', 3)
+        self.addCleanup(CONF.clear_override, 'server_list_threshold')
+        self.server_ids = ['server-%s' % i for i in range(3)]
+        self.listed_ids = self.server_ids + ['other']
+        self.admin_client = MagicMock()
+
+        def _list(search_opts=None, marker=None):
+            # Yield as nova would, so that other builds ask meanwhile.
+            greenthread.sleep(0)
+            # Pages of 2 servers, as with an osapi_max_limit of 2.
+            start = self.listed_ids.index(marker) + 1 if marker else 0
+            return [FakeServer(id)
+                    for id in self.listed_ids[start:start + 2]]
+
+        self.admin_client.servers.list.side_effect = _list
+        patcher = patch.object(server_poller.remote,
+                               'create_admin_nova_client',
+                               return_value=self.admin_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.poller = server_poller.ServerPoller(MagicMock())
+        self.client = MagicMock()
+
+    def _listings(self):
+        return [call for call in self.admin_client.servers.list.call_args_list
+                if call[1]['marker'] is None]
+
+    def _get_all(self, server_ids):
+        """Get the servers concurrently while all the builds wait."""
+        waits = [self.poller.waiting(server_id) for server_id in server_ids]
+        for wait in waits:
+            wait.__enter__()
+        try:
+            pool = greenpool.GreenPool()
+            builds = [pool.spawn(self.poller.get, self.client, server_id)
+                      for server_id in server_ids]
+            return [build.wait() for build in builds]
+        finally:
+            for wait in waits:
+                wait.__exit__(None, None, None)
+
+    def test_gets_below_threshold(self):
+        self._get_all(self.server_ids[:2])
+
+        self.assertEqual(2, self.client.servers.get.call_count)
+        self.assertFalse(self.admin_client.servers.list.called)
+
+    def test_one_listing_serves_waiting_builds(self):
+        servers = self._get_all(self.server_ids)
+
+        self.assertEqual(self.server_ids, [server.id for server in servers])
+        self.assertEqual(1, len(self._listings()))
+        self.assertFalse(self.client.servers.get.called)
+
+    def test_listing_is_paged(self):
+        self._get_all(self.server_ids)
+
+        markers = [call[1]['marker'] for call in
+                   self.admin_client.servers.list.call_args_list]
+        self.assertEqual([None, 'server-1', 'other'], markers)
+
+    def test_listing_changes_since(self):
+        with patch.object(server_poller.time, 'time', return_value=1000.0):
+            with patch.object(server_poller.timeutils, 'isotime',
+                              side_effect=lambda at: at):
+                self._get_all(self.server_ids)
+
+        search_opts = self._listings()[0][1]['search_opts']
+        self.assertEqual(1, search_opts['all_tenants'])
+        self.assertEqual(datetime.datetime.utcfromtimestamp(
+            1000 - server_poller.CHANGES_SINCE_MARGIN),
+            search_opts['changes-since'])
+
+    def test_unchanged_servers_are_kept(self):
+        CONF.set_override('server_list_max_age', 0)
+        self.addCleanup(CONF.clear_override, 'server_list_max_age')
+        self._get_all(self.server_ids)
+        self.listed_ids = ['server-0']
+
+        servers = self._get_all(self.server_ids)
+
+        self.assertEqual(self.server_ids, [server.id for server in servers])
+        self.assertEqual(2, len(self._listings()))
+        self.assertFalse(self.client.servers.get.called)
+
+    def test_one_listing_in_flight(self):
+        CONF.set_override('server_list_max_age', 0)
+        self.addCleanup(CONF.clear_override, 'server_list_max_age')
+
+        self._get_all(self.server_ids)
+
+        self.assertEqual(1, len(self._listings()))
+        self.assertFalse(self.client.servers.get.called)
+
+    def test_listing_is_reused(self):
+        self._get_all(self.server_ids)
+        self._get_all(self.server_ids)
+
+        self.assertEqual(1, len(self._listings()))
+
+    def test_listing_expires(self):
+        CONF.set_override('server_list_max_age', 0)
+        self.addCleanup(CONF.clear_override, 'server_list_max_age')
+        self._get_all(self.server_ids)
+        self._get_all(self.server_ids)
+
+        self.assertEqual(2, len(self._listings()))
+
+    def test_gets_servers_not_listed(self):
+        self.server_ids.append('new-server')
+
+        self._get_all(self.server_ids)
+
+        self.client.servers.get.assert_called_once_with('new-server')
+
+    def test_gets_on_list_error(self):
+        self.admin_client.servers.list.side_effect = Exception('boom')
+
+        self._get_all(self.server_ids)
+
+        self.assertEqual(3, self.client.servers.get.call_count)
+
+    def test_poll_server(self):
+        client = MagicMock()
+        client.servers.get.side_effect = [MagicMock(status='BUILD'),
+                                          MagicMock(status='ACTIVE')]
+        with patch.object(server_poller.utils.greenthread, 'sleep'):
+            server = server_poller.poll_server(
+                client, 'server-id',
+                lambda server: server.status == 'ACTIVE')
+
+        self.assertEqual('ACTIVE', server.status)
+        self.assertEqual([], server_poller.get_poller()._waiting)